@@ -9,13 +9,12 @@ from datetime import datetime
 from urllib.parse import urlparse
 import ipaddress
 from flask import Blueprint, current_app, request, jsonify
-from user_agents import parse as ua_parse
 from sqlalchemy.orm import sessionmaker
 
 try:
-    from .models import AnalyticsEvent, Base
+    from .models import AnalyticsEvent
 except Exception:  # pragma: no cover
-    from .app import AnalyticsEvent, Base  # type: ignore
+    from .app import AnalyticsEvent  # type: ignore
 
 analytics_bp = Blueprint("analytics", __name__, url_prefix="/analytics")
 
@@ -82,6 +81,10 @@ def collect():
     end = ts(data.get("ended_at_ms"), now)
     duration_ms = max(0, _safe_int((end - start).total_seconds() * 1000))
 
+    # user_agents compiles its whole regex table on import (~0.1 s), so it is
+    # loaded by the first beacon rather than at worker boot
+    from user_agents import parse as ua_parse
+
     ua_raw = request.headers.get("User-Agent") or ""
     ua = ua_parse(ua_raw)
     if ua.is_mobile:
@@ -147,6 +150,4 @@ def init_analytics(app, engine):
     """Bind the SQLAlchemy session factory and register the blueprint."""
     global SessionLocal
     SessionLocal = sessionmaker(bind=engine)
-    # Ensure table exists; restrict to AnalyticsEvent
-    Base.metadata.create_all(bind=engine, tables=[AnalyticsEvent.__table__])
     app.register_blueprint(analytics_bp)
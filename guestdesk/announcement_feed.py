@@ -0,0 +1,78 @@
+"""Announcements that are live right now, kept in memory between changes.
+
+The guest pages all ask the same question — which announcements are showing
+at this moment — and the answer only changes when an admin edits one or when
+a scheduled announcement starts or ends. The feed loads every announcement
+that has not yet ended (with its images, in one extra query), splits off the
+active ones and remembers when the next start or end falls due; it is served
+from memory until then or until the ``announcements`` revision moves.
+"""
+
+# GuestDesk
+# Copyright (c) 2025 Chris Tanton
+# SPDX-License-Identifier: LicenseRef-GDCL-1.1
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import selectinload
+
+from . import revisions
+from .models import Announcement
+
+# An announcement is live while starts_at <= now <= ends_at, so it drops out
+# at the first instant after ends_at
+_AFTER_END = timedelta(microseconds=1)
+
+
+def _snapshot(ann: Announcement) -> dict:
+    """Plain copy of an announcement safe to share across requests and threads."""
+    return {
+        'id': ann.id,
+        'title': ann.title,
+        'body': ann.body,
+        'starts_at': ann.starts_at,
+        'ends_at': ann.ends_at,
+        'images': [
+            {'id': img.id, 'original_filename': img.original_filename,
+             'stored_filename': img.stored_filename, 'version': img.version}
+            for img in ann.images
+        ],
+    }
+
+
+def build_feed(db, now: datetime | None = None) -> dict:
+    """Return ``{'active': [...], 'until': datetime | None}`` as of ``now``.
+
+    ``active`` is newest first; ``until`` is the next moment the active set
+    changes on its own (``None`` when nothing is scheduled).
+    """
+    now = now or datetime.utcnow()
+    rows = (
+        db.query(Announcement)
+        .options(selectinload(Announcement.images))
+        .filter((Announcement.ends_at.is_(None)) | (Announcement.ends_at >= now))
+        .order_by(Announcement.starts_at.desc(), Announcement.id.desc())
+        .all()
+    )
+    active = []
+    transitions = []
+    for ann in rows:
+        if ann.starts_at <= now:
+            active.append(_snapshot(ann))
+            if ann.ends_at is not None:
+                transitions.append(ann.ends_at + _AFTER_END)
+        else:
+            transitions.append(ann.starts_at)
+    return {'active': active, 'until': min(transitions) if transitions else None}
+
+
+def _current(feed: dict) -> bool:
+    return feed['until'] is None or datetime.utcnow() < feed['until']
+
+
+def active_announcements(db, limit: int | None = None) -> list[dict]:
+    """Announcements showing now, newest first. The dicts are shared; do not mutate."""
+    feed = revisions.app_cache('announcements.feed', revisions.ANNOUNCEMENTS, maxsize=1).get(
+        db, 'feed', lambda: build_feed(db), valid=_current)
+    return feed['active'][:limit] if limit else feed['active']
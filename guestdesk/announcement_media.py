@@ -0,0 +1,99 @@
+"""Phone-sized copies of announcement images.
+
+Originals are stored untouched; a background job writes WebP (or JPEG)
+copies at each width in ``ANNOUNCEMENT_IMAGE_WIDTHS`` into a ``_renditions``
+folder beside them. Pages list those copies in ``srcset`` so phones fetch a
+few dozen kilobytes instead of the camera original. Pillow is optional;
+without it, or until the job has run, the rendition URLs serve the original.
+"""
+
+# GuestDesk
+# Copyright (c) 2025 Chris Tanton
+# SPDX-License-Identifier: LicenseRef-GDCL-1.1
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from flask import current_app, has_app_context
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = None  # type: ignore
+
+try:
+    from .task_queue import q
+except Exception:  # pragma: no cover
+    q = None  # type: ignore
+
+ANNOUNCEMENT_IMAGE_WIDTHS = tuple(
+    sorted(int(w) for w in os.getenv("GUESTDESK_ANNOUNCEMENT_WIDTHS", "320,640,1280").split(",") if w.strip())
+)
+RENDITION_DIR = "_renditions"
+IMAGE_QUALITY = 78
+RENDITION_EXTENSIONS = (".webp", ".jpg")
+
+
+def rendition_path(directory: Path, stored_filename: str, width: int) -> Path | None:
+    """The written copy of ``stored_filename`` at ``width``, if there is one."""
+    for ext in RENDITION_EXTENSIONS:
+        candidate = directory / RENDITION_DIR / f"{stored_filename}.{width}{ext}"
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def remove_renditions(directory: Path, stored_filename: str) -> None:
+    for width in ANNOUNCEMENT_IMAGE_WIDTHS:
+        for ext in RENDITION_EXTENSIONS:
+            (directory / RENDITION_DIR / f"{stored_filename}.{width}{ext}").unlink(missing_ok=True)
+
+
+def render_widths(directory: str, stored_filename: str) -> list[int]:
+    """Job body: write every configured width for one image; returns the widths written."""
+    if Image is None:
+        return []
+    directory = Path(directory)
+    out_dir = directory / RENDITION_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        use_webp = bool(features.check("webp"))
+    except Exception:
+        use_webp = False
+    written = []
+    with Image.open(directory / stored_filename) as opened:
+        if getattr(opened, "is_animated", False):
+            return []  # animated GIFs keep playing from the original
+        im = ImageOps.exif_transpose(opened)
+        has_alpha = im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info)
+        im = im.convert("RGBA" if has_alpha and use_webp else "RGB")
+        for width in ANNOUNCEMENT_IMAGE_WIDTHS:
+            scale = min(1.0, width / float(im.width))
+            size = (max(1, round(im.width * scale)), max(1, round(im.height * scale)))
+            frame = im if size == im.size else im.resize(size, Image.LANCZOS)
+            ext = ".webp" if use_webp else ".jpg"
+            target = out_dir / f"{stored_filename}.{width}{ext}"
+            if use_webp:
+                frame.save(target, "WEBP", quality=IMAGE_QUALITY, method=4)
+            else:
+                frame.save(target, "JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
+            written.append(width)
+    return written
+
+
+def queue_renditions(directory: Path, stored_filename: str) -> None:
+    """Build renditions in the background, or inline if RQ is unavailable."""
+    if Image is None:
+        return
+    if q is not None:
+        try:
+            q.enqueue(render_widths, str(directory), stored_filename, job_timeout=120)
+            return
+        except Exception:
+            pass
+    try:
+        render_widths(str(directory), stored_filename)
+    except Exception:
+        if has_app_context():
+            current_app.logger.exception("Failed to build renditions for announcement image %s", stored_filename)
@@ -1,52 +1,159 @@
-"""Redis-backed idempotency helpers for guest submissions."""
+"""Redis-backed idempotency for guest submissions.
+
+Each form carries an ``idempotency_key``. ``reserve()`` claims it with one
+atomic round trip: a small Lua script either stores a ``pending`` marker
+(with the TTL) and reports the claim, or returns what is already stored:
+the marker while the first request is still working, or the submission id
+once it has finished. ``complete()`` replaces the marker with the id;
+``release()`` drops it when the submission was not stored, so the guest can
+try again. Two workers racing on the same key can never both claim it.
+
+When Redis is unreachable the same operations run against an in-process
+store, so duplicates from one worker are still caught (the database hash
+check covers the rest). After a failure Redis is left alone for
+``REDIS_RETRY_SECONDS`` rather than paying a connection timeout on every
+submission.
+
+Connections come from the shared pool in ``redis_pool``, created on the
+first call rather than at import.
+"""
 
 # GuestDesk
 # Copyright (c) 2025 Chris Tanton
 # SPDX-License-Identifier: LicenseRef-GDCL-1.1
 import os
+import threading
 import time
-from redis import Redis
-from redis.exceptions import RedisError
+
+from .redis_pool import get_redis
 
 IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "600"))
-_redis = Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+REDIS_RETRY_SECONDS = float(os.getenv("IDEMPOTENCY_REDIS_RETRY", "30"))
+PENDING = "pending"
+
+# KEYS[1] = key, ARGV[1] = ttl, ARGV[2] = marker; returns nil when claimed, else the stored value
+_RESERVE_LUA = """
+local current = redis.call('GET', KEYS[1])
+if current then return current end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[1])
+return false
+"""
+
+_client = None
+_reserve_script = None
+_redis_down_until = 0.0
+# Narrowed to redis.exceptions.RedisError once the client exists; until then
+# a failure to import or configure redis is handled like any Redis outage
+RedisError = Exception
+
+
+def _redis():
+    global _client, _reserve_script, RedisError
+    if _client is None:
+        from redis.exceptions import RedisError
+
+        _client = get_redis()
+        _reserve_script = _client.register_script(_RESERVE_LUA)
+    return _client
+
+
+def _key(token: str) -> str:
+    return f"idemp:{token}"
+
+
+class _LocalStore:
+    """Per-process stand-in for the Redis keys, with the same expiry."""
+
+    def __init__(self):
+        self._items: dict[str, tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, now: float) -> str | None:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        if item[0] <= now:
+            del self._items[key]
+            return None
+        return item[1]
+
+    def reserve(self, key: str) -> str | None:
+        now = time.monotonic()
+        with self._lock:
+            current = self._live(key, now)
+            if current is not None:
+                return current
+            if len(self._items) > 10000:
+                self._items = {k: v for k, v in self._items.items() if v[0] > now}
+            self._items[key] = (now + IDEMPOTENCY_TTL, PENDING)
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic() + IDEMPOTENCY_TTL, value)
 
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
 
-def seen(token: str) -> bool:
-    """Return ``True`` if *token* has already been recorded within the TTL."""
+
+_local = _LocalStore()
+
+
+def _call(remote, local):
+    """Run ``remote(client)``; on a Redis failure, open the breaker and run ``local()``."""
+    global _redis_down_until
+    if time.monotonic() >= _redis_down_until:
+        try:
+            return remote(_redis())
+        except RedisError:
+            _redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+    return local()
+
+
+def _decode(value) -> str | None:
+    if value is None:
+        return None
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def reserve(token: str) -> tuple[bool, int | None]:
+    """Claim *token* for a new submission.
+
+    Returns ``(True, None)`` when this request owns the token and should
+    store the submission. Otherwise the token was already used:
+    ``(False, id)`` once that submission exists, ``(False, None)`` while it
+    is still being stored.
+    """
     if not token:
-        return False
-    key = f"idemp:{token}"
+        return True, None
+    key = _key(token)
+    current = _decode(_call(
+        lambda r: _reserve_script(keys=[key], args=[IDEMPOTENCY_TTL, PENDING]),
+        lambda: _local.reserve(key),
+    ))
+    if current is None:
+        return True, None
     try:
-        added = _redis.setnx(key, int(time.time()))
-        if added:
-            _redis.expire(key, IDEMPOTENCY_TTL)
-        return not added
-    except RedisError:
-        return False
+        return False, int(current)
+    except ValueError:
+        return False, None
 
 
-def remember(token: str, submission_id: int) -> None:
-    """Persist the submission id so callers can retrieve it after retries."""
+def complete(token: str, submission_id: int) -> None:
+    """Record the stored submission for later duplicates of *token*."""
     if not token:
         return
-    try:
-        _redis.setex(f"idempres:{token}", IDEMPOTENCY_TTL, int(submission_id))
-    except RedisError:
-        return
+    key = _key(token)
+    _call(
+        lambda r: r.set(key, int(submission_id), ex=IDEMPOTENCY_TTL),
+        lambda: _local.set(key, str(int(submission_id))),
+    )
 
 
-def fetch(token: str) -> int | None:
-    """Return the cached submission id for *token*, if it is still available."""
+def release(token: str) -> None:
+    """Give up a claim whose submission was not stored."""
     if not token:
-        return None
-    try:
-        value = _redis.get(f"idempres:{token}")
-        if value is None:
-            return None
-        try:
-            return int(value)
-        except (TypeError, ValueError):
-            return None
-    except RedisError:
-        return None
+        return
+    key = _key(token)
+    _call(lambda r: r.delete(key), lambda: _local.delete(key))
@@ -25,7 +25,7 @@ from flask_wtf.csrf import CSRFProtect, generate_csrf
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_talisman import Talisman
-from sqlalchemy import create_engine, text, func
+from sqlalchemy import text, func
 from sqlalchemy.orm import sessionmaker, scoped_session
 from functools import wraps
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -45,7 +45,6 @@ from flask_babel import (
 )
 from babel.dates import get_day_names
 from .models import (
-    Base,
     Service,
     Announcement,
     AnnouncementImage,
@@ -59,13 +58,29 @@ from .models import (
     UserContact,
     PasswordResetToken,
     GrievanceCase,
+    submission_content_hash,
 )
 from . import pdf_config
+from . import redis_pool
+from . import revisions
+from . import settings_cache
+from .announcement_feed import active_announcements
+from .announcement_media import ANNOUNCEMENT_IMAGE_WIDTHS, queue_renditions, remove_renditions, rendition_path
+from .home_data import home_context
+from .database import (
+    create_app_engine,
+    create_readonly_engine,
+    database_url,
+    describe_engine,
+    reporting_database_url,
+)
+from . import migrations
 from .analytics import init_analytics
 from .services_calendar import expand_between
 from .mailer import send_category_notification, queue_mail, _recipient_for
-from .antispam import seen as idemp_seen, remember as remember_idemp, fetch as fetch_idemp_result
+from .antispam import complete as idemp_complete, release as idemp_release, reserve as idemp_reserve
 from .audit import log as audit_log
+from .uploads import UploadError, check_upload, save_upload
 from .permissions import (
     PERMISSION_GROUPS,
     PRESETS,
@@ -91,6 +106,9 @@ DATA_DIR = (
 )
 
 ANNOUNCEMENT_IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+# For URLs carrying the image's ``v=`` version. SQLite reuses the id of a
+# deleted row, so a URL without the current version is revalidated instead.
+ANNOUNCEMENT_IMAGE_MAX_AGE = 24 * 3600
 
 
 def announcement_upload_dir(announcement_id: int) -> Path:
@@ -109,7 +127,8 @@ def save_announcement_images(db, announcement_id: int, files) -> None:
         while (dest / stored).exists():
             stored = f'{base}_{counter}{ext}'
             counter += 1
-        f.save(dest / stored)
+        save_upload(f, dest / stored)
+        queue_renditions(dest, stored)
         db.add(AnnouncementImage(
             announcement_id=announcement_id,
             original_filename=f.filename,
@@ -119,10 +138,10 @@ def save_announcement_images(db, announcement_id: int, files) -> None:
 
 csrf = CSRFProtect()
 babel = Babel()
+# Storage is configured per app in create_app() (see redis_pool.limiter_config)
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=[],
-    storage_uri=os.getenv("RATELIMIT_STORAGE_URI", "memory://"),
 )
 
 def format_time_12(dt_obj: datetime) -> str:
@@ -249,6 +268,8 @@ def create_app():
         return fallback or "en"
 
     csrf.init_app(app)
+    for key, value in redis_pool.limiter_config().items():
+        app.config.setdefault(key, value)
     limiter.init_app(app)
     babel.init_app(app, locale_selector=_select_locale)
 
@@ -315,6 +336,7 @@ def create_app():
     app.jinja_env.globals['MAX_UPLOAD_BYTES'] = max_upload_bytes
     upload_mb_label = (f"{(max_upload_bytes / (1024 * 1024)):.1f}").rstrip('0').rstrip('.')
     app.jinja_env.globals['MAX_UPLOAD_MB_LABEL'] = upload_mb_label
+    app.jinja_env.globals['ANNOUNCEMENT_IMAGE_WIDTHS'] = ANNOUNCEMENT_IMAGE_WIDTHS
 
     @app.errorhandler(RequestEntityTooLarge)
     def handle_large_upload(_err):
@@ -357,15 +379,27 @@ def create_app():
     app.config.setdefault("ANALYTICS_ENABLED", True)
     app.config.setdefault("ANALYTICS_IP_SALT", os.environ.get("ANALYTICS_IP_SALT", ""))
     os.makedirs(DATA_DIR, exist_ok=True)
-    db_path = os.path.join(DATA_DIR, "guestdesk.db")
-    engine = create_engine(f"sqlite:///{db_path}", future=True, connect_args={"check_same_thread": False})
-    Base.metadata.create_all(engine)
+    db_url = database_url(DATA_DIR)
+    engine = create_app_engine(db_url)
+    try:
+        app.logger.info('Database %s: %s', engine.url.render_as_string(hide_password=True), describe_engine(engine))
+    except Exception:
+        app.logger.exception('Could not read database settings')
+    try:
+        if migrations.auto_migrate_enabled():
+            migrations.migrate(engine, log=app.logger.info)
+        elif migrations.pending(migrations.current_version(engine)):
+            app.logger.warning('Database schema is behind version %d; run scripts/migrate.py',
+                               migrations.SCHEMA_VERSION)
+    except Exception:
+        # Best-effort; the app can still serve pages the old schema supports
+        app.logger.exception('Schema migration failed')
+    session_factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
     try:
-        from .grievances import ensure_case_columns
-        ensure_case_columns(engine)
+        revisions.install(engine, session_factory)
     except Exception:
-        app.logger.exception('Grievance archive column migration failed')
-    Session = scoped_session(sessionmaker(bind=engine, autoflush=False, expire_on_commit=False))
+        app.logger.exception('Cache revision setup failed')
+    Session = scoped_session(session_factory)
     # Initialize analytics blueprint (and ensure table exists)
     try:
         init_analytics(app, engine)
@@ -378,6 +412,22 @@ def create_app():
         return Session()
     app.dbs = dbs
 
+    # Reporting pages (analytics, data tools, submission and grievance lists)
+    # read through their own read-only pool, optionally against a replica
+    reporting_url = reporting_database_url(db_url)
+    try:
+        reporting_engine = create_readonly_engine(reporting_url)
+    except Exception:
+        app.logger.exception('Read-only engine unavailable; reports use the main engine')
+        reporting_engine = engine
+    ReadSession = scoped_session(sessionmaker(bind=reporting_engine, autoflush=False, expire_on_commit=False))
+
+    def dbs_ro():
+        """Session on the read-only reporting engine; never commit through it."""
+        return ReadSession()
+    app.dbs_ro = dbs_ro
+    app.reporting_engine = reporting_engine
+
     def _hash_reset_token(raw_token: str) -> str:
         """Return a stable hash for storing password reset tokens."""
         return hashlib.sha256((raw_token or '').encode('utf-8')).hexdigest()
@@ -413,134 +463,30 @@ def create_app():
     @app.teardown_appcontext
     def shutdown_session(_exc=None):
         """Ensure scoped sessions are cleaned up after each request."""
-        try:
-            Session.remove()
-        except Exception:
-            pass
+        for scoped in (Session, ReadSession):
+            try:
+                scoped.remove()
+            except Exception:
+                pass
 
-    # Load settings from DB into app.config (override defaults)
+    # Load settings from DB into app.config (override defaults); workers
+    # reload them when the settings revision moves
     try:
         db = dbs()
-        for s in db.query(Setting).all():
-            key = s.key
-            val = s.value or ""
-            if key in (
-                "GRIEVANCE_EMAIL_TO", "GRIEVANCE_EMAIL_CC",
-                "MAINTENANCE_EMAIL_TO", "SUGGESTION_EMAIL_TO", "QUESTION_EMAIL_TO",
-            ):
-                app.config[key] = [x.strip() for x in val.split(',') if x.strip()]
-            else:
-                app.config[key] = val
+        settings_cache.load(app, db)
         db.close()
     except Exception:
-        pass
+        app.logger.exception('Could not load settings')
 
-    # --- lightweight migration: ensure users.approved and service flags exist ---
-    try:
-        with engine.connect() as conn:
-            cols = [r[1] for r in conn.exec_driver_sql('PRAGMA table_info(users)').all()]
-            if 'approved' not in cols:
-                conn.exec_driver_sql('ALTER TABLE users ADD COLUMN approved INTEGER NOT NULL DEFAULT 1')
-            s_cols = [r[1] for r in conn.exec_driver_sql('PRAGMA table_info(services)').all()]
-            if 'availability' not in s_cols:
-                conn.exec_driver_sql("ALTER TABLE services ADD COLUMN availability TEXT NOT NULL DEFAULT 'scheduled'")
-            if 'is_offsite' not in s_cols:
-                conn.exec_driver_sql('ALTER TABLE services ADD COLUMN is_offsite INTEGER NOT NULL DEFAULT 0')
-            if 'name_en' not in s_cols:
-                conn.exec_driver_sql('ALTER TABLE services ADD COLUMN name_en TEXT')
-            if 'name_es' not in s_cols:
-                conn.exec_driver_sql('ALTER TABLE services ADD COLUMN name_es TEXT')
-            if 'description_en' not in s_cols:
-                conn.exec_driver_sql('ALTER TABLE services ADD COLUMN description_en TEXT')
-            if 'description_es' not in s_cols:
-                conn.exec_driver_sql('ALTER TABLE services ADD COLUMN description_es TEXT')
-            if 'location_en' not in s_cols:
-                conn.exec_driver_sql('ALTER TABLE services ADD COLUMN location_en TEXT')
-            if 'location_es' not in s_cols:
-                conn.exec_driver_sql('ALTER TABLE services ADD COLUMN location_es TEXT')
-            if 'contact_en' not in s_cols:
-                conn.exec_driver_sql('ALTER TABLE services ADD COLUMN contact_en TEXT')
-            if 'contact_es' not in s_cols:
-                conn.exec_driver_sql('ALTER TABLE services ADD COLUMN contact_es TEXT')
-            if 'schedule_note_en' not in s_cols:
-                conn.exec_driver_sql('ALTER TABLE services ADD COLUMN schedule_note_en TEXT')
-            if 'schedule_note_es' not in s_cols:
-                conn.exec_driver_sql('ALTER TABLE services ADD COLUMN schedule_note_es TEXT')
-            # backfill defaults when columns newly added
-            conn.exec_driver_sql("UPDATE services SET name_en = name WHERE name_en IS NULL")
-            conn.exec_driver_sql("UPDATE services SET description_en = description WHERE description_en IS NULL")
-            conn.exec_driver_sql("UPDATE services SET location_en = location WHERE location_en IS NULL")
-            conn.exec_driver_sql("UPDATE services SET contact_en = contact WHERE contact_en IS NULL")
-            conn.exec_driver_sql("UPDATE services SET schedule_note_en = schedule_note WHERE schedule_note_en IS NULL")
-            # AnalyticsEvent columns (backfill if missing)
-            a_cols = [r[1] for r in conn.exec_driver_sql('PRAGMA table_info(analytics_events)').all()]
-            for col, ddl in [
-                ('category', 'TEXT'),
-                ('action', 'TEXT'),
-                ('label', 'TEXT'),
-                ('referrer_path', 'TEXT'),
-                ('is_staff', 'INTEGER'),
-                ('page_load_ms', 'INTEGER'),
-                ('anon_id', 'TEXT')
-            ]:
-                if col not in a_cols:
-                    conn.exec_driver_sql(f'ALTER TABLE analytics_events ADD COLUMN {col} {ddl}')
-            # Calendar tables (create or backfill columns)
-            try:
-                conn.exec_driver_sql('CREATE TABLE IF NOT EXISTS service_series (\n\
-                    id INTEGER PRIMARY KEY,\n\
-                    title TEXT NOT NULL,\n\
-                    location TEXT, category TEXT, notes TEXT, tz TEXT,\n\
-                    service_id INTEGER,\n\
-                    dtstart TEXT NOT NULL, dtend TEXT NOT NULL,\n\
-                    rrule TEXT, rdate TEXT, exdate TEXT,\n\
-                    is_all_day INTEGER DEFAULT 0, is_active INTEGER DEFAULT 1,\n\
-                    created_at TEXT, updated_at TEXT\n\
-                )')
-            except Exception:
-                pass
-            ss_cols = [r[1] for r in conn.exec_driver_sql('PRAGMA table_info(service_series)').all()] if conn else []
-            if 'service_id' not in ss_cols:
-                conn.exec_driver_sql('ALTER TABLE service_series ADD COLUMN service_id INTEGER')
-            try:
-                conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_service_series_service_id ON service_series(service_id)')
-            except Exception:
-                pass
-            try:
-                conn.exec_driver_sql('CREATE TABLE IF NOT EXISTS service_overrides (\n\
-                    id INTEGER PRIMARY KEY,\n\
-                    series_id INTEGER,\n\
-                    service_id INTEGER,\n\
-                    instance_start TEXT NOT NULL,\n\
-                    new_title TEXT, new_location TEXT, new_dtstart TEXT, new_dtend TEXT,\n\
-                    cancelled INTEGER DEFAULT 0\n\
-                )')
-            except Exception:
-                pass
-            so_cols = [r[1] for r in conn.exec_driver_sql('PRAGMA table_info(service_overrides)').all()] if conn else []
-            if 'service_id' not in so_cols:
-                conn.exec_driver_sql('ALTER TABLE service_overrides ADD COLUMN service_id INTEGER')
-            try:
-                conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_service_overrides_service_id ON service_overrides(service_id)')
-            except Exception:
-                pass
-            # (Removed) legacy PDF templates/bindings tables
-            # --- New per-form PDF config
-            try:
-                conn.exec_driver_sql('CREATE TABLE IF NOT EXISTS form_pdf_config (\n\
-                    id INTEGER PRIMARY KEY,\n\
-                    form_key TEXT NOT NULL UNIQUE,\n\
-                    template_path TEXT,\n\
-                    layout_json TEXT,\n\
-                    baseline_pad INTEGER NOT NULL DEFAULT 3,\n\
-                    attach_to_email INTEGER NOT NULL DEFAULT 0,\n\
-                    updated_at TEXT\n\
-                )')
-            except Exception:
-                pass
-    except Exception:
-        # Best-effort; app can still run without this if table doesn't exist yet
-        pass
+    @app.before_request
+    def _sync_settings():
+        """Pick up settings saved by another worker since the last request."""
+        if request.endpoint == 'static':
+            return
+        try:
+            settings_cache.sync(app, dbs())
+        except Exception:
+            app.logger.exception('Settings refresh failed')
 
     # --- user/session helpers (safe no-op if no User model exists) ---
     def load_user():
@@ -656,15 +602,7 @@ def create_app():
     def home():
         """Render the guest-facing dashboard with announcements and service counts."""
         db = dbs()
-        now = datetime.utcnow()
-        anns = db.query(Announcement).filter(
-            Announcement.starts_at <= now,
-        ).filter(
-            (Announcement.ends_at.is_(None)) | (Announcement.ends_at >= now)
-        ).order_by(Announcement.starts_at.desc()).limit(5).all()
-        cats = ['Food','Showers','Laundry','Mail','ID/Docs','Medical','Mental Health','Legal','Employment','Transportation','Other']
-        counts = {c: db.query(Service).filter(Service.category==c).count() for c in cats}
-        return render_template('home.html', anns=anns, counts=counts, cats=cats)
+        return render_template('home.html', **home_context(db))
 
     @app.route('/services')
     def services():
@@ -771,12 +709,7 @@ def create_app():
     @app.route('/announcements')
     def announcements():
         """Display active announcements for guests."""
-        db = dbs()
-        now = datetime.utcnow()
-        anns = db.query(Announcement).filter(Announcement.starts_at <= now).filter(
-            (Announcement.ends_at.is_(None)) | (Announcement.ends_at >= now)
-        ).order_by(Announcement.starts_at.desc()).all()
-        return render_template('announcements.html', anns=anns)
+        return render_template('announcements.html', anns=active_announcements(dbs()))
 
     # ----- Submissions (guest) -----
     @app.route('/report')
@@ -803,19 +736,20 @@ def create_app():
                 timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
                 planned_name = f"{timestamp}_{safe_name}"
                 try:
-                    photo_bytes = photo_file.read()
+                    photo_mimetype = check_upload(photo_file, ext, allowed=MAINTENANCE_PHOTO_EXTENSIONS)
+                except UploadError as exc:
+                    if exc.reason == 'empty':
+                        flash(_('The uploaded photo appears to be empty. Please choose a different file.'), 'danger')
+                    else:
+                        flash(_('Please upload a JPG, PNG, or GIF image.'), 'danger')
+                    return render_template('submit_kind.html', kind=kind, form=request.form)
                 except Exception:
                     flash(_('Could not read the uploaded photo. Please try again.'), 'danger')
                     return render_template('submit_kind.html', kind=kind, form=request.form)
-                if not photo_bytes:
-                    flash(_('The uploaded photo appears to be empty. Please choose a different file.'), 'danger')
-                    return render_template('submit_kind.html', kind=kind, form=request.form)
-                photo_file.stream.seek(0)
                 photo_plan = {
                     'file': photo_file,
                     'name': planned_name,
-                    'bytes': photo_bytes,
-                    'mimetype': photo_file.mimetype or 'application/octet-stream',
+                    'mimetype': photo_mimetype,
                     'path': None,
                     'display_path': None,
                 }
@@ -842,25 +776,31 @@ def create_app():
                 contact_name_val = (request.form.get('contact_name') or '').strip() or None
                 contact_info_val = (request.form.get('contact_info') or '').strip() or None
             token = (request.form.get('idempotency_key') or '').strip() or None
-            body_lower = body.lower()
+            content_hash = submission_content_hash(
+                kind, body,
+                subject=subject_val,
+                category=category_val,
+                building=building_val,
+                location=location_val,
+                contact_name=contact_name_val,
+                contact_info=contact_info_val,
+            )
 
             db = dbs()
 
-            already_seen = False
+            # One atomic round trip: claim the token, or learn the earlier
+            # submission's id (or that it is still being stored)
             try:
-                already_seen = idemp_seen(token)
+                claimed, existing_id = idemp_reserve(token)
             except Exception:
-                already_seen = False
-            if already_seen:
-                existing = None
-                existing_id = fetch_idemp_result(token)
-                if existing_id:
-                    existing = db.get(Submission, existing_id)
+                claimed, existing_id = True, None
+            if not claimed:
+                existing = db.get(Submission, existing_id) if existing_id else None
                 if existing is None:
                     existing = (
                         db.query(Submission)
                         .filter(Submission.kind == kind)
-                        .filter(func.lower(Submission.body) == body_lower)
+                        .filter(Submission.content_hash == content_hash)
                         .order_by(Submission.created_at.desc())
                         .first()
                     )
@@ -872,26 +812,19 @@ def create_app():
 
             if kind == 'maintenance':
                 dedupe_window = datetime.utcnow() - timedelta(minutes=1)
+                # kind + content_hash + created_at is one index range scan
                 duplicate_q = (
                     db.query(Submission)
                     .filter(Submission.kind == 'maintenance')
+                    .filter(Submission.content_hash == content_hash)
                     .filter(Submission.created_at >= dedupe_window)
-                    .filter(func.lower(Submission.body) == body_lower)
                 )
-                for column, value in [
-                    (Submission.subject, subject_val),
-                    (Submission.category, category_val),
-                    (Submission.building, building_val),
-                    (Submission.location, location_val),
-                    (Submission.contact_name, contact_name_val),
-                    (Submission.contact_info, contact_info_val),
-                ]:
-                    if value is None:
-                        duplicate_q = duplicate_q.filter(column.is_(None))
-                    else:
-                        duplicate_q = duplicate_q.filter(column == value)
                 existing = duplicate_q.order_by(Submission.created_at.desc()).first()
                 if existing:
+                    try:
+                        idemp_complete(token, existing.id)
+                    except Exception:
+                        pass
                     app.logger.info('Deduplicated maintenance submission, returning existing submission #%s', existing.id)
                     flash(_('Looks like this maintenance request was already received a moment ago. We will use the earlier one.'), 'info')
                     return render_template('thanks.html', sub=existing)
@@ -905,19 +838,20 @@ def create_app():
                 location=location_val,
                 contact_name=contact_name_val,
                 contact_info=contact_info_val,
+                content_hash=content_hash,
             )
             db.add(sub)
             try:
                 db.flush()
             except Exception:
                 db.rollback()
+                idemp_release(token)
                 raise
             if photo_plan:
                 upload_root = Path(DATA_DIR) / 'uploads' / kind / str(sub.id)
                 try:
-                    upload_root.mkdir(parents=True, exist_ok=True)
                     photo_path = upload_root / photo_plan['name']
-                    photo_plan['file'].save(photo_path)
+                    save_upload(photo_plan['file'], photo_path)
                     photo_plan['path'] = str(photo_path)
                     try:
                         photo_plan['display_path'] = str(photo_path.relative_to(DATA_DIR))
@@ -925,10 +859,22 @@ def create_app():
                         photo_plan['display_path'] = photo_plan['path']
                 except Exception as exc:
                     db.rollback()
+                    idemp_release(token)
                     app.logger.exception('Failed to save maintenance photo: %s', exc)
                     flash(_('Could not save the uploaded photo. Please try again.'), 'danger')
                     return render_template('submit_kind.html', kind=kind, form=request.form)
-            db.commit()
+            try:
+                db.commit()
+            except Exception:
+                db.rollback()
+                idemp_release(token)
+                if photo_plan and photo_plan['path']:
+                    Path(photo_plan['path']).unlink(missing_ok=True)
+                raise
+            try:
+                idemp_complete(token, sub.id)
+            except Exception:
+                pass
             # Create the tracker case in its own transaction so a tracker fault
             # can never break guest intake; the backfill script covers any gap.
             grievance_case = None
@@ -962,11 +908,6 @@ def create_app():
                 )
             else:
                 app.logger.info('Submission stored: kind=%s id=%s remote_addr=%s', kind, sub.id, remote_addr)
-            if token:
-                try:
-                    remember_idemp(token, sub.id)
-                except Exception:
-                    pass
             grievance_case_id = None
             if kind == 'grievance':
                 grievance_case_id = grievance_case.public_reference if grievance_case else build_grievance_case_id(sub.id, sub.created_at)
@@ -985,7 +926,7 @@ def create_app():
             attachments = []
             attach_info = None
             if photo_plan:
-                attachments.append((photo_plan['mimetype'], photo_plan['name'], photo_plan['bytes']))
+                attachments.append((photo_plan['mimetype'], photo_plan['name'], Path(photo_plan['path'])))
                 attach_info = f"Photo: {photo_plan['display_path'] or photo_plan['path']}"
             try:
                 cfg = db.query(FormPDFConfig).filter(FormPDFConfig.form_key == kind).first()
@@ -1811,12 +1752,11 @@ def create_app():
                     db.add(s)
                 else:
                     s.value = raw
-                # Also update live app config
-                if k in ('GRIEVANCE_EMAIL_TO', 'GRIEVANCE_EMAIL_CC', 'MAINTENANCE_EMAIL_TO', 'SUGGESTION_EMAIL_TO', 'QUESTION_EMAIL_TO'):
-                    app.config[k] = [x.strip() for x in raw.split(',') if x.strip()]
-                else:
-                    app.config[k] = raw
             db.commit()
+            # The commit bumped the settings revision; reload here so the
+            # audit entry and redirect see the new values at once (other
+            # workers follow on their next request)
+            settings_cache.load(app, db)
             after_data = {k: app.config.get(k) for k in keys}
             audit_log(
                 "settings.email.update",
@@ -1869,9 +1809,9 @@ def create_app():
         """Translate the staff filter into a SQL WHERE clause fragment."""
         staff = (request.args.get('staff') or '').strip()
         if staff == '1':
-            return " AND COALESCE(is_staff,0)=1"
+            return " AND COALESCE(is_staff, FALSE) = TRUE"
         if staff == '0':
-            return " AND COALESCE(is_staff,0)=0"
+            return " AND COALESCE(is_staff, FALSE) = FALSE"
         return ""
 
     def _bind_list(prefix: str, values: list[str]) -> tuple[str, dict[str, str]]:
@@ -1945,12 +1885,12 @@ def create_app():
                 COUNT(*) AS total,
                 COUNT(DISTINCT {unique_expr}) AS uniques,
                 SUM(CASE WHEN category = 'form' THEN 1 ELSE 0 END) AS forms,
-                SUM(CASE WHEN COALESCE(is_staff,0)=1 THEN 1 ELSE 0 END) AS staff
+                SUM(CASE WHEN COALESCE(is_staff, FALSE) = TRUE THEN 1 ELSE 0 END) AS staff
             FROM analytics_events
             WHERE started_at >= :start AND started_at < :end
             {staff_clause}
         """
-        with engine.connect() as conn:
+        with reporting_engine.connect() as conn:
             res = conn.execute(text(sql), params).mappings().first()
         total = int((res or {}).get('total') or 0)
         staff_hits = int((res or {}).get('staff') or 0)
@@ -1980,7 +1920,7 @@ def create_app():
             GROUP BY day
             ORDER BY day
         """
-        with engine.connect() as conn:
+        with reporting_engine.connect() as conn:
             rows = conn.execute(text(sql), params).mappings().all()
         data = [{"date": str(r['day']), "hits": int(r['hits']), "uniques": int(r['uniques'])} for r in rows]
         csv_rows = [(d["date"], d["hits"], d["uniques"]) for d in data]
@@ -2007,7 +1947,7 @@ def create_app():
             ORDER BY views DESC
             LIMIT 25
         """
-        with engine.connect() as conn:
+        with reporting_engine.connect() as conn:
             rows = conn.execute(text(sql), params).mappings().all()
             paths = [r['path'] for r in rows]
             samples = _load_samples(conn, params, staff_clause, paths)
@@ -2048,7 +1988,7 @@ def create_app():
             ORDER BY transitions DESC
             LIMIT 50
         """
-        with engine.connect() as conn:
+        with reporting_engine.connect() as conn:
             rows = conn.execute(text(sql), params).mappings().all()
         data = [{"from": r['prev_path'] or '(direct)', "to": r['path'], "count": int(r['transitions'])} for r in rows]
         return jsonify(data)
@@ -2069,7 +2009,7 @@ def create_app():
             GROUP BY cat
             ORDER BY c DESC
         """
-        with engine.connect() as conn:
+        with reporting_engine.connect() as conn:
             rows = conn.execute(text(sql), params).mappings().all()
         data = [{"category": r['cat'], "count": int(r['c'])} for r in rows]
         return jsonify(data)
@@ -2092,7 +2032,7 @@ def create_app():
             ORDER BY c DESC
             LIMIT 50
         """
-        with engine.connect() as conn:
+        with reporting_engine.connect() as conn:
             rows = conn.execute(text(sql), params).mappings().all()
         data = [{"form": r['form'], "count": int(r['c'])} for r in rows]
         return jsonify(data)
@@ -2113,7 +2053,7 @@ def create_app():
               {staff_clause}
             GROUP BY path
         """
-        with engine.connect() as conn:
+        with reporting_engine.connect() as conn:
             rows = conn.execute(text(sql), params).mappings().all()
             paths = [r['path'] for r in rows]
             samples = _load_samples(conn, params, staff_clause, paths)
@@ -2203,7 +2143,11 @@ def create_app():
     @app.get('/admin/services/feed')
     @permission_required('services.view')
     def admin_services_feed():
-        """Return merged service occurrences for FullCalendar in the admin UI."""
+        """Return merged service occurrences for FullCalendar in the admin UI.
+
+        ``since=<revision>`` switches to the incremental envelope from
+        ``feed_payload``; ``compact=1`` packs events as per-series rows.
+        """
         from dateutil.parser import isoparse
         try:
             s = request.args.get('start') or ''
@@ -2213,11 +2157,17 @@ def create_app():
         except Exception:
             return jsonify([])
         svc_id = request.args.get('service_id', type=int)
+        category = (request.args.get('category') or '').strip() or None
+        since = request.args.get('since', type=int)
+        compact = (request.args.get('compact') or '').strip() in ('1', 'true', 'yes')
         db = dbs()
         try:
-            from .services_calendar import merged_occurrences
-            events = merged_occurrences(db, start, end, service_id=svc_id)
-            return jsonify(events)
+            from .services_calendar import cached_occurrences, feed_payload
+            if 'since' not in request.args and not compact:
+                # Plain list for callers that predate incremental fetches
+                return jsonify(cached_occurrences(db, start, end, service_id=svc_id, category=category))
+            return jsonify(feed_payload(db, start, end, since=since, service_id=svc_id,
+                                        category=category, compact=compact))
         finally:
             db.close()
 
@@ -2737,14 +2687,16 @@ def create_app():
         try:
             target.relative_to(root)
             target.unlink(missing_ok=True)
+            remove_renditions(root, img.stored_filename)
         except (ValueError, OSError):
             current_app.logger.exception('Failed to delete announcement image file')
         flash(_('Image removed.'), 'info')
         return redirect(url_for('admin_announcements_edit', aid=aid))
 
     @app.route('/announcements/image/<int:image_id>')
-    def announcement_image(image_id: int):
-        """Serve an announcement image on the public site."""
+    @app.route('/announcements/image/<int:image_id>/w<int:width>')
+    def announcement_image(image_id: int, width: int | None = None):
+        """Serve an announcement image, or its copy ``width`` pixels wide."""
         db = dbs()
         img = db.get(AnnouncementImage, image_id)
         if not img:
@@ -2757,7 +2709,17 @@ def create_app():
             abort(404)
         if not target.is_file():
             abort(404)
-        return send_file(target)
+        max_age = ANNOUNCEMENT_IMAGE_MAX_AGE if request.args.get('v') == img.version else 0
+        if width is not None:
+            if width not in ANNOUNCEMENT_IMAGE_WIDTHS:
+                abort(404)
+            rendition = rendition_path(root, img.stored_filename, width)
+            if rendition is not None:
+                target = rendition
+            else:
+                # Copy not written yet: send the original, but check back soon
+                max_age = min(max_age, 60)
+        return send_file(target, conditional=True, max_age=max_age)
 
     @app.route('/admin/announcements/<int:aid>/delete', methods=['POST'])
     @permission_required('services.edit')
@@ -2777,7 +2739,7 @@ def create_app():
     @permission_required('submissions.view')
     def admin_submissions():
         """List recent submissions with optional filtering by kind."""
-        db = dbs()
+        db = dbs_ro()
         kind = request.args.get('kind')
         q = db.query(Submission)
         if kind:
@@ -2846,7 +2808,7 @@ def create_app():
     @roles_required('admin')
     def admin_data_tools():
         """Provide operational summaries (submission counts, uploads, arcade stats)."""
-        db = dbs()
+        db = dbs_ro()
         submission_total = db.query(func.count(Submission.id)).scalar() or 0
         score_rows = (
             db.query(GameScore.game, func.count(GameScore.id))
@@ -2878,6 +2840,8 @@ def create_app():
             submission_total=int(submission_total),
             upload_summary=upload_summary,
             leaderboard=leaderboard,
+            redis_stats=redis_pool.pool_stats(),
+            rate_limit_storage=app.config.get('RATELIMIT_STORAGE_URI'),
         )
 
     @app.route('/admin/submissions/clear', methods=['POST'])
@@ -1,17 +1,26 @@
+import hashlib
 import json
 import os
 import re
+import tarfile
+import threading
+import time
 from pathlib import Path
 from functools import wraps
 
 from flask import (
     Blueprint, render_template, jsonify,
     request, redirect, url_for, flash, abort,
-    session, g, send_from_directory
+    session, g, send_from_directory, current_app, Response, stream_with_context
 )
+from sqlalchemy.orm import joinedload, selectinload
 from werkzeug.utils import secure_filename
 
+from . import revisions
+from .models import Display, Setting, Slide, Slideshow
 from .permissions import permission_required_rw
+from .slide_media import pick_height, queue_slide_media
+from .uploads import spool
 
 bp = Blueprint("display", __name__)
 
@@ -29,21 +38,47 @@ LEGACY_SLIDES_DIR = BASE_DIR / "static" / "display_slides"
 IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 VIDEO_EXTENSIONS = {".mp4"}
 ALLOWED_TRANSITIONS = {"fade"}
+# Media stored under content hashes (and renditions derived from them) is
+# served as immutable; older uploads keep their names and revalidate.
+CONTENT_NAME_LENGTH = 20
+CONTENT_NAME_RE = re.compile(r"^(?:_renditions/)?[0-9a-f]{%d}\." % CONTENT_NAME_LENGTH)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MEDIA_MAX_AGE = 300
+# Long-poll tuning: how long a screen's request may wait, how many may wait
+# at once per process (the rest fall back to timed polling) and how often a
+# waiter rechecks the file for saves made by other workers.
+WAIT_TIMEOUT = float(os.environ.get("GUESTDESK_DISPLAY_WAIT", "25"))
+MAX_WAITERS = int(os.environ.get("GUESTDESK_DISPLAY_MAX_WAITERS", "32"))
+WAIT_RECHECK = 1.0
+WAIT_BUSY_RETRY = 15
+BUNDLE_CHUNK = 64 * 1024
 
 
 def ensure_slide_storage():
     SLIDES_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def unique_filename(directory: Path, filename: str) -> str:
-    candidate = filename
-    base = Path(filename).stem or "slide"
-    ext = Path(filename).suffix
-    counter = 1
-    while (directory / candidate).exists():
-        candidate = f"{base}_{counter}{ext}"
-        counter += 1
-    return candidate
+def store_slide_upload(file) -> str:
+    """Save an upload under a name derived from its content and return that name.
+
+    The file is streamed to a temp file while hashing, then moved to
+    ``<sha256 prefix><ext>``; re-uploading the same file reuses the copy
+    already on disk. Content names never change meaning, so they can be
+    cached forever.
+    """
+    ext = Path(secure_filename(file.filename or "")).suffix.lower()
+    tmp_name, _, digest = spool(file, SLIDES_DIR)
+    filename = f"{digest[:CONTENT_NAME_LENGTH]}{ext}"
+    try:
+        if (SLIDES_DIR / filename).exists():
+            os.unlink(tmp_name)
+        else:
+            os.replace(tmp_name, SLIDES_DIR / filename)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+    return filename
 
 
 def clean_transition(_raw: str | None = None) -> str:
@@ -65,10 +100,6 @@ def slugify(text: str) -> str:
     return text.strip("-")
 
 
-def next_slide_id(slides: list[dict]) -> int:
-    return (max(s["id"] for s in slides) + 1) if slides else 1
-
-
 # ---------- Config load / save / migrate ----------
 
 def _migrate_legacy(data: dict) -> dict:
@@ -76,7 +107,7 @@ def _migrate_legacy(data: dict) -> dict:
     Convert old {zones, slides} shape to new {displays, slideshows} shape.
     Each zone becomes a display + a slideshow named "<zone name>".
     Existing zone slides are moved into that slideshow.
-    Called once on first load of old data; result is saved back.
+    Applied by ``import_config`` when importing an old file.
     """
     zones = data.get("zones", [])
     flat_slides = data.get("slides", [])
@@ -124,32 +155,197 @@ def _migrate_legacy(data: dict) -> dict:
     return {"displays": displays, "slideshows": slideshows}
 
 
-def load_config() -> dict:
-    raw = None
-    for path in (DATA_PATH, LEGACY_DATA_PATH):
-        if path.exists():
-            with path.open() as f:
-                raw = json.load(f)
-            break
+def _slide_dict(slide: Slide) -> dict:
+    data = {
+        "id": slide.id,
+        "type": slide.type,
+        "duration": slide.duration,
+        "active": bool(slide.active),
+        "order": slide.position,
+        "transition": slide.transition or "fade",
+    }
+    if slide.type == "text":
+        data["headline"] = slide.headline or ""
+        data["subheadline"] = slide.subheadline or ""
+        data["body"] = slide.body or ""
+    else:
+        data["file"] = slide.file or ""
+        if slide.original_name:
+            data["name"] = slide.original_name
+        if slide.renditions:
+            data["renditions"] = json.loads(slide.renditions)
+        if slide.poster:
+            data["poster"] = slide.poster
+    return data
+
+
+def _build_snapshot(db) -> dict:
+    slideshows = (
+        db.query(Slideshow).options(selectinload(Slideshow.slides)).order_by(Slideshow.id).all()
+    )
+    displays = db.query(Display).options(joinedload(Display.slideshow)).order_by(Display.id).all()
+    return {
+        "displays": {
+            d.slug: {
+                "name": d.name,
+                "location": d.location or "",
+                "active": bool(d.active),
+                "assigned_slideshow": d.slideshow.slug if d.slideshow else None,
+                "max_height": d.max_height,
+            }
+            for d in displays
+        },
+        "slideshows": {
+            ss.slug: {
+                "name": ss.name,
+                "description": ss.description or "",
+                "fade_duration": ss.fade_duration,
+                "slides": [_slide_dict(slide) for slide in ss.slides],
+            }
+            for ss in slideshows
+        },
+        "revision": revisions.current(db, revisions.DISPLAYS)[0],
+    }
+
+
+def config_snapshot(db=None) -> dict:
+    """All displays and slideshows as plain dicts, shared by read-only callers.
+
+    Built from the database once per ``displays`` revision, so a poll costs
+    the per-request revision read. Do not mutate the result.
+    """
+    db = db if db is not None else current_app.dbs()
+    cache = revisions.app_cache("display.config", revisions.DISPLAYS, maxsize=1)
+    return cache.get(db, "config", lambda: _build_snapshot(db))
+
+
+# Wakes long-polling screens in this process as soon as an edit commits;
+# edits made by other workers are noticed on the next revision recheck.
+_config_changed = threading.Condition()
+_waiter_slots = threading.BoundedSemaphore(max(1, MAX_WAITERS))
+
+
+def _notify_config_changed():
+    with _config_changed:
+        _config_changed.notify_all()
+
 
-    if not raw:
-        return {"displays": {}, "slideshows": {}}
+def commit(db):
+    """Commit display edits (bumping the ``displays`` revision) and wake screens."""
+    db.commit()
+    _notify_config_changed()
 
-    # Migrate old zone-based format
-    if "zones" in raw or "slides" in raw:
-        raw = _migrate_legacy(raw)
-        save_config(raw)
-        return raw
 
-    raw.setdefault("displays", {})
-    raw.setdefault("slideshows", {})
-    return raw
+def display_row(db, slug: str) -> Display | None:
+    return db.query(Display).filter(Display.slug == slug).one_or_none()
 
 
-def save_config(cfg: dict):
-    DATA_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with DATA_PATH.open("w") as f:
-        json.dump(cfg, f, indent=2)
+def slideshow_row(db, slug: str) -> Slideshow | None:
+    return db.query(Slideshow).filter(Slideshow.slug == slug).one_or_none()
+
+
+def record_slide_media(db, filename: str, media: dict) -> int:
+    """Store rendition/poster names on every slide showing ``filename``."""
+    slides = db.query(Slide).filter(Slide.file == filename).all()
+    for slide in slides:
+        if "renditions" in media:
+            slide.renditions = json.dumps(media["renditions"], sort_keys=True)
+        if "poster" in media:
+            slide.poster = media["poster"]
+    if slides:
+        commit(db)
+    return len(slides)
+
+
+# ---------- Import from display_config.json ----------
+
+IMPORT_MARKER = "display_config_imported"
+
+
+def import_config(db, data: dict) -> tuple[int, int]:
+    """Create rows for a parsed ``display_config.json`` (either format).
+
+    Returns ``(displays, slideshows)`` created; slugs already present are
+    left untouched. The caller commits.
+    """
+    if "zones" in data or "slides" in data:
+        data = _migrate_legacy(data)
+    shows = {ss.slug: ss for ss in db.query(Slideshow).all()}
+    created_shows = 0
+    for slug, raw in (data.get("slideshows") or {}).items():
+        if slug in shows:
+            continue
+        ss = Slideshow(
+            slug=slug,
+            name=raw.get("name") or slug,
+            description=raw.get("description") or "",
+            fade_duration=raw.get("fade_duration", 1.4),
+        )
+        ordered = sorted(raw.get("slides") or [], key=lambda s: s.get("order", s.get("id", 0)))
+        for pos, item in enumerate(ordered, start=1):
+            ss.slides.append(Slide(
+                type=item.get("type", "text"),
+                position=pos,
+                duration=to_int(item.get("duration"), 10),
+                active=bool(item.get("active", True)),
+                transition=clean_transition(item.get("transition")),
+                headline=item.get("headline"),
+                subheadline=item.get("subheadline"),
+                body=item.get("body"),
+                file=item.get("file") or None,
+                original_name=item.get("name"),
+                renditions=json.dumps(item["renditions"], sort_keys=True) if item.get("renditions") else None,
+                poster=item.get("poster"),
+            ))
+        db.add(ss)
+        shows[slug] = ss
+        created_shows += 1
+    existing = {slug for (slug,) in db.query(Display.slug).all()}
+    created_displays = 0
+    for slug, raw in (data.get("displays") or {}).items():
+        if slug in existing:
+            continue
+        db.add(Display(
+            slug=slug,
+            name=raw.get("name") or slug,
+            location=raw.get("location") or "",
+            active=bool(raw.get("active", True)),
+            max_height=to_int(raw.get("max_height")),
+            slideshow=shows.get(raw.get("assigned_slideshow")),
+        ))
+        created_displays += 1
+    return created_displays, created_shows
+
+
+def import_json_config(db) -> bool:
+    """One-time import of the JSON config into the database.
+
+    Runs at most once per database (recorded in ``settings``); the file is
+    left in place as a backup. Returns True when an import happened.
+    """
+    if db.get(Setting, IMPORT_MARKER) is not None:
+        return False
+    path = next((p for p in (DATA_PATH, LEGACY_DATA_PATH) if p.is_file()), None)
+    counts = (0, 0)
+    if path is not None:
+        with path.open() as f:
+            data = json.load(f)
+        counts = import_config(db, data or {})
+    db.add(Setting(key=IMPORT_MARKER, value=str(path) if path else ""))
+    commit(db)
+    if path is not None:
+        current_app.logger.info("Imported %d display(s) and %d slideshow(s) from %s", *counts, path)
+    return path is not None
+
+
+@bp.record_once
+def _import_on_startup(state):
+    app = state.app
+    with app.app_context():
+        try:
+            import_json_config(app.dbs())
+        except Exception:
+            app.logger.exception("Importing display_config.json failed")
 
 
 def get_display(cfg: dict, slug: str) -> dict | None:
@@ -166,44 +362,198 @@ def active_slides(slideshow: dict) -> list[dict]:
     return slides
 
 
-def normalize_orders(slides: list[dict]):
+def normalize_orders(slides: list[Slide]):
     for idx, slide in enumerate(slides, start=1):
-        slide["order"] = idx
+        slide.position = idx
 
 
 # ---------- Public API ----------
 
-@bp.route("/api/display-slides/<display_slug>")
-def display_slides_api(display_slug):
-    """JSON API consumed by the TV display page."""
-    cfg = load_config()
-    display = get_display(cfg, display_slug)
-    if not display or not display.get("active", True):
-        abort(404)
+# Values derived from the current snapshot (content tokens, serialized
+# payloads), recomputed only after the snapshot changes
+_derived_lock = threading.Lock()
+_derived_cache = {"cfg": None, "values": {}}
 
-    ss_slug = display.get("assigned_slideshow")
-    slideshow = get_slideshow(cfg, ss_slug) if ss_slug else None
-    if not slideshow:
-        return jsonify({"display": display, "slideshow": None, "slides": []})
 
-    slides = active_slides(slideshow)
+def _content_token(*parts) -> str:
+    blob = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(blob).hexdigest()[:16]
+
+
+def _derived(cfg: dict, key, build):
+    with _derived_lock:
+        if _derived_cache["cfg"] is not cfg:
+            _derived_cache["cfg"] = cfg
+            _derived_cache["values"] = {}
+        if key in _derived_cache["values"]:
+            return _derived_cache["values"][key]
+    value = build()
+    with _derived_lock:
+        if _derived_cache["cfg"] is cfg:
+            _derived_cache["values"][key] = value
+    return value
+
+
+def display_token(cfg: dict, display_slug: str) -> str | None:
+    """Token that changes only when this display or its slideshow changes."""
+    def build():
+        display = get_display(cfg, display_slug)
+        if not display or not display.get("active", True):
+            return None
+        ss_slug = display.get("assigned_slideshow")
+        return _content_token(display, get_slideshow(cfg, ss_slug) if ss_slug else None)
+    return _derived(cfg, ("display-token", display_slug), build)
+
+
+def slideshow_token(cfg: dict, ss_slug: str) -> str | None:
+    def build():
+        slideshow = get_slideshow(cfg, ss_slug)
+        return _content_token(slideshow) if slideshow else None
+    return _derived(cfg, ("slideshow-token", ss_slug), build)
+
+
+def _slide_media(slide: dict, height: int | None = None) -> tuple[str | None, str | None]:
+    """``(media file, poster)`` a screen of ``height`` should load for ``slide``."""
+    if not slide.get("file") or slide.get("type") not in ("image", "video"):
+        return None, None
+    media_file = slide["file"]
+    if height and slide.get("type") == "image":
+        media_file = (slide.get("renditions") or {}).get(str(height), media_file)
+    return media_file, slide.get("poster")
+
+
+def _enrich_slides(slideshow: dict, height: int | None = None) -> list[dict]:
     enriched = []
-    for slide in slides:
+    for slide in active_slides(slideshow):
         payload = dict(slide)
+        payload.pop("renditions", None)
+        payload.pop("poster", None)
         payload["transition"] = slide.get("transition") or "fade"
-        if slide.get("file") and slide.get("type") in ("image", "video"):
-            payload["file_url"] = url_for("display.display_media", filename=slide["file"])
+        media_file, poster = _slide_media(slide, height)
+        if media_file:
+            payload["file_url"] = url_for("display.display_media", filename=media_file)
+            if poster:
+                payload["poster_url"] = url_for("display.display_media", filename=poster)
         enriched.append(payload)
+    return enriched
 
-    return jsonify({
+
+def _screen_height(display: dict | None = None) -> int | None:
+    """Rendition height for this request: ``?h=`` from the screen, else the display's ``max_height``."""
+    requested = request.args.get("h", type=int) or to_int((display or {}).get("max_height"))
+    return pick_height(requested)
+
+
+def _display_payload(cfg: dict, display_slug: str, height: int | None = None) -> dict | None:
+    display = get_display(cfg, display_slug)
+    if not display or not display.get("active", True):
+        return None
+    token = display_token(cfg, display_slug)
+    ss_slug = display.get("assigned_slideshow")
+    slideshow = get_slideshow(cfg, ss_slug) if ss_slug else None
+    if not slideshow:
+        return {"display": display, "slideshow": None, "slides": [], "token": token}
+    return {
         "display": display,
         "slideshow": {k: v for k, v in slideshow.items() if k != "slides"},
-        "slides": enriched,
-    })
+        "slides": _enrich_slides(slideshow, height),
+        "token": token,
+    }
+
+
+def _slideshow_payload(cfg: dict, ss_slug: str, height: int | None = None) -> dict | None:
+    slideshow = get_slideshow(cfg, ss_slug)
+    if not slideshow:
+        return None
+    return {
+        "display": {"name": slideshow["name"], "active": True},
+        "slideshow": {k: v for k, v in slideshow.items() if k != "slides"},
+        "slides": _enrich_slides(slideshow, height),
+        "token": slideshow_token(cfg, ss_slug),
+    }
+
+
+def _wait_for_change(token_for, payload_for):
+    """Long-poll: answer once the content token differs from ``?token=``.
 
+    Responds ``{"changed": true, ...payload}`` as soon as the content differs,
+    or ``{"changed": false, "token": ...}`` after the timeout. When every
+    waiter slot is taken the reply carries ``retry_after`` so the screen
+    falls back to polling instead of tying up a worker thread.
+    """
+    known = request.args.get("token", "")
+    timeout = request.args.get("timeout", type=float) or WAIT_TIMEOUT
+    timeout = max(1.0, min(timeout, WAIT_TIMEOUT))
+
+    db = current_app.dbs()
+    cfg = config_snapshot(db)
+    token = token_for(cfg)
+    if token is None:
+        abort(404)
+    if token != known:
+        return jsonify({"changed": True, **payload_for(cfg)})
+    if not _waiter_slots.acquire(blocking=False):
+        return jsonify({"changed": False, "token": token, "retry_after": WAIT_BUSY_RETRY})
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            with _config_changed:
+                _config_changed.wait(min(remaining, WAIT_RECHECK))
+            revisions.refresh(db)
+            cfg = config_snapshot(db)
+            token = token_for(cfg)
+            if token is None:
+                abort(404)
+            if token != known:
+                return jsonify({"changed": True, **payload_for(cfg)})
+    finally:
+        _waiter_slots.release()
+    return jsonify({"changed": False, "token": token})
+
+
+def _conditional_json(cfg: dict, kind: str, slug: str, token: str | None, payload_for, height=None):
+    """Serve a payload under its content token as ETag, or ``304`` if unchanged.
+
+    The serialized body is kept per snapshot and rendition height, so repeat
+    polls neither rebuild the slide list nor call ``url_for`` again.
+    """
+    if token is None:
+        abort(404)
+    etag = f"{token}.{height}" if height else token
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        body = _derived(cfg, (kind + "-body", slug, height),
+                        lambda: current_app.json.dumps(payload_for(cfg)))
+        resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
 
-def _render_display(display_slug: str):
-    cfg = load_config()
+
+@bp.route("/api/display-slides/<display_slug>")
+def display_slides_api(display_slug):
+    """JSON API consumed by the TV display page."""
+    cfg = config_snapshot()
+    height = _screen_height(get_display(cfg, display_slug))
+    return _conditional_json(cfg, "display", display_slug, display_token(cfg, display_slug),
+                             lambda c: _display_payload(c, display_slug, height), height)
+
+
+@bp.route("/api/display-slides/<display_slug>/wait")
+def display_slides_wait(display_slug):
+    """Long-poll variant of ``display_slides_api`` keyed by ``?token=``."""
+    return _wait_for_change(
+        lambda cfg: display_token(cfg, display_slug),
+        lambda cfg: _display_payload(cfg, display_slug, _screen_height(get_display(cfg, display_slug))),
+    )
+
+
+def _render_display(display_slug: str, offline: bool = False):
+    cfg = config_snapshot()
     display = get_display(cfg, display_slug)
     if not display or not display.get("active", True):
         abort(404)
@@ -229,29 +579,143 @@ def _render_display(display_slug: str):
         fade_duration=fade,
         preview=preview,
         preview_duration=preview_duration,
+        offline=offline,
     )
 
 
 @bp.route("/api/slideshow-slides/<ss_slug>")
 def slideshow_slides_api(ss_slug):
     """JSON API for slideshow preview — bypasses display lookup."""
-    cfg = load_config()
-    slideshow = get_slideshow(cfg, ss_slug)
-    if not slideshow:
+    cfg = config_snapshot()
+    height = _screen_height()
+    return _conditional_json(cfg, "slideshow", ss_slug, slideshow_token(cfg, ss_slug),
+                             lambda c: _slideshow_payload(c, ss_slug, height), height)
+
+
+@bp.route("/api/slideshow-slides/<ss_slug>/wait")
+def slideshow_slides_wait(ss_slug):
+    return _wait_for_change(
+        lambda cfg: slideshow_token(cfg, ss_slug),
+        lambda cfg: _slideshow_payload(cfg, ss_slug, _screen_height()),
+    )
+
+
+def _media_path(filename: str) -> Path | None:
+    for directory in (SLIDES_DIR, LEGACY_SLIDES_DIR):
+        candidate = directory / filename
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def _bundle_manifest(cfg: dict, display_slug: str, height: int | None = None) -> dict | None:
+    """Everything a screen needs to run offline: its payload plus a file list.
+
+    Files are listed once each with their size; content-named files never
+    change, so a kiosk only downloads names it does not already hold.
+    """
+    payload = _display_payload(cfg, display_slug, height)
+    if payload is None:
+        return None
+    display = get_display(cfg, display_slug)
+    ss_slug = display.get("assigned_slideshow")
+    slideshow = get_slideshow(cfg, ss_slug) if ss_slug else None
+    files = {}
+    for slide in active_slides(slideshow) if slideshow else []:
+        for name in _slide_media(slide, height):
+            if not name or name in files:
+                continue
+            path = _media_path(name)
+            if path is None:
+                continue
+            files[name] = {
+                "name": name,
+                "url": url_for("display.display_media", filename=name),
+                "size": path.stat().st_size,
+            }
+    return {
+        **payload,
+        "version": f"{payload['token']}.{height}" if height else payload["token"],
+        "files": sorted(files.values(), key=lambda f: f["name"]),
+    }
+
+
+def _tar_member(name: str, size: int, mtime: float) -> bytes:
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(mtime)
+    info.mode = 0o644
+    return info.tobuf(format=tarfile.PAX_FORMAT)
+
+
+def _tar_padding(size: int) -> bytes:
+    return b"\0" * (-size % tarfile.BLOCKSIZE)
+
+
+def _stream_bundle(manifest_body: bytes, paths: list[tuple[str, Path]]):
+    """Yield a tar archive of ``manifest.json`` and ``media/<name>`` files.
+
+    Members are written header by header and read in chunks, so even large
+    videos never sit in memory whole.
+    """
+    yield _tar_member("manifest.json", len(manifest_body), time.time())
+    yield manifest_body + _tar_padding(len(manifest_body))
+    for name, path in paths:
+        stat = path.stat()
+        yield _tar_member(f"media/{name}", stat.st_size, stat.st_mtime)
+        with path.open("rb") as fh:
+            for chunk in iter(lambda: fh.read(BUNDLE_CHUNK), b""):
+                yield chunk
+        yield _tar_padding(stat.st_size)
+    yield b"\0" * (2 * tarfile.BLOCKSIZE)
+
+
+@bp.route("/api/display-bundle/<display_slug>", methods=["GET", "POST"])
+def display_bundle(display_slug):
+    """Offline bundle for a screen: JSON manifest, or ``?format=tar`` with the media.
+
+    A POSTed ``{"have": [name, ...]}`` leaves out files the kiosk already
+    caches, so after a change only the new media crosses the network. The
+    list travels in the body because it grows with the slideshow; ``?have=``
+    is still read for kiosks running an older sync script.
+    """
+    cfg = config_snapshot()
+    height = _screen_height(get_display(cfg, display_slug))
+    token = display_token(cfg, display_slug)
+    if request.args.get("format") != "tar":
+        return _conditional_json(cfg, "bundle", display_slug, token,
+                                 lambda c: _bundle_manifest(c, display_slug, height), height)
+    if token is None:
         abort(404)
-    slides = active_slides(slideshow)
-    enriched = []
-    for slide in slides:
-        payload = dict(slide)
-        payload["transition"] = slide.get("transition") or "fade"
-        if slide.get("file") and slide.get("type") in ("image", "video"):
-            payload["file_url"] = url_for("display.display_media", filename=slide["file"])
-        enriched.append(payload)
-    return jsonify({
-        "display": {"name": slideshow["name"], "active": True},
-        "slideshow": {k: v for k, v in slideshow.items() if k != "slides"},
-        "slides": enriched,
-    })
+    manifest = _bundle_manifest(cfg, display_slug, height)
+    have = {name for name in request.args.get("have", "").split(",") if name}
+    if request.method == "POST":
+        body = request.get_json(silent=True) or {}
+        have.update(name for name in body.get("have") or () if isinstance(name, str))
+    wanted = [f["name"] for f in manifest["files"] if f["name"] not in have]
+    paths = [(name, _media_path(name)) for name in wanted]
+    paths = [(name, path) for name, path in paths if path is not None]
+    etag = _content_token(manifest["version"], wanted)
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        body = current_app.json.dumps(manifest).encode("utf-8")
+        resp = Response(stream_with_context(_stream_bundle(body, paths)), mimetype="application/x-tar")
+        resp.headers["Content-Disposition"] = f'attachment; filename="{display_slug}-bundle.tar"'
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+@bp.route("/api/display-bundle/<display_slug>/player")
+def display_bundle_player(display_slug):
+    """Player page a kiosk saves as ``index.html`` beside its synced bundle.
+
+    It plays ``manifest.js`` and ``media/`` from its own directory and never
+    contacts the server, so the screen keeps running while the server is
+    slow or unreachable.
+    """
+    return _render_display(display_slug, offline=True)
 
 
 @bp.route("/displays/<display_slug>")
@@ -268,16 +732,22 @@ def display_screen(slug):
 
 @bp.route("/display-media/<path:filename>")
 def display_media(filename):
+    """Serve slide media with range support; content-named files are immutable."""
+    immutable = bool(CONTENT_NAME_RE.match(filename))
     for directory in (SLIDES_DIR, LEGACY_SLIDES_DIR):
         candidate = directory / filename
         if candidate.exists():
-            return send_from_directory(directory, filename)
+            resp = send_from_directory(directory, filename, conditional=True,
+                                       max_age=IMMUTABLE_MAX_AGE if immutable else MEDIA_MAX_AGE)
+            if immutable:
+                resp.headers["Cache-Control"] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+            return resp
     abort(404)
 
 
 @bp.route("/slideshows/<ss_slug>/preview")
 def slideshow_preview(ss_slug):
-    cfg = load_config()
+    cfg = config_snapshot()
     slideshow = get_slideshow(cfg, ss_slug)
     if not slideshow:
         abort(404)
@@ -303,9 +773,7 @@ def slideshow_preview(ss_slug):
 @bp.route("/admin/displays", methods=["GET", "POST"])
 @permission_required_rw('displays.view', 'displays.edit')
 def admin_displays():
-    cfg = load_config()
-    displays = cfg["displays"]
-    slideshows = cfg["slideshows"]
+    db = current_app.dbs()
 
     if request.method == "POST":
         action = request.form.get("action")
@@ -315,22 +783,23 @@ def admin_displays():
             slug = request.form.get("slug", "").strip()
             if not name or not slug:
                 flash("Name and slug are required.", "danger")
-            elif slug in displays:
+            elif display_row(db, slug):
                 flash("Slug already in use.", "danger")
             else:
-                displays[slug] = {
-                    "name": name,
-                    "location": request.form.get("location", "").strip(),
-                    "active": True,
-                    "assigned_slideshow": request.form.get("assigned_slideshow") or None,
-                }
-                save_config(cfg)
+                db.add(Display(
+                    slug=slug,
+                    name=name,
+                    location=request.form.get("location", "").strip(),
+                    active=True,
+                    slideshow=slideshow_row(db, request.form.get("assigned_slideshow") or ""),
+                ))
+                commit(db)
                 flash("Display added.", "success")
             return redirect(url_for("display.admin_displays"))
 
         if action == "edit_display":
             slug = request.form.get("slug", "").strip()
-            display = displays.get(slug)
+            display = display_row(db, slug)
             if not display:
                 flash("Display not found.", "danger")
                 return redirect(url_for("display.admin_displays"))
@@ -339,49 +808,46 @@ def admin_displays():
             if not new_name:
                 flash("Name is required.", "danger")
                 return redirect(url_for("display.admin_displays"))
-            if new_slug != slug and new_slug in displays:
+            if new_slug != slug and display_row(db, new_slug):
                 flash("Slug already in use.", "danger")
                 return redirect(url_for("display.admin_displays"))
-            display["name"] = new_name
-            display["location"] = request.form.get("location", "").strip()
-            display["assigned_slideshow"] = request.form.get("assigned_slideshow") or None
-            if new_slug != slug:
-                displays[new_slug] = display
-                del displays[slug]
-            save_config(cfg)
+            display.name = new_name
+            display.location = request.form.get("location", "").strip()
+            display.slideshow = slideshow_row(db, request.form.get("assigned_slideshow") or "")
+            display.slug = new_slug
+            commit(db)
             flash("Display updated.", "success")
             return redirect(url_for("display.admin_displays"))
 
         if action == "toggle_display":
-            slug = request.form.get("slug", "").strip()
-            display = displays.get(slug)
+            display = display_row(db, request.form.get("slug", "").strip())
             if display:
-                display["active"] = not display.get("active", True)
-                save_config(cfg)
+                display.active = not display.active
+                commit(db)
                 flash("Display updated.", "success")
             return redirect(url_for("display.admin_displays"))
 
         if action == "delete_display":
-            slug = request.form.get("slug", "").strip()
-            if slug in displays:
-                del displays[slug]
-                save_config(cfg)
+            display = display_row(db, request.form.get("slug", "").strip())
+            if display:
+                db.delete(display)
+                commit(db)
                 flash("Display deleted.", "success")
             return redirect(url_for("display.admin_displays"))
 
         if action == "assign_slideshow":
-            slug = request.form.get("slug", "").strip()
-            display = displays.get(slug)
+            display = display_row(db, request.form.get("slug", "").strip())
             if display:
-                display["assigned_slideshow"] = request.form.get("assigned_slideshow") or None
-                save_config(cfg)
+                display.slideshow = slideshow_row(db, request.form.get("assigned_slideshow") or "")
+                commit(db)
                 flash("Slideshow assigned.", "success")
             return redirect(url_for("display.admin_displays"))
 
+    cfg = config_snapshot(db)
     return render_template(
         "admin/displays.html",
-        displays=displays,
-        slideshows=slideshows,
+        displays=cfg["displays"],
+        slideshows=cfg["slideshows"],
     )
 
 
@@ -390,8 +856,7 @@ def admin_displays():
 @bp.route("/admin/slideshows", methods=["GET", "POST"])
 @permission_required_rw('displays.view', 'displays.edit')
 def admin_slideshows():
-    cfg = load_config()
-    slideshows = cfg["slideshows"]
+    db = current_app.dbs()
 
     if request.method == "POST":
         action = request.form.get("action")
@@ -401,31 +866,31 @@ def admin_slideshows():
             slug = request.form.get("slug", "").strip() or slugify(name)
             if not name or not slug:
                 flash("Name is required.", "danger")
-            elif slug in slideshows:
+            elif slideshow_row(db, slug):
                 flash("Slug already in use.", "danger")
             else:
                 try:
                     fade = float(request.form.get("fade_duration", "1.4"))
                 except (TypeError, ValueError):
                     fade = 1.4
-                slideshows[slug] = {
-                    "name": name,
-                    "description": request.form.get("description", "").strip(),
-                    "fade_duration": max(0.1, fade),
-                    "slides": [],
-                }
-                save_config(cfg)
+                db.add(Slideshow(
+                    slug=slug,
+                    name=name,
+                    description=request.form.get("description", "").strip(),
+                    fade_duration=max(0.1, fade),
+                ))
+                commit(db)
                 flash("Slideshow created.", "success")
                 return redirect(url_for("display.admin_slideshow_edit", ss_slug=slug))
             return redirect(url_for("display.admin_slideshows"))
 
         if action == "delete_slideshow":
-            slug = request.form.get("slug", "").strip()
-            if slug in slideshows:
+            slideshow = slideshow_row(db, request.form.get("slug", "").strip())
+            if slideshow:
                 # Check if any display is using it
                 in_use = [
-                    d["name"] for d in cfg["displays"].values()
-                    if d.get("assigned_slideshow") == slug
+                    name for (name,) in
+                    db.query(Display.name).filter(Display.slideshow_id == slideshow.id).all()
                 ]
                 if in_use:
                     flash(
@@ -433,40 +898,62 @@ def admin_slideshows():
                         "danger",
                     )
                 else:
-                    del slideshows[slug]
-                    save_config(cfg)
+                    db.delete(slideshow)
+                    commit(db)
                     flash("Slideshow deleted.", "success")
             return redirect(url_for("display.admin_slideshows"))
 
         if action == "duplicate_slideshow":
             src_slug = request.form.get("slug", "").strip()
-            src = slideshows.get(src_slug)
+            src = slideshow_row(db, src_slug)
             if not src:
                 flash("Slideshow not found.", "danger")
                 return redirect(url_for("display.admin_slideshows"))
+            taken = {slug for (slug,) in db.query(Slideshow.slug).all()}
             new_slug = src_slug
             counter = 2
-            while new_slug in slideshows:
+            while new_slug in taken:
                 new_slug = f"{src_slug}-{counter}"
                 counter += 1
-            import copy
-            slideshows[new_slug] = copy.deepcopy(src)
-            slideshows[new_slug]["name"] = f"{src['name']} (copy)"
-            save_config(cfg)
+            duplicate = Slideshow(
+                slug=new_slug,
+                name=f"{src.name} (copy)",
+                description=src.description,
+                fade_duration=src.fade_duration,
+            )
+            for slide in src.slides:
+                duplicate.slides.append(Slide(**{
+                    col: getattr(slide, col) for col in SLIDE_COPY_FIELDS
+                }))
+            db.add(duplicate)
+            commit(db)
             flash("Slideshow duplicated.", "success")
             return redirect(url_for("display.admin_slideshow_edit", ss_slug=new_slug))
 
-    return render_template("admin/slideshows.html", slideshows=slideshows, displays=cfg["displays"])
+    cfg = config_snapshot(db)
+    return render_template("admin/slideshows.html", slideshows=cfg["slideshows"], displays=cfg["displays"])
+
+
+SLIDE_COPY_FIELDS = (
+    "type", "position", "duration", "active", "transition", "headline", "subheadline",
+    "body", "file", "original_name", "renditions", "poster",
+)
+
+
+def _add_slide(slideshow: Slideshow, **fields) -> Slide:
+    slide = Slide(active=True, transition="fade", position=len(slideshow.slides) + 1, **fields)
+    slideshow.slides.append(slide)
+    return slide
 
 
 @bp.route("/admin/slideshows/<ss_slug>", methods=["GET", "POST"])
 @permission_required_rw('displays.view', 'displays.edit')
 def admin_slideshow_edit(ss_slug):
-    cfg = load_config()
-    slideshow = get_slideshow(cfg, ss_slug)
+    db = current_app.dbs()
+    slideshow = slideshow_row(db, ss_slug)
     if not slideshow:
         abort(404)
-    slides = slideshow.setdefault("slides", [])
+    slides = slideshow.slides
 
     if request.method == "POST":
         action = request.form.get("action")
@@ -479,29 +966,24 @@ def admin_slideshow_edit(ss_slug):
             try:
                 fade = float(request.form.get("fade_duration", "1.4"))
             except (TypeError, ValueError):
-                fade = slideshow.get("fade_duration", 1.4)
-            slideshow["name"] = name
-            slideshow["description"] = request.form.get("description", "").strip()
-            slideshow["fade_duration"] = max(0.1, fade)
-            save_config(cfg)
+                fade = slideshow.fade_duration
+            slideshow.name = name
+            slideshow.description = request.form.get("description", "").strip()
+            slideshow.fade_duration = max(0.1, fade)
+            commit(db)
             flash("Slideshow updated.", "success")
             return redirect(url_for("display.admin_slideshow_edit", ss_slug=ss_slug))
 
         if action == "add_text":
-            slide = {
-                "id": next_slide_id(slides),
-                "type": "text",
-                "headline": request.form.get("headline", "").strip(),
-                "subheadline": request.form.get("subheadline", "").strip(),
-                "body": request.form.get("body", "").strip(),
-                "duration": to_int(request.form.get("duration"), 10),
-                "active": True,
-                "order": len(slides) + 1,
-                "transition": "fade",
-            }
-            slides.append(slide)
-            normalize_orders(slides)
-            save_config(cfg)
+            _add_slide(
+                slideshow,
+                type="text",
+                headline=request.form.get("headline", "").strip(),
+                subheadline=request.form.get("subheadline", "").strip(),
+                body=request.form.get("body", "").strip(),
+                duration=to_int(request.form.get("duration"), 10),
+            )
+            commit(db)
             flash("Text slide added.", "success")
             return redirect(url_for("display.admin_slideshow_edit", ss_slug=ss_slug))
 
@@ -511,25 +993,16 @@ def admin_slideshow_edit(ss_slug):
                 flash("No image file uploaded.", "danger")
                 return redirect(url_for("display.admin_slideshow_edit", ss_slug=ss_slug))
             ensure_slide_storage()
-            filename = secure_filename(file.filename)
-            ext = Path(filename).suffix.lower()
+            original = secure_filename(file.filename)
+            ext = Path(original).suffix.lower()
             if ext not in IMAGE_EXTENSIONS:
                 flash(f"Image must be one of: {', '.join(sorted(IMAGE_EXTENSIONS))}", "danger")
                 return redirect(url_for("display.admin_slideshow_edit", ss_slug=ss_slug))
-            filename = unique_filename(SLIDES_DIR, filename)
-            file.save(SLIDES_DIR / filename)
-            slide = {
-                "id": next_slide_id(slides),
-                "type": "image",
-                "file": filename,
-                "duration": to_int(request.form.get("duration"), 10),
-                "active": True,
-                "order": len(slides) + 1,
-                "transition": "fade",
-            }
-            slides.append(slide)
-            normalize_orders(slides)
-            save_config(cfg)
+            filename = store_slide_upload(file)
+            _add_slide(slideshow, type="image", file=filename, original_name=original,
+                       duration=to_int(request.form.get("duration"), 10))
+            commit(db)
+            queue_slide_media(filename)
             flash("Image slide added.", "success")
             return redirect(url_for("display.admin_slideshow_edit", ss_slug=ss_slug))
 
@@ -540,29 +1013,21 @@ def admin_slideshow_edit(ss_slug):
                 flash("No image files uploaded.", "danger")
                 return redirect(url_for("display.admin_slideshow_edit", ss_slug=ss_slug))
             ensure_slide_storage()
-            added = 0
+            stored = []
             for file in valid_files:
-                filename = secure_filename(file.filename)
-                ext = Path(filename).suffix.lower()
+                original = secure_filename(file.filename)
+                ext = Path(original).suffix.lower()
                 if ext not in IMAGE_EXTENSIONS:
                     continue
-                filename = unique_filename(SLIDES_DIR, filename)
-                file.save(SLIDES_DIR / filename)
-                slide = {
-                    "id": next_slide_id(slides),
-                    "type": "image",
-                    "file": filename,
-                    "duration": to_int(request.form.get("duration"), 10),
-                    "active": True,
-                    "order": len(slides) + 1,
-                    "transition": "fade",
-                }
-                slides.append(slide)
-                added += 1
-            if added:
-                normalize_orders(slides)
-                save_config(cfg)
-                flash(f"Added {added} image slide(s).", "success")
+                filename = store_slide_upload(file)
+                stored.append(filename)
+                _add_slide(slideshow, type="image", file=filename, original_name=original,
+                           duration=to_int(request.form.get("duration"), 10))
+            if stored:
+                commit(db)
+                for filename in stored:
+                    queue_slide_media(filename)
+                flash(f"Added {len(stored)} image slide(s).", "success")
             else:
                 flash("No valid image files uploaded.", "danger")
             return redirect(url_for("display.admin_slideshow_edit", ss_slug=ss_slug))
@@ -573,25 +1038,16 @@ def admin_slideshow_edit(ss_slug):
                 flash("No video file uploaded.", "danger")
                 return redirect(url_for("display.admin_slideshow_edit", ss_slug=ss_slug))
             ensure_slide_storage()
-            filename = secure_filename(file.filename)
-            ext = Path(filename).suffix.lower()
+            original = secure_filename(file.filename)
+            ext = Path(original).suffix.lower()
             if ext not in VIDEO_EXTENSIONS:
                 flash("Video must be MP4 format (.mp4).", "danger")
                 return redirect(url_for("display.admin_slideshow_edit", ss_slug=ss_slug))
-            filename = unique_filename(SLIDES_DIR, filename)
-            file.save(SLIDES_DIR / filename)
-            slide = {
-                "id": next_slide_id(slides),
-                "type": "video",
-                "file": filename,
-                "duration": to_int(request.form.get("duration"), 15),
-                "active": True,
-                "order": len(slides) + 1,
-                "transition": "fade",
-            }
-            slides.append(slide)
-            normalize_orders(slides)
-            save_config(cfg)
+            filename = store_slide_upload(file)
+            _add_slide(slideshow, type="video", file=filename, original_name=original,
+                       duration=to_int(request.form.get("duration"), 15))
+            commit(db)
+            queue_slide_media(filename)
             flash("Video slide added.", "success")
             return redirect(url_for("display.admin_slideshow_edit", ss_slug=ss_slug))
 
@@ -601,28 +1057,28 @@ def admin_slideshow_edit(ss_slug):
                 flash("Duration must be a positive number.", "danger")
                 return redirect(url_for("display.admin_slideshow_edit", ss_slug=ss_slug))
             for s in slides:
-                s["duration"] = requested
-            save_config(cfg)
+                s.duration = requested
+            commit(db)
             flash(f"Updated duration for {len(slides)} slide(s).", "success")
             return redirect(url_for("display.admin_slideshow_edit", ss_slug=ss_slug))
 
         # Actions targeting a specific slide by ID
         slide_id = to_int(request.form.get("slide_id"))
-        slide = next((s for s in slides if s["id"] == slide_id), None) if slide_id else None
+        slide = next((s for s in slides if s.id == slide_id), None) if slide_id else None
 
         if action in ("toggle_slide", "delete_slide", "set_order", "set_duration", "move_slide") and not slide:
             flash("Slide not found.", "danger")
             return redirect(url_for("display.admin_slideshow_edit", ss_slug=ss_slug))
 
         if action == "toggle_slide":
-            slide["active"] = not slide.get("active", True)
-            save_config(cfg)
+            slide.active = not slide.active
+            commit(db)
             flash("Slide updated.", "success")
 
         elif action == "delete_slide":
             slides.remove(slide)
             normalize_orders(slides)
-            save_config(cfg)
+            commit(db)
             flash("Slide deleted.", "success")
 
         elif action == "set_duration":
@@ -630,8 +1086,8 @@ def admin_slideshow_edit(ss_slug):
             if requested is None or requested <= 0:
                 flash("Duration must be a positive number.", "danger")
             else:
-                slide["duration"] = requested
-                save_config(cfg)
+                slide.duration = requested
+                commit(db)
                 flash("Duration updated.", "success")
 
         elif action == "set_order":
@@ -639,40 +1095,35 @@ def admin_slideshow_edit(ss_slug):
             if requested is None:
                 flash("Invalid order.", "danger")
             else:
-                sorted_slides = sorted(slides, key=lambda s: s.get("order", s["id"]))
-                cur = next((i for i, s in enumerate(sorted_slides) if s["id"] == slide_id), None)
-                if cur is not None:
-                    requested = max(1, min(requested, len(sorted_slides)))
-                    obj = sorted_slides.pop(cur)
-                    sorted_slides.insert(requested - 1, obj)
-                    for pos, s in enumerate(sorted_slides, start=1):
-                        s["order"] = pos
-                    save_config(cfg)
-                    flash("Order updated.", "success")
+                sorted_slides = sorted(slides, key=lambda s: s.position)
+                requested = max(1, min(requested, len(sorted_slides)))
+                sorted_slides.remove(slide)
+                sorted_slides.insert(requested - 1, slide)
+                normalize_orders(sorted_slides)
+                commit(db)
+                flash("Order updated.", "success")
 
         elif action == "move_slide":
             direction = request.form.get("direction")
-            sorted_slides = sorted(slides, key=lambda s: s.get("order", s["id"]))
-            idx = next((i for i, s in enumerate(sorted_slides) if s["id"] == slide_id), None)
+            sorted_slides = sorted(slides, key=lambda s: s.position)
+            idx = sorted_slides.index(slide)
             moved = False
-            if idx is not None:
-                if direction == "up" and idx > 0:
-                    sorted_slides[idx - 1], sorted_slides[idx] = sorted_slides[idx], sorted_slides[idx - 1]
-                    moved = True
-                elif direction == "down" and idx < len(sorted_slides) - 1:
-                    sorted_slides[idx + 1], sorted_slides[idx] = sorted_slides[idx], sorted_slides[idx + 1]
-                    moved = True
+            if direction == "up" and idx > 0:
+                sorted_slides[idx - 1], sorted_slides[idx] = sorted_slides[idx], sorted_slides[idx - 1]
+                moved = True
+            elif direction == "down" and idx < len(sorted_slides) - 1:
+                sorted_slides[idx + 1], sorted_slides[idx] = sorted_slides[idx], sorted_slides[idx + 1]
+                moved = True
             if moved:
-                for pos, s in enumerate(sorted_slides, start=1):
-                    s["order"] = pos
-                save_config(cfg)
+                normalize_orders(sorted_slides)
+                commit(db)
                 flash("Order updated.", "success")
             else:
                 flash("Already at boundary.", "info")
 
         return redirect(url_for("display.admin_slideshow_edit", ss_slug=ss_slug))
 
-    sorted_slides = sorted(slides, key=lambda s: s.get("order", s["id"]))
+    cfg = config_snapshot(db)
     assigned_to = [
         (slug, d["name"])
         for slug, d in cfg["displays"].items()
@@ -681,7 +1132,7 @@ def admin_slideshow_edit(ss_slug):
     return render_template(
         "admin/slideshow_edit.html",
         ss_slug=ss_slug,
-        slideshow=slideshow,
-        slides=sorted_slides,
+        slideshow=cfg["slideshows"][ss_slug],
+        slides=cfg["slideshows"][ss_slug]["slides"],
         assigned_to=assigned_to,
     )
@@ -38,6 +38,7 @@ from .models import (
     GrievanceNote,
     GrievanceEvent,
 )
+from .uploads import UploadError, check_upload, save_upload
 
 DATA_DIR = (
     os.environ.get("GUESTDESK_DATA_DIR")
@@ -140,20 +141,13 @@ def ensure_case_columns(engine) -> None:
     """Add grievance_cases columns to databases that predate them.
 
     create_all() only creates missing tables, so column additions need this
-    lightweight migration (same pattern as the users/services migrations).
+    lightweight migration (the same columns ``migrations.migrate`` adds in
+    step 1).
     """
+    from .migrations import ADDED_COLUMNS, add_missing_columns
+
     with engine.begin() as conn:
-        cols = [r[1] for r in conn.exec_driver_sql('PRAGMA table_info(grievance_cases)').all()]
-        if not cols:
-            return  # table doesn't exist yet; create_all will make it complete
-        for col, ddl in [
-            ('archived_at', 'DATETIME'),
-            ('archived_by_user_id', 'INTEGER'),
-            ('grievance_year', 'INTEGER'),
-            ('grievance_sequence', 'INTEGER'),
-        ]:
-            if col not in cols:
-                conn.exec_driver_sql(f'ALTER TABLE grievance_cases ADD COLUMN {col} {ddl}')
+        add_missing_columns(conn, 'grievance_cases', ADDED_COLUMNS['grievance_cases'])
 
 
 # Backwards-compatible alias (pre-v0.3 name)
@@ -330,22 +324,17 @@ def save_case_attachment(db, case: GrievanceCase, file_storage, *,
     ext = Path(filename).suffix.lower()
     if ext not in ATTACHMENT_EXTENSIONS:
         raise ValueError('Please upload a PDF, JPG, or PNG file.')
-    data = file_storage.read()
-    if not data:
-        raise ValueError('The uploaded file appears to be empty.')
-    if ext == '.pdf' and not data.startswith(b'%PDF'):
-        raise ValueError('The uploaded PDF does not appear to be valid.')
-    if ext in ('.jpg', '.jpeg') and not data.startswith(b'\xff\xd8'):
-        raise ValueError('The uploaded JPG does not appear to be valid.')
-    if ext == '.png' and not data.startswith(b'\x89PNG\r\n\x1a\n'):
-        raise ValueError('The uploaded PNG does not appear to be valid.')
+    try:
+        check_upload(file_storage, ext)
+    except UploadError as exc:
+        if exc.reason == 'empty':
+            raise ValueError('The uploaded file appears to be empty.') from None
+        label = 'JPG' if ext == '.jpeg' else ext.lstrip('.').upper()
+        raise ValueError(f'The uploaded {label} does not appear to be valid.') from None
     timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
     stored_name = f"{timestamp}_{filename or 'attachment' + ext}"
-    root = case_upload_root(case)
-    root.mkdir(parents=True, exist_ok=True)
-    path = root / stored_name
-    with open(path, 'wb') as fh:
-        fh.write(data)
+    path = case_upload_root(case) / stored_name
+    save_upload(file_storage, path)
     attachment = GrievanceAttachment(
         case_id=case.id,
         attachment_type=attachment_type if attachment_type in ATTACHMENT_TYPES else 'other',
@@ -832,6 +821,11 @@ def _dbs():
     return current_app.dbs()
 
 
+def _dbs_ro():
+    """Read-only reporting session, for views that only list or count."""
+    return current_app.dbs_ro()
+
+
 def _actor():
     """Return (label, user_id) identifying who is acting, mirroring audit_actor()."""
     user = getattr(g, 'user', None)
@@ -876,7 +870,7 @@ def _case_flags(case: GrievanceCase, now: datetime) -> dict:
 @permission_required('grievances.view')
 def dashboard():
     """Grievance work queue: open cases, deadlines, and filters."""
-    db = _dbs()
+    db = _dbs_ro()
     now = datetime.utcnow()
     view = (request.args.get('view') or 'open').strip()
     q = (request.args.get('q') or '').strip()
@@ -0,0 +1,37 @@
+"""Cached data for the guest landing page.
+
+``/`` is served to every kiosk on every visit, so its inputs are kept in the
+per-app revision caches: category counts until a service is edited, and the
+live announcements from the shared announcement feed.
+"""
+
+# GuestDesk
+# Copyright (c) 2025 Chris Tanton
+# SPDX-License-Identifier: LicenseRef-GDCL-1.1
+from __future__ import annotations
+
+from sqlalchemy import func
+
+from . import revisions
+from .announcement_feed import active_announcements
+from .models import Service
+
+HOME_CATEGORIES = [
+    'Food', 'Showers', 'Laundry', 'Mail', 'ID/Docs', 'Medical',
+    'Mental Health', 'Legal', 'Employment', 'Transportation', 'Other',
+]
+HOME_ANNOUNCEMENT_LIMIT = 5
+
+
+def _category_counts(db) -> dict[str, int]:
+    rows = db.query(Service.category, func.count(Service.id)).group_by(Service.category).all()
+    by_category = {category: count for category, count in rows}
+    return {c: int(by_category.get(c, 0)) for c in HOME_CATEGORIES}
+
+
+def home_context(db) -> dict:
+    """Template context for ``home.html``: ``anns``, ``counts`` and ``cats``."""
+    counts = revisions.app_cache('home.counts', revisions.SERVICES).get(
+        db, 'counts', lambda: _category_counts(db))
+    anns = active_announcements(db, HOME_ANNOUNCEMENT_LIMIT)
+    return {'anns': anns, 'counts': counts, 'cats': list(HOME_CATEGORIES)}
@@ -3,55 +3,143 @@
 # GuestDesk
 # Copyright (c) 2025 Chris Tanton
 # SPDX-License-Identifier: LicenseRef-GDCL-1.1
+import gzip
+import os
+import zlib
 from datetime import datetime, timedelta, timezone
-from flask import Blueprint, Response, current_app
-from icalendar import Calendar, Event
+from flask import Blueprint, Response, abort, current_app, request, stream_with_context
 
-from .services_calendar import merged_occurrences
+from . import revisions
+from .ics_writer import iter_calendar
+from .models import Service
+from .services_calendar import category_slug
 
 bp = Blueprint("ics", __name__)
 
+DEFAULT_HORIZON_DAYS = 90
+MAX_HORIZON_DAYS = int(os.getenv("GUESTDESK_ICS_MAX_DAYS", "365"))
+# Horizons longer than this are streamed straight to the client rather than
+# rendered into the in-memory cache.
+STREAM_AFTER_DAYS = int(os.getenv("GUESTDESK_ICS_STREAM_DAYS", "120"))
+# How long subscribers may reuse a copy before revalidating with the ETag
+FEED_MAX_AGE = int(os.getenv("GUESTDESK_ICS_MAX_AGE", "900"))
+FEED_GZIP = (os.getenv("GUESTDESK_ICS_GZIP", "1") or "").strip() in ("1", "true", "True", "yes", "on")
 
-def _to_aware(dt_str: str) -> datetime:
-    """Parse ISO-8601 strings and return timezone-aware UTC datetimes."""
-    dt = datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
-    if dt.tzinfo is None:
-        return dt.replace(tzinfo=timezone.utc)
-    return dt.astimezone(timezone.utc)
 
+def _horizon_days() -> int:
+    """Requested feed horizon (``?days=``), clamped to the configured maximum."""
+    days = request.args.get('days', type=int) or DEFAULT_HORIZON_DAYS
+    return max(1, min(days, MAX_HORIZON_DAYS))
 
-@bp.get("/calendar.ics")
-def calendar_feed():
-    """Emit the next 90 days of merged occurrences as an ICS file."""
+
+def _build_body(db, window_start: datetime, days: int, stamp: datetime, **scope) -> dict:
+    """Render the feed once and keep a gzip copy alongside the raw bytes."""
+    window_end = window_start + timedelta(days=days)
+    raw = "".join(iter_calendar(db, window_start, window_end, stamp=stamp, use_cache=True, **scope)).encode("utf-8")
+    return {
+        'raw': raw,
+        'gzip': gzip.compress(raw, mtime=0) if FEED_GZIP else None,
+    }
+
+
+def _stream_body(window_start: datetime, days: int, stamp: datetime, use_gzip: bool, **scope):
+    """Encode ``iter_calendar`` output chunk by chunk on its own session."""
+    db = current_app.dbs()
+    packer = zlib.compressobj(6, zlib.DEFLATED, 31) if use_gzip else None
+    try:
+        chunks = iter_calendar(db, window_start, window_start + timedelta(days=days), stamp=stamp, **scope)
+        for chunk in chunks:
+            data = chunk.encode("utf-8")
+            if packer:
+                data = packer.compress(data)
+            if data:
+                yield data
+        if packer:
+            yield packer.flush()
+    finally:
+        db.close()
+
+
+def _not_modified(etag: str, last_modified: datetime) -> bool:
+    """Evaluate ``If-None-Match`` (preferred) or ``If-Modified-Since``."""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    since = request.if_modified_since
+    return bool(since and last_modified <= since)
+
+
+def _feed_response(scope: str, service_id: int | None = None, category: str | None = None):
+    """Serve one ICS feed (``scope`` names the slice) with caching and revalidation.
+
+    The rendered body is cached per scope, horizon and day and rebuilt only
+    after the schedule revision changes, so routine subscriber polls are
+    answered from memory or with ``304 Not Modified``. Horizons past
+    ``STREAM_AFTER_DAYS`` are streamed uncached; their ETag still tracks the
+    schedule revision.
+    """
     session_factory = getattr(current_app, "dbs", None)
     if not session_factory:
         return Response("database unavailable", status=503)
     db = session_factory()
     try:
-        now = datetime.utcnow()
-        window_end = now + timedelta(days=90)
-        events = merged_occurrences(db, now, window_end)
+        days = _horizon_days()
+        # Anchor the window to the start of the day so the body is stable
+        # between schedule edits instead of shifting on every request.
+        window_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        revision, changed_at = revisions.current(db, revisions.SCHEDULE)
+        last_modified = max(changed_at or window_start, window_start).replace(
+            microsecond=0, tzinfo=timezone.utc)
+        use_gzip = FEED_GZIP and 'gzip' in request.accept_encodings
+        etag = f"ics-{scope}-{revision}-{days}-{window_start:%Y%m%d}" + ("-gz" if use_gzip else "")
+
+        if _not_modified(etag, last_modified):
+            resp = Response(status=304)
+        else:
+            scope_args = {'service_id': service_id, 'category': category}
+            if service_id is not None:
+                svc = db.get(Service, service_id)
+                if svc is None:
+                    abort(404)
+                scope_args['name'] = svc.name_en or svc.name
+            elif category:
+                scope_args['name'] = category
+            stamp = changed_at or window_start
+            if days > STREAM_AFTER_DAYS:
+                body = stream_with_context(_stream_body(window_start, days, stamp, use_gzip, **scope_args))
+            else:
+                cache = revisions.app_cache('ics.feeds', revisions.SCHEDULE, maxsize=64)
+                built = cache.get(db, (scope, days, window_start.date()),
+                                  lambda: _build_body(db, window_start, days, stamp, **scope_args))
+                body = built['gzip'] if use_gzip else built['raw']
+            resp = Response(body, content_type="text/calendar; charset=utf-8")
+            if use_gzip:
+                resp.headers['Content-Encoding'] = 'gzip'
     finally:
         db.close()
 
-    cal = Calendar()
-    cal.add('prodid', '-//GuestDesk//Calendar//EN')
-    cal.add('version', '2.0')
-
-    for ev in events:
-        try:
-            start = _to_aware(ev.get('start'))
-            end = _to_aware(ev.get('end'))
-        except Exception:
-            continue
-        uid = f"{ev.get('service_id')}-{ev.get('instance_start')}@guestdesk"
-        item = Event()
-        item.add('uid', uid)
-        item.add('summary', ev.get('title'))
-        item.add('dtstart', start)
-        item.add('dtend', end)
-        if ev.get('location'):
-            item.add('location', ev['location'])
-        cal.add_component(item)
-
-    return Response(cal.to_ical(), content_type="text/calendar; charset=utf-8")
+    resp.set_etag(etag)
+    resp.last_modified = last_modified
+    resp.headers['Cache-Control'] = f'public, max-age={FEED_MAX_AGE}'
+    resp.vary.add('Accept-Encoding')
+    return resp
+
+
+@bp.get("/calendar.ics")
+def calendar_feed():
+    """Emit the upcoming merged occurrences as an ICS file."""
+    return _feed_response('all')
+
+
+@bp.get("/calendar/<int:service_id>.ics")
+def service_calendar_feed(service_id: int):
+    """ICS feed limited to a single service."""
+    return _feed_response(f'svc{service_id}', service_id=service_id)
+
+
+@bp.get("/calendar/category/<name>.ics")
+def category_calendar_feed(name: str):
+    """ICS feed limited to one category, addressed by name or slug (``id-docs``)."""
+    slug = category_slug(name)
+    if not slug:
+        abort(404)
+    return _feed_response(f'cat-{slug}', category=name)
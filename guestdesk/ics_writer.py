@@ -0,0 +1,287 @@
+"""Streaming iCalendar serializer for the services schedule.
+
+Text is produced one component at a time instead of assembling an
+``icalendar.Calendar`` in memory. Series whose recurrence maps cleanly onto
+RFC 5545 are written once with ``RRULE``/``RDATE``/``EXDATE`` (edited
+instances become ``RECURRENCE-ID`` children); anything else is expanded
+inside the requested window, from the shared occurrence cache
+(``services_calendar.cached_occurrences``) when the caller asks for it.
+"""
+
+# GuestDesk
+# Copyright (c) 2025 Chris Tanton
+# SPDX-License-Identifier: LicenseRef-GDCL-1.1
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Iterator
+from zoneinfo import ZoneInfo
+
+from dateutil.rrule import rrulestr
+from sqlalchemy.orm import joinedload, selectinload
+
+from .models import ServiceSeries
+from .services_calendar import (
+    _parse_dates, cached_occurrences, category_slug, expand_occurrences, series_labels,
+)
+
+CRLF = "\r\n"
+DEFAULT_TZ = "America/New_York"
+
+# Rules that repeat at most once a day at the DTSTART wall time; only these
+# keep the per-day EXDATE semantics of ``expand_occurrences`` when written out.
+_FIXED_TIME_FREQS = {"DAILY", "WEEKLY", "MONTHLY", "YEARLY"}
+_SUB_DAY_PARTS = {"BYHOUR", "BYMINUTE", "BYSECOND"}
+
+
+def escape_text(value) -> str:
+    """Escape a TEXT property value (RFC 5545 §3.3.11)."""
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+        .replace("\r", "\\n")
+    )
+
+
+def fold(line: str) -> str:
+    """Fold a content line at 75 octets without splitting UTF-8 sequences."""
+    if len(line.encode("utf-8")) <= 75:
+        return line + CRLF
+    parts = []
+    chunk = ""
+    size = 0
+    for ch in line:
+        width = len(ch.encode("utf-8"))
+        if size + width > 75:
+            parts.append(chunk)
+            chunk, size = " ", 1
+        chunk += ch
+        size += width
+    parts.append(chunk)
+    return CRLF.join(parts) + CRLF
+
+
+def _component(name: str, lines) -> str:
+    return fold(f"BEGIN:{name}") + "".join(fold(line) for line in lines) + fold(f"END:{name}")
+
+
+def _local(dt: datetime) -> str:
+    return dt.strftime("%Y%m%dT%H%M%S")
+
+
+def _dt_prop(name: str, dt: datetime, tzid: str | None) -> str:
+    if tzid:
+        return f"{name};TZID={tzid}:{_local(dt)}"
+    return f"{name}:{_local(dt)}"
+
+
+def _dt_list(name: str, values, tzid: str | None) -> str:
+    joined = ",".join(_local(v) for v in values)
+    return f"{name};TZID={tzid}:{joined}" if tzid else f"{name}:{joined}"
+
+
+def _tzid(series: ServiceSeries) -> str | None:
+    """IANA zone of the series, or ``None`` (floating time) when it is unknown."""
+    name = series.tz or DEFAULT_TZ
+    try:
+        ZoneInfo(name)
+    except Exception:
+        return None
+    return name
+
+
+def _vtimezone(tzid: str, first: date, last: date) -> str:
+    """VTIMEZONE block for ``tzid`` when the installed icalendar can build one."""
+    try:
+        from icalendar import Timezone
+        build = Timezone.from_tzid
+    except (ImportError, AttributeError):
+        return ""
+    try:
+        return build(tzid, first_date=first, last_date=last).to_ical().decode("utf-8")
+    except Exception:
+        return ""
+
+
+def _recurrence(series: ServiceSeries):
+    """Return ``(rrule_text, rule)`` when the series can be written as an RRULE."""
+    text = (series.rrule or "").strip()
+    if text.upper().startswith("RRULE:"):
+        text = text[6:]
+    if not text or any(c in text for c in "\r\n:"):
+        return None
+    parts = {}
+    for piece in text.upper().split(";"):
+        key, _, value = piece.partition("=")
+        parts[key.strip()] = value.strip()
+    if parts.get("FREQ") not in _FIXED_TIME_FREQS or _SUB_DAY_PARTS & parts.keys():
+        return None
+    try:
+        rule = rrulestr(text, dtstart=series.dtstart)
+    except Exception:
+        return None
+    # RFC 5545 counts DTSTART as the first instance; dateutil only does when
+    # it matches the rule, so unsynchronised series are expanded instead.
+    if rule.after(series.dtstart, inc=True) != series.dtstart:
+        return None
+    return text, rule
+
+
+def _recurring_components(series, tzid, text, rule, start, end, stamp) -> str | None:
+    """Master VEVENT plus override children, or ``None`` if nothing falls in the window."""
+    duration = series.dtend - series.dtstart
+    ex_days = {d.date() for d in _parse_dates(series.exdate)}
+    rdates = sorted(d for d in _parse_dates(series.rdate) if d.date() not in ex_days)
+
+    upcoming = rule.after(start, inc=True)
+    while upcoming is not None and upcoming < end and upcoming.date() in ex_days:
+        upcoming = rule.after(upcoming)
+    in_window = (upcoming is not None and upcoming < end) or any(start <= r < end for r in rdates)
+    if not in_window:
+        return None
+
+    title, location, category = series_labels(series)
+    uid = f"series-{series.id}@guestdesk"
+    cancelled = []
+    children = []
+    for ov in sorted(series.overrides or [], key=lambda o: o.instance_start):
+        inst = ov.instance_start
+        if inst.date() in ex_days or (rule.after(inst, inc=True) != inst and inst not in rdates):
+            continue
+        if ov.cancelled:
+            cancelled.append(inst)
+            continue
+        lines = [
+            f"UID:{uid}",
+            f"DTSTAMP:{stamp}",
+            _dt_prop("RECURRENCE-ID", inst, tzid),
+            _dt_prop("DTSTART", ov.new_dtstart or inst, tzid),
+            _dt_prop("DTEND", ov.new_dtend or (inst + duration), tzid),
+            f"SUMMARY:{escape_text(ov.new_title or title)}",
+        ]
+        if ov.new_location or location:
+            lines.append(f"LOCATION:{escape_text(ov.new_location or location)}")
+        children.append(_component("VEVENT", lines))
+
+    lines = [
+        f"UID:{uid}",
+        f"DTSTAMP:{stamp}",
+        _dt_prop("DTSTART", series.dtstart, tzid),
+        _dt_prop("DTEND", series.dtend, tzid),
+        f"RRULE:{text}",
+    ]
+    excluded = sorted({datetime.combine(d, series.dtstart.time()) for d in ex_days} | set(cancelled))
+    if excluded:
+        lines.append(_dt_list("EXDATE", excluded, tzid))
+    if rdates:
+        lines.append(_dt_list("RDATE", rdates, tzid))
+    lines.append(f"SUMMARY:{escape_text(title)}")
+    if location:
+        lines.append(f"LOCATION:{escape_text(location)}")
+    if category:
+        lines.append(f"CATEGORIES:{escape_text(category)}")
+    return _component("VEVENT", lines) + "".join(children)
+
+
+def _expanded_components(events, tzid, stamp) -> Iterator[str]:
+    for ev in events:
+        try:
+            ev_start = datetime.fromisoformat(ev["start"])
+            ev_end = datetime.fromisoformat(ev["end"])
+        except Exception:
+            continue
+        lines = [
+            f"UID:{ev.get('service_id')}-{ev.get('instance_start')}@guestdesk",
+            f"DTSTAMP:{stamp}",
+            _dt_prop("DTSTART", ev_start, tzid),
+            _dt_prop("DTEND", ev_end, tzid),
+            f"SUMMARY:{escape_text(ev.get('title') or '')}",
+        ]
+        if ev.get("location"):
+            lines.append(f"LOCATION:{escape_text(ev['location'])}")
+        if ev.get("category"):
+            lines.append(f"CATEGORIES:{escape_text(ev['category'])}")
+        yield _component("VEVENT", lines)
+
+
+def iter_calendar(
+    db,
+    start: datetime,
+    end: datetime,
+    service_id: int | None = None,
+    category: str | None = None,
+    name: str | None = None,
+    stamp: datetime | None = None,
+    use_cache: bool = False,
+) -> Iterator[str]:
+    """Yield an ICS document covering ``[start, end)`` one component at a time.
+
+    ``stamp`` becomes every DTSTAMP; passing the schedule's last change keeps
+    the output byte-stable between edits. With ``use_cache`` the expanded
+    instances come from the per-process occurrence cache, so after an edit
+    only the changed series are expanded again; streamed long horizons leave
+    it off rather than filling the cache with a window used once.
+    """
+    q = (
+        db.query(ServiceSeries)
+        .options(joinedload(ServiceSeries.service), selectinload(ServiceSeries.overrides))
+        .filter(ServiceSeries.is_active == True)
+    )
+    if service_id:
+        q = q.filter(ServiceSeries.service_id == service_id)
+    rows = q.order_by(ServiceSeries.id).all()
+    if category:
+        slug = category_slug(category)
+        rows = [s for s in rows if category_slug(series_labels(s)[2]) == slug]
+
+    stamp_text = (stamp or datetime.utcnow()).replace(tzinfo=None).strftime("%Y%m%dT%H%M%SZ")
+    win_start = start.replace(tzinfo=None)
+    win_end = end.replace(tzinfo=None)
+
+    header = ["VERSION:2.0", "PRODID:-//GuestDesk//Calendar//EN", "CALSCALE:GREGORIAN"]
+    if name:
+        header.append(f"X-WR-CALNAME:{escape_text(name)}")
+    yield fold("BEGIN:VCALENDAR") + "".join(fold(line) for line in header)
+
+    zones: dict[str, date] = {}
+    for series in rows:
+        tzid = _tzid(series)
+        if tzid:
+            first = min(series.dtstart.date(), win_start.date())
+            zones[tzid] = min(zones.get(tzid, first), first)
+    for tzid, first in sorted(zones.items()):
+        block = _vtimezone(tzid, first, win_end.date() + timedelta(days=366))
+        if block:
+            yield block
+
+    cached: dict[int, list] | None = None
+
+    def occurrences(series):
+        nonlocal cached
+        if not use_cache:
+            return expand_occurrences(series, win_start, win_end)
+        if cached is None:
+            cached = {}
+            for ev in cached_occurrences(db, win_start, win_end):
+                cached.setdefault(ev.get("series_id"), []).append(ev)
+        return cached.get(series.id, ())
+
+    for series in rows:
+        tzid = _tzid(series)
+        recurrence = _recurrence(series)
+        if recurrence:
+            try:
+                block = _recurring_components(series, tzid, *recurrence, win_start, win_end, stamp_text)
+            except Exception:
+                # Mixed naive/aware RDATE or EXDATE values: fall back to expansion
+                block = "".join(_expanded_components(occurrences(series), tzid, stamp_text))
+            if block:
+                yield block
+            continue
+        yield from _expanded_components(occurrences(series), tzid, stamp_text)
+
+    yield fold("END:VCALENDAR")
@@ -115,11 +115,15 @@ def send_mail(subject: str,
         msg["Reply-To"] = reply_to
     msg.set_content(body or "")
 
-    # Attachments: list of (mime_type, filename, bytes)
+    # Attachments: list of (mime_type, filename, bytes or path). Stored uploads
+    # are passed by path and read here, so queued jobs stay small.
     if attachments:
         for att in attachments:
             try:
                 mime, fname, data = att
+                if isinstance(data, os.PathLike):
+                    with open(data, "rb") as fh:
+                        data = fh.read()
             except Exception:
                 continue
             maintype, subtype = (mime.split("/", 1) + ["octet-stream"])[:2]
@@ -0,0 +1,198 @@
+"""Versioned schema migrations.
+
+The database records the last migration applied in the ``schema_version``
+row of ``settings``. At boot ``migrate()`` reads that one row and, when it is
+current, does nothing else: no table probes, no DDL, no backfills. Otherwise
+it runs ``create_all()`` for new tables, then each pending step in its own
+transaction, recording the version as it goes. Each step therefore runs once
+per database. A brand-new database is built complete by ``create_all()`` and
+stamped with the latest version without running any steps.
+
+``MIGRATIONS`` is append-only. To change the schema, add a step with the next
+number; never edit or renumber one that has shipped. Steps use SQLAlchemy's
+inspector and the connection's dialect, so they run on SQLite and PostgreSQL.
+
+Set ``GUESTDESK_AUTO_MIGRATE=0`` to keep app workers from migrating at boot,
+and run ``scripts/migrate.py`` once per deploy instead.
+"""
+
+# GuestDesk
+# Copyright (c) 2025 Chris Tanton
+# SPDX-License-Identifier: LicenseRef-GDCL-1.1
+from __future__ import annotations
+
+import os
+from typing import Callable
+
+from sqlalchemy import bindparam, inspect, insert, literal, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from .models import SUBMISSION_HASH_FIELDS, Base, Setting, Submission, submission_content_hash
+
+SCHEMA_VERSION_KEY = 'schema_version'
+# Rows read per query by data backfills
+BACKFILL_BATCH = 500
+
+# table -> [(column, default for existing rows or None)]; types and
+# nullability come from the model definition
+ADDED_COLUMNS: dict[str, list[tuple[str, object]]] = {
+    'users': [('approved', True)],
+    'services': [
+        ('availability', 'scheduled'),
+        ('is_offsite', False),
+        ('name_en', None), ('name_es', None),
+        ('description_en', None), ('description_es', None),
+        ('location_en', None), ('location_es', None),
+        ('contact_en', None), ('contact_es', None),
+        ('schedule_note_en', None), ('schedule_note_es', None),
+    ],
+    'analytics_events': [
+        ('category', None), ('action', None), ('label', None), ('referrer_path', None),
+        ('is_staff', None), ('page_load_ms', None), ('anon_id', None),
+    ],
+    'service_series': [('service_id', None)],
+    'service_overrides': [('service_id', None)],
+    'grievance_cases': [
+        ('archived_at', None), ('archived_by_user_id', None),
+        ('grievance_year', None), ('grievance_sequence', None),
+    ],
+}
+
+# English columns seeded from the original single-language ones
+SERVICE_BACKFILLS = (
+    ('name_en', 'name'),
+    ('description_en', 'description'),
+    ('location_en', 'location'),
+    ('contact_en', 'contact'),
+    ('schedule_note_en', 'schedule_note'),
+)
+
+
+def add_column(conn, table_name: str, column_name: str, default=None) -> None:
+    """``ALTER TABLE ... ADD COLUMN`` rendered for the connection's dialect."""
+    dialect = conn.dialect
+    quote = dialect.identifier_preparer.quote
+    column = Base.metadata.tables[table_name].c[column_name]
+    ddl = f'ALTER TABLE {quote(table_name)} ADD COLUMN {quote(column_name)} {column.type.compile(dialect=dialect)}'
+    if default is not None:
+        value = literal(default, column.type).compile(dialect=dialect, compile_kwargs={'literal_binds': True})
+        ddl += f' DEFAULT {value}'
+        if not column.nullable:
+            ddl += ' NOT NULL'
+    conn.exec_driver_sql(ddl)
+
+
+def add_missing_columns(conn, table_name: str, specs) -> list[str]:
+    """Add any of ``specs`` (``(column, default)``) the live table lacks; returns those added."""
+    inspector = inspect(conn)
+    if not inspector.has_table(table_name):
+        return []  # create_all builds it complete
+    present = {col['name'] for col in inspector.get_columns(table_name)}
+    added = []
+    for column_name, default in specs:
+        if column_name not in present:
+            add_column(conn, table_name, column_name, default)
+            added.append(column_name)
+    return added
+
+
+def create_missing_indexes(conn, table_name: str) -> None:
+    for index in Base.metadata.tables[table_name].indexes:
+        index.create(conn, checkfirst=True)
+
+
+# ---- steps ----
+
+def _columns_before_versioning(conn) -> None:
+    for table_name, specs in ADDED_COLUMNS.items():
+        add_missing_columns(conn, table_name, specs)
+    for table_name in ('service_series', 'service_overrides'):
+        create_missing_indexes(conn, table_name)
+
+
+def _seed_english_service_text(conn) -> None:
+    for target, source in SERVICE_BACKFILLS:
+        conn.exec_driver_sql(f'UPDATE services SET {target} = {source} WHERE {target} IS NULL')
+
+
+def _submission_content_hash(conn) -> None:
+    add_missing_columns(conn, 'submissions', [('content_hash', None)])
+    create_missing_indexes(conn, 'submissions')
+    table = Submission.__table__
+    columns = [table.c.id, table.c.kind, table.c.body] + [table.c[name] for name in SUBMISSION_HASH_FIELDS]
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(*columns)
+            .where(table.c.content_hash.is_(None), table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BACKFILL_BATCH)
+        ).mappings().all()
+        if not rows:
+            break
+        conn.execute(
+            update(table).where(table.c.id == bindparam('row_id')).values(content_hash=bindparam('hash')),
+            [{'row_id': row['id'],
+              'hash': submission_content_hash(
+                  row['kind'], row['body'], **{name: row[name] for name in SUBMISSION_HASH_FIELDS})}
+             for row in rows])
+        last_id = rows[-1]['id']
+
+
+# (version, description, step); append only
+MIGRATIONS: tuple[tuple[int, str, Callable], ...] = (
+    (1, 'columns added before versioned migrations', _columns_before_versioning),
+    (2, 'seed English service text from the original columns', _seed_english_service_text),
+    (3, 'hash submissions for indexed duplicate checks', _submission_content_hash),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+# ---- runner ----
+
+def auto_migrate_enabled() -> bool:
+    return os.getenv('GUESTDESK_AUTO_MIGRATE', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+def current_version(engine) -> int | None:
+    """The recorded schema version, or None for an unversioned database."""
+    try:
+        with engine.connect() as conn:
+            value = conn.execute(select(Setting.value).where(Setting.key == SCHEMA_VERSION_KEY)).scalar()
+    except SQLAlchemyError:
+        return None  # no settings table yet
+    return int(value) if value else None
+
+
+def pending(version: int | None) -> list[tuple[int, str, Callable]]:
+    return [m for m in MIGRATIONS if m[0] > (version or 0)]
+
+
+def _record(conn, version: int) -> None:
+    table = Setting.__table__
+    done = conn.execute(
+        update(table).where(table.c.key == SCHEMA_VERSION_KEY).values(value=str(version)))
+    if not done.rowcount:
+        conn.execute(insert(table).values(key=SCHEMA_VERSION_KEY, value=str(version)))
+
+
+def migrate(engine, log: Callable[[str], None] | None = None) -> list[int]:
+    """Bring the database to ``SCHEMA_VERSION``; returns the versions applied."""
+    version = current_version(engine)
+    if version is not None and version >= SCHEMA_VERSION:
+        return []
+    fresh = version is None and not inspect(engine).has_table('services')
+    Base.metadata.create_all(engine)
+    if fresh:
+        with engine.begin() as conn:
+            _record(conn, SCHEMA_VERSION)
+        return []
+    applied = []
+    for number, description, step in pending(version):
+        with engine.begin() as conn:
+            step(conn)
+            _record(conn, number)
+        applied.append(number)
+        if log:
+            log(f'Applied schema migration {number}: {description}')
+    return applied
@@ -1,6 +1,7 @@
 """Database models that back the GuestDesk application."""
 
 from __future__ import annotations
+import hashlib
 from datetime import datetime
 from sqlalchemy.orm import declarative_base, relationship, backref
 from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float, func, UniqueConstraint, Index
@@ -94,6 +95,31 @@ class AnnouncementImage(Base):
         backref=backref("images", cascade="all, delete-orphan", order_by="AnnouncementImage.id"),
     )
 
+    @property
+    def version(self) -> str:
+        """Changes whenever this id points at a new upload (SQLite reuses freed ids)."""
+        stamp = self.uploaded_at.isoformat() if self.uploaded_at else ''
+        return hashlib.sha1(f"{self.stored_filename}|{stamp}".encode()).hexdigest()[:12]
+
+# With kind and body, the fields that make two submissions the same one
+SUBMISSION_HASH_FIELDS = ('subject', 'category', 'building', 'location', 'contact_name', 'contact_info')
+
+
+def submission_content_hash(kind: str, body: str | None, **fields) -> str:
+    """SHA-256 of a submission's kind, body and key fields, case- and whitespace-normalized."""
+    parts = [kind or ''] + [
+        ' '.join(str(value).lower().split()) if value else ''
+        for value in [body] + [fields.get(name) for name in SUBMISSION_HASH_FIELDS]
+    ]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _submission_hash_default(context) -> str:
+    params = context.get_current_parameters()
+    return submission_content_hash(
+        params.get('kind'), params.get('body'), **{name: params.get(name) for name in SUBMISSION_HASH_FIELDS})
+
+
 class Submission(Base):
     """Feedback or request submitted through the public forms."""
     __tablename__ = 'submissions'
@@ -108,6 +134,11 @@ class Submission(Base):
     contact_info = Column(String(120), nullable=True)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     status = Column(String(16), nullable=False, default='new')
+    # Filled in on insert; duplicate checks look submissions up by it
+    content_hash = Column(String(64), nullable=True, default=_submission_hash_default)
+
+Index('ix_submissions_kind_hash_created', Submission.kind, Submission.content_hash, Submission.created_at)
+
 
 class User(Base):
     """Administrative user account with role-based permissions."""
@@ -272,6 +303,85 @@ class Setting(Base):
     value = Column(Text, nullable=True)
 
 
+# ---- Lobby displays ----
+class Slideshow(Base):
+    """Ordered set of slides that one or more displays play."""
+    __tablename__ = 'slideshows'
+    id = Column(Integer, primary_key=True)
+    slug = Column(String(120), nullable=False, unique=True)
+    name = Column(String(200), nullable=False)
+    description = Column(Text, nullable=True)
+    fade_duration = Column(Float, nullable=False, default=1.4)
+    slides = relationship(
+        'Slide', back_populates='slideshow',
+        cascade='all, delete-orphan', order_by='Slide.position',
+    )
+
+
+class Display(Base):
+    """A physical screen, addressed by slug from its permanent URL."""
+    __tablename__ = 'displays'
+    id = Column(Integer, primary_key=True)
+    slug = Column(String(120), nullable=False, unique=True)
+    name = Column(String(200), nullable=False)
+    location = Column(String(200), nullable=True)
+    active = Column(Boolean, nullable=False, default=True)
+    # Cap on rendition height for screens that cannot report their own
+    max_height = Column(Integer, nullable=True)
+    slideshow_id = Column(Integer, ForeignKey('slideshows.id', ondelete='SET NULL'), nullable=True, index=True)
+    slideshow = relationship('Slideshow')
+
+
+class Slide(Base):
+    """One text, image or video slide within a slideshow."""
+    __tablename__ = 'display_slides'
+    id = Column(Integer, primary_key=True)
+    slideshow_id = Column(Integer, ForeignKey('slideshows.id', ondelete='CASCADE'), nullable=False)
+    type = Column(String(16), nullable=False, default='text')  # text | image | video
+    position = Column(Integer, nullable=False, default=1)
+    duration = Column(Integer, nullable=False, default=10)
+    active = Column(Boolean, nullable=False, default=True)
+    transition = Column(String(16), nullable=False, default='fade')
+    headline = Column(Text, nullable=True)
+    subheadline = Column(Text, nullable=True)
+    body = Column(Text, nullable=True)
+    # Media slides: stored file name, the uploader's original name, and the
+    # screen-sized copies built in the background (JSON {height: file})
+    file = Column(String(255), nullable=True, index=True)
+    original_name = Column(String(255), nullable=True)
+    renditions = Column(Text, nullable=True)
+    poster = Column(String(255), nullable=True)
+    slideshow = relationship('Slideshow', back_populates='slides')
+    __table_args__ = (Index('ix_display_slides_slideshow_position', 'slideshow_id', 'position'),)
+
+
+# ---- Cache invalidation ----
+class CacheRevision(Base):
+    """Change counter for a named data set (schedule, announcements, ...).
+
+    Bumped inside the transaction that writes the data, so every worker can
+    tell whether its cached copy is current with one primary-key read.
+    """
+    __tablename__ = 'cache_revisions'
+    name = Column(String(64), primary_key=True)
+    revision = Column(Integer, nullable=False, default=0)
+    changed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class CacheChange(Base):
+    """Rows touched by one revision bump, so clients can fetch only what changed.
+
+    ``ref`` is ``"<kind>:<id>"`` (``series:12``, ``service:3``); ``*`` marks a
+    revision at or below which the log is incomplete.
+    """
+    __tablename__ = 'cache_changes'
+    id = Column(Integer, primary_key=True)
+    name = Column(String(64), nullable=False)
+    revision = Column(Integer, nullable=False)
+    ref = Column(String(64), nullable=False)
+    __table_args__ = (Index('ix_cache_changes_name_revision', 'name', 'revision'),)
+
+
 # ---- PDF Template system ----
 class PDFTemplate(Base):
     """Editable PDF template along with layout hints for overlay rendering."""
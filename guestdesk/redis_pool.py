@@ -0,0 +1,132 @@
+"""One Redis connection pool per process, shared by every subsystem.
+
+Form idempotency (``antispam``), the RQ job queue (``task_queue``) and the
+rate limiter all borrow connections from the pool returned by
+``get_pool()``; the RQ worker connects to the same place with
+``worker_redis()``. Connections therefore share a single configuration: URL or
+unix socket, connect/read timeouts, periodic health checks and a cap on open
+connections. The pool is created on first use (redis-py rebuilds it after a
+fork, so gunicorn workers never share sockets).
+
+Configuration (environment):
+
+``REDIS_URL``                 ``redis://localhost:6379/0`` by default
+``REDIS_SOCKET``              path of a unix socket; overrides the URL's host
+``REDIS_MAX_CONNECTIONS``     per-process cap (default 20)
+``REDIS_SOCKET_TIMEOUT``      seconds to wait for a reply (default 2)
+``REDIS_CONNECT_TIMEOUT``     seconds to wait for a connection (default 1)
+``REDIS_HEALTH_CHECK_INTERVAL`` seconds idle before a PING on reuse (default 30)
+"""
+
+# GuestDesk
+# Copyright (c) 2025 Chris Tanton
+# SPDX-License-Identifier: LicenseRef-GDCL-1.1
+from __future__ import annotations
+
+import os
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+_pool = None
+_client = None
+_lock = threading.Lock()
+
+
+def redis_url() -> str:
+    url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    socket_path = os.getenv("REDIS_SOCKET", "").strip()
+    if not socket_path:
+        return url
+    parts = urlsplit(url)
+    db = parse_qs(parts.query).get("db", [parts.path.lstrip("/") or "0"])[0]
+    auth = f"{parts.netloc.rsplit('@', 1)[0]}@" if "@" in parts.netloc else ""
+    return f"unix://{auth}{socket_path}?db={db}"
+
+
+def pool_options() -> dict[str, float | int]:
+    return {
+        "max_connections": int(os.getenv("REDIS_MAX_CONNECTIONS", "20")),
+        "socket_timeout": float(os.getenv("REDIS_SOCKET_TIMEOUT", "2")),
+        "socket_connect_timeout": float(os.getenv("REDIS_CONNECT_TIMEOUT", "1")),
+        "health_check_interval": int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30")),
+    }
+
+
+def get_pool():
+    """The process-wide ``redis.ConnectionPool``, created on first call."""
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                from redis import ConnectionPool
+
+                _pool = ConnectionPool.from_url(redis_url(), **pool_options())
+    return _pool
+
+
+def get_redis():
+    """A client on the shared pool (clients are cheap; the pool holds the sockets)."""
+    global _client
+    if _client is None:
+        from redis import Redis
+
+        pool = get_pool()
+        with _lock:
+            if _client is None:
+                _client = Redis(connection_pool=pool)
+    return _client
+
+
+def worker_redis():
+    """A client for ``rq_worker``: the same target and options, minus the reply timeout.
+
+    The worker blocks on Redis while it waits for jobs, so
+    ``REDIS_SOCKET_TIMEOUT`` would cut every idle wait short. It gets its
+    own connection rather than the pool, which serves request-time callers.
+    """
+    from redis import Redis
+
+    options = {k: v for k, v in pool_options().items() if k != "socket_timeout"}
+    return Redis.from_url(redis_url(), **options)
+
+
+def limiter_config() -> dict[str, object]:
+    """Flask-Limiter settings: the shared pool when Redis is configured, else memory.
+
+    ``RATELIMIT_STORAGE_URI`` set to anything but ``redis`` is used as given.
+    Otherwise limits live in Redis whenever ``REDIS_URL`` or ``REDIS_SOCKET``
+    is set, so every worker counts against the same budget. If Redis goes
+    away, the limiter falls back to per-worker memory until it returns.
+    """
+    uri = os.getenv("RATELIMIT_STORAGE_URI", "").strip()
+    if uri and uri != "redis":
+        return {"RATELIMIT_STORAGE_URI": uri}
+    if uri or os.getenv("REDIS_URL") or os.getenv("REDIS_SOCKET"):
+        return {
+            "RATELIMIT_STORAGE_URI": "redis://",
+            "RATELIMIT_STORAGE_OPTIONS": {"connection_pool": get_pool()},
+            "RATELIMIT_IN_MEMORY_FALLBACK_ENABLED": True,
+        }
+    return {"RATELIMIT_STORAGE_URI": "memory://"}
+
+
+def pool_stats() -> dict[str, object] | None:
+    """Connection counts for the admin data tools page; ``None`` before first use."""
+    pool = _pool
+    if pool is None:
+        return None
+    kwargs = pool.connection_kwargs
+    target = kwargs.get("path") or f"{kwargs.get('host', 'localhost')}:{kwargs.get('port', 6379)}"
+    stats: dict[str, object] = {
+        "target": f"{target}/{kwargs.get('db', 0)}",
+        "max_connections": pool.max_connections,
+        "created": getattr(pool, "_created_connections", None),
+        "idle": len(getattr(pool, "_available_connections", ())),
+        "in_use": len(getattr(pool, "_in_use_connections", ())),
+    }
+    try:
+        info = get_redis().info("clients")
+        stats["server_clients"] = info.get("connected_clients")
+    except Exception as exc:
+        stats["error"] = str(exc)
+    return stats
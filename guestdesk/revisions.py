@@ -0,0 +1,250 @@
+"""Cross-worker change counters backing GuestDesk's in-process caches.
+
+Each cached data set (the service schedule, announcements, ...) has a row in
+``cache_revisions``. A session hook bumps the matching rows whenever a watched
+model is flushed, so a cached value only needs its revision compared against
+the database to know whether it is still current — one primary-key read per
+request, shared by every cache consulted during that request.
+
+Each bump also records which rows it touched in ``cache_changes``, letting
+clients that hold an older revision fetch just the difference.
+"""
+
+# GuestDesk
+# Copyright (c) 2025 Chris Tanton
+# SPDX-License-Identifier: LicenseRef-GDCL-1.1
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import delete, event, insert, select, update
+
+from .models import (
+    Announcement,
+    AnnouncementImage,
+    CacheChange,
+    CacheRevision,
+    Display,
+    Service,
+    ServiceOverride,
+    ServiceSeries,
+    Setting,
+    Slide,
+    Slideshow,
+)
+
+SCHEDULE = 'schedule'
+SERVICES = 'services'
+ANNOUNCEMENTS = 'announcements'
+DISPLAYS = 'displays'
+SETTINGS = 'settings'
+
+# Model class -> revision names bumped when a row of that class is flushed
+WATCHED: dict[type, tuple[str, ...]] = {
+    Service: (SCHEDULE, SERVICES),
+    ServiceSeries: (SCHEDULE,),
+    ServiceOverride: (SCHEDULE,),
+    Announcement: (ANNOUNCEMENTS,),
+    AnnouncementImage: (ANNOUNCEMENTS,),
+    Display: (DISPLAYS,),
+    Slideshow: (DISPLAYS,),
+    Slide: (DISPLAYS,),
+    Setting: (SETTINGS,),
+}
+
+# Model class -> refs recorded in the change log for incremental fetches
+REFS = {
+    Service: lambda obj: (f'service:{obj.id}',),
+    ServiceSeries: lambda obj: (f'series:{obj.id}',),
+    ServiceOverride: lambda obj: (
+        (f'series:{obj.series_id}',) if obj.series_id
+        else (f'service:{obj.service_id}',) if obj.service_id else ('*',)
+    ),
+    Announcement: lambda obj: (f'announcement:{obj.id}',),
+    AnnouncementImage: lambda obj: (f'announcement:{obj.announcement_id}',),
+}
+
+# Revisions of change log kept per name; older deltas fall back to a full fetch
+CHANGE_LOG_KEEP = 500
+_PRUNE_EVERY = 100
+
+_table = CacheRevision.__table__
+_changes = CacheChange.__table__
+
+
+def _names_for(obj) -> tuple[str, ...]:
+    return WATCHED.get(type(obj), ())
+
+
+def _changed(session) -> dict[str, set[str]]:
+    """Revision names touched by the pending flush, with the refs for each."""
+    changed: dict[str, set[str]] = {}
+
+    def note(obj):
+        names = _names_for(obj)
+        if not names:
+            return
+        refs = REFS[type(obj)](obj) if type(obj) in REFS else ('*',)
+        for name in names:
+            changed.setdefault(name, set()).update(refs)
+
+    for obj in session.new:
+        note(obj)
+    for obj in session.deleted:
+        note(obj)
+    for obj in session.dirty:
+        if _names_for(obj) and session.is_modified(obj):
+            note(obj)
+    return changed
+
+
+def bump(conn, names, refs: dict[str, set[str]] | None = None) -> None:
+    """Increment the named revisions on ``conn`` (inside the caller's transaction).
+
+    ``refs`` lists what changed per name; a name without refs is logged as
+    ``*`` so incremental readers know to reload everything.
+    """
+    now = datetime.utcnow()
+    for name in sorted(names):
+        result = conn.execute(
+            update(_table)
+            .where(_table.c.name == name)
+            .values(revision=_table.c.revision + 1, changed_at=now)
+        )
+        if not result.rowcount:
+            conn.execute(insert(_table).values(name=name, revision=1, changed_at=now))
+        revision = conn.execute(select(_table.c.revision).where(_table.c.name == name)).scalar()
+        entries = sorted((refs or {}).get(name) or {'*'})
+        conn.execute(insert(_changes), [{'name': name, 'revision': revision, 'ref': ref} for ref in entries])
+        if revision % _PRUNE_EVERY == 0 and revision > CHANGE_LOG_KEEP:
+            floor = revision - CHANGE_LOG_KEEP
+            conn.execute(delete(_changes).where(_changes.c.name == name, _changes.c.revision <= floor))
+            conn.execute(insert(_changes).values(name=name, revision=floor, ref='*'))
+    if has_app_context():
+        g.pop('_cache_revisions', None)
+
+
+def _after_flush(session, _flush_context):
+    """Bump revisions for watched models; state still reflects the pre-flush lists."""
+    changed = _changed(session)
+    if changed:
+        bump(session.connection(), changed, changed)
+
+
+def install(engine, session_factory) -> None:
+    """Seed revision rows and hook ``session_factory`` so flushes bump them."""
+    names = {name for group in WATCHED.values() for name in group}
+    with engine.begin() as conn:
+        existing = {row[0] for row in conn.execute(select(_table.c.name))}
+        for name in sorted(names - existing):
+            conn.execute(insert(_table).values(name=name, revision=0, changed_at=datetime.utcnow()))
+        # Revisions bumped before the change log existed have no history
+        logged = {row[0] for row in conn.execute(select(_changes.c.name).distinct())}
+        for name, revision in conn.execute(select(_table.c.name, _table.c.revision)):
+            if revision and name not in logged:
+                conn.execute(insert(_changes).values(name=name, revision=revision, ref='*'))
+    if not event.contains(session_factory, 'after_flush', _after_flush):
+        event.listen(session_factory, 'after_flush', _after_flush)
+
+
+def snapshot(db) -> dict[str, tuple[int, datetime]]:
+    """Return ``{name: (revision, changed_at)}``, read once per request."""
+    cached = g.get('_cache_revisions') if has_app_context() else None
+    if cached is not None:
+        return cached
+    rows = db.execute(select(_table.c.name, _table.c.revision, _table.c.changed_at)).all()
+    data = {row[0]: (int(row[1] or 0), row[2]) for row in rows}
+    if has_app_context():
+        g._cache_revisions = data
+    return data
+
+
+def current(db, name: str) -> tuple[int, datetime | None]:
+    """Return ``(revision, changed_at)`` for one named data set."""
+    return snapshot(db).get(name, (0, None))
+
+
+def refresh(db) -> None:
+    """Let a long-running request see bumps made since it first read revisions.
+
+    Ends the session's read transaction and forgets the per-request snapshot;
+    only for requests that have nothing pending (e.g. long-poll waiters).
+    """
+    db.rollback()
+    if has_app_context():
+        g.pop('_cache_revisions', None)
+
+
+def changes_since(db, name: str, since: int) -> set[str] | None:
+    """Refs changed after revision ``since``, or ``None`` if a full reload is needed."""
+    revision, _ = current(db, name)
+    if since is None or since < 0 or since > revision:
+        return None
+    if since == revision:
+        return set()
+    refs = set(db.execute(
+        select(_changes.c.ref).where(_changes.c.name == name, _changes.c.revision > since)
+    ).scalars())
+    if '*' in refs:
+        return None
+    return refs
+
+
+class RevisionCache:
+    """Small per-process memo whose entries live as long as their revisions.
+
+    Values are keyed by an arbitrary hashable key and tagged with the current
+    revision of every name the cache depends on; a bump of any of them makes
+    the entry stale and the next lookup rebuilds it.
+    """
+
+    def __init__(self, *names: str, maxsize: int = 32):
+        self.names = names
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def tag(self, db) -> tuple[int, ...]:
+        """The revision tuple entries are currently validated against."""
+        revs = snapshot(db)
+        return tuple(revs.get(name, (0, None))[0] for name in self.names)
+
+    def get(self, db, key, build, valid=None):
+        """Return the cached value for ``key``, calling ``build()`` when stale.
+
+        ``valid`` optionally vets a cached value (e.g. for time-based expiry);
+        values it rejects are rebuilt even if the revisions still match.
+        """
+        tag = self.tag(db)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == tag and (valid is None or valid(entry[1])):
+                self._entries.move_to_end(key)
+                return entry[1]
+        value = build()
+        with self._lock:
+            self._entries[key] = (tag, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def app_cache(key: str, *names: str, maxsize: int = 32) -> RevisionCache:
+    """Return the current app's cache registered under ``key``, creating it once.
+
+    Caches hang off the Flask app rather than the module so two apps (tests,
+    multiple data directories) never share entries.
+    """
+    caches = current_app.extensions.setdefault('guestdesk.caches', {})
+    cache = caches.get(key)
+    if cache is None:
+        cache = caches.setdefault(key, RevisionCache(*names, maxsize=maxsize))
+    return cache
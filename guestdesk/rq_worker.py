@@ -1,12 +1,14 @@
 """Convenience script to run an RQ worker aligned with app settings."""
 
-from rq import Worker, Connection
-from redis import Redis
-import os
+from rq import Worker
+
+try:
+    from .redis_pool import worker_redis
+except ImportError:  # run as ``python -m rq_worker`` from this directory
+    from redis_pool import worker_redis
 
 queues = ["default"]
-redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
 if __name__ == "__main__":
-    with Connection(Redis.from_url(redis_url)):
-        Worker(queues).work()
+    # Same REDIS_URL / REDIS_SOCKET the app enqueues on
+    Worker(queues, connection=worker_redis()).work()
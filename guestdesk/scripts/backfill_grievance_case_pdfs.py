@@ -17,16 +17,16 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from guestdesk import pdf_config
-from guestdesk.models import Base, Submission, GrievanceCase
+from guestdesk.database import create_sqlite_engine
+from guestdesk.migrations import migrate
+from guestdesk.models import Submission, GrievanceCase
 from guestdesk.grievances import (
     GENERATED_PDF_TYPE,
     attach_generated_pdf,
     case_generated_pdf,
-    ensure_case_columns,
     render_case_pdf,
 )
 
@@ -62,9 +62,8 @@ def main() -> int:
     if not args.db.exists():
         print(f"Database not found: {args.db}", file=sys.stderr)
         return 1
-    engine = create_engine(f"sqlite:///{args.db}", future=True)
-    Base.metadata.create_all(engine)
-    ensure_case_columns(engine)
+    engine = create_sqlite_engine(args.db)
+    migrate(engine)
     Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
     db = Session()
     attached = copied = skipped = 0
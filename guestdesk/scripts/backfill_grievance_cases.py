@@ -17,11 +17,12 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from guestdesk.models import Base, Submission, GrievanceCase
-from guestdesk.grievances import create_case_for_submission, ensure_case_columns
+from guestdesk.database import create_sqlite_engine
+from guestdesk.migrations import migrate
+from guestdesk.models import Submission, GrievanceCase
+from guestdesk.grievances import create_case_for_submission
 
 
 def default_db_path() -> Path:
@@ -50,9 +51,8 @@ def main() -> int:
     if not args.db.exists():
         print(f"Database not found: {args.db}", file=sys.stderr)
         return 1
-    engine = create_engine(f"sqlite:///{args.db}", future=True)
-    Base.metadata.create_all(engine)
-    ensure_case_columns(engine)
+    engine = create_sqlite_engine(args.db)
+    migrate(engine)
     Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
     db = Session()
     try:
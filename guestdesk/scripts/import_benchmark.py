@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Measure how long a fresh worker spends importing GuestDesk.
+
+Runs ``import guestdesk.app; create_app()`` in a clean interpreter under
+``python -X importtime`` against a throwaway data directory, then prints the
+total import time, the slowest modules, and any module on the deferred list
+that was loaded during start-up. The test suite runs the same measurement
+with ``IMPORT_BUDGET_MS`` as its limit.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Heavy dependencies that must load on first use, never at worker start-up
+DEFERRED_MODULES = frozenset({
+    "PyPDF2",
+    "icalendar",
+    "redis",
+    "reportlab",
+    "rq",
+    "user_agents",
+    "weasyprint",
+})
+
+# Import time allowed from ``import guestdesk.app`` through create_app()
+IMPORT_BUDGET_MS = int(os.environ.get("GUESTDESK_IMPORT_BUDGET_MS", "1500"))
+
+_BOOT = "import guestdesk.app as m; m.create_app()"
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """``(module, depth, self_us, cumulative_us)`` rows from ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        try:
+            rows.append((name.strip(), (len(name) - len(name.lstrip()) - 1) // 2, int(own), int(cumulative)))
+        except ValueError:
+            continue  # the header row
+    return rows
+
+
+def measure(statement: str = _BOOT) -> list[tuple[str, int, int, int]]:
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {
+            **os.environ,
+            "GUESTDESK_DATA_DIR": data_dir,
+            "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])),
+        }
+        for name in ("DATABASE_URL", "REDIS_URL", "REDIS_SOCKET", "RATELIMIT_STORAGE_URI"):
+            env.pop(name, None)
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            env=env, capture_output=True, text=True, timeout=120,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"start-up failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def startup_import_ms(rows) -> float:
+    """Import time from ``import guestdesk.app`` onwards, in milliseconds.
+
+    Sums the top-level entries only (each already includes its children),
+    skipping what the interpreter loads before the statement runs.
+    """
+    names = [name for name, *_ in rows]
+    first = names.index("guestdesk.app") if "guestdesk.app" in names else 0
+    return sum(cumulative for _, depth, _, cumulative in rows[first:] if depth == 0) / 1000.0
+
+
+def deferred_loaded(rows) -> set[str]:
+    return {name.split(".", 1)[0] for name, *_ in rows} & DEFERRED_MODULES
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--top", type=int, default=15, help="number of slowest modules to list")
+    args = ap.parse_args(argv)
+    rows = measure()
+    print(f"start-up import time: {startup_import_ms(rows):.0f} ms (budget {IMPORT_BUDGET_MS} ms)")
+    print("slowest modules (self time):")
+    for name, _, own, _ in sorted(rows, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"  {own / 1000.0:8.1f} ms  {name}")
+    loaded = deferred_loaded(rows)
+    if loaded:
+        print(f"deferred modules loaded at start-up: {', '.join(sorted(loaded))}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
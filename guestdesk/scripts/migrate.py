@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Apply pending schema migrations.
+
+Dry-run by default: prints the recorded schema version and the steps that
+would run. Pass --apply to run them. App workers do this at boot unless
+GUESTDESK_AUTO_MIGRATE=0; with auto-migration off, run this once per deploy
+before starting the new release. Uses DATABASE_URL when set, otherwise the
+SQLite file (or --db).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from guestdesk.database import create_app_engine, create_sqlite_engine
+from guestdesk.migrations import SCHEMA_VERSION, current_version, migrate, pending
+
+
+def default_db_path() -> Path:
+    """Match the application's default SQLite location."""
+    data_dir = (
+        os.environ.get("GUESTDESK_DATA_DIR")
+        or os.environ.get("GUESTD_DATA_DIR")
+        or "/var/lib/guestdesk"
+    )
+    return Path(data_dir) / "guestdesk.db"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Apply pending schema migrations. Dry-run by default; pass --apply to run them."
+    )
+    parser.add_argument("--db", type=Path, default=None,
+                        help=f"SQLite database path (default: DATABASE_URL or {default_db_path()})")
+    parser.add_argument("--apply", action="store_true", help="Run the pending migrations")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.db is None and os.environ.get("DATABASE_URL"):
+        engine = create_app_engine(os.environ["DATABASE_URL"])
+    else:
+        path = args.db or default_db_path()
+        if not path.exists():
+            print(f"Database not found: {path}", file=sys.stderr)
+            return 1
+        engine = create_sqlite_engine(path)
+    version = current_version(engine)
+    steps = pending(version)
+    print(f"Schema version: {version if version is not None else 'unversioned'} (latest {SCHEMA_VERSION})")
+    if not steps:
+        print("Nothing to do.")
+        return 0
+    if not args.apply:
+        for number, description, _ in steps:
+            print(f"Would apply {number}: {description}")
+        print("Re-run with --apply to migrate.")
+        return 0
+    applied = migrate(engine, log=print)
+    if not applied:
+        print(f"Stamped new database at version {SCHEMA_VERSION}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -20,10 +20,11 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from guestdesk.models import Base, User
+from guestdesk.database import create_sqlite_engine
+from guestdesk.migrations import migrate
+from guestdesk.models import User
 from guestdesk.permissions import LEGACY_EDITOR_PERMISSIONS, grant_permissions, get_permissions
 
 
@@ -52,8 +53,8 @@ def main() -> int:
     if not args.db.exists():
         print(f"Database not found: {args.db}", file=sys.stderr)
         return 1
-    engine = create_engine(f"sqlite:///{args.db}", future=True)
-    Base.metadata.create_all(engine)
+    engine = create_sqlite_engine(args.db)
+    migrate(engine)
     Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
     db = Session()
     try:
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Mirror a display's slideshow onto a kiosk for offline playback.
+
+Run from cron or a systemd timer on the Pi. The manifest is fetched with its
+ETag, so an unchanged slideshow costs one 304. When it has changed, a single
+tar carrying only the media the kiosk does not yet hold is downloaded and
+unpacked into ``--dest``; the manifest is replaced last, so a failed or slow
+transfer leaves the previous bundle playable. Media no longer listed is
+removed afterwards. Standard library only.
+
+``--dest`` also receives the player page as ``index.html``. Point the kiosk
+browser at ``file://<dest>/index.html``: it plays ``manifest.js`` and
+``media/`` from disk, picks up each new sync within 30 seconds, and never
+waits on the server.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tarfile
+import tempfile
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+
+def fetch(url: str, etag: str | None = None, timeout: float = 30.0, data: dict | None = None):
+    """GET *url*, or POST *data* as JSON; returns None on ``304 Not Modified``."""
+    body = json.dumps(data).encode("utf-8") if data is not None else None
+    req = urllib.request.Request(url, data=body)
+    if body is not None:
+        req.add_header("Content-Type", "application/json")
+    if etag:
+        req.add_header("If-None-Match", etag)
+    try:
+        return urllib.request.urlopen(req, timeout=timeout)
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304:
+            return None
+        raise
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".part")
+    with os.fdopen(fd, "wb") as out:
+        out.write(data)
+    os.replace(tmp, path)
+
+
+def sync(server: str, slug: str, dest: Path, height: int | None = None) -> bool:
+    """Bring ``dest`` up to date; returns True when anything changed."""
+    media_dir = dest / "media"
+    media_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = dest / "manifest.json"
+    etag_path = dest / "manifest.etag"
+    complete = all((dest / name).exists() for name in ("manifest.json", "manifest.js", "index.html"))
+    etag = etag_path.read_text().strip() if etag_path.exists() and complete else None
+
+    base = f"{server.rstrip('/')}/api/display-bundle/{urllib.parse.quote(slug)}"
+    params = {"h": str(height)} if height else {}
+    resp = fetch(f"{base}?{urllib.parse.urlencode(params)}", etag)
+    if resp is None:
+        return False
+    with resp:
+        manifest = json.load(resp)
+        new_etag = resp.headers.get("ETag", "")
+
+    have = sorted(f["name"] for f in manifest["files"] if (media_dir / f["name"]).exists())
+    missing = [f for f in manifest["files"] if f["name"] not in have]
+    if missing:
+        query = urllib.parse.urlencode({**params, "format": "tar"})
+        with fetch(f"{base}?{query}", timeout=600, data={"have": have}) as bundle:
+            with tarfile.open(fileobj=bundle, mode="r|") as tar:
+                for member in tar:
+                    name = member.name.removeprefix("media/")
+                    if not member.isfile() or not member.name.startswith("media/"):
+                        continue
+                    target = (media_dir / name).resolve()
+                    if media_dir.resolve() not in target.parents:
+                        continue  # never write outside the cache
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=".part")
+                    with os.fdopen(fd, "wb") as out:
+                        src = tar.extractfile(member)
+                        for chunk in iter(lambda: src.read(64 * 1024), b""):
+                            out.write(chunk)
+                    os.replace(tmp, target)
+
+    with fetch(f"{base}/player") as page:
+        write_atomic(dest / "index.html", page.read())
+    body = json.dumps(manifest)
+    write_atomic(dest / "manifest.js", f"window.GUESTDESK_BUNDLE = {body};\n".encode("utf-8"))
+    write_atomic(manifest_path, body.encode("utf-8"))
+    etag_path.write_text(new_etag)
+
+    keep = {f["name"] for f in manifest["files"]}
+    for path in media_dir.rglob("*"):
+        if path.is_file() and path.relative_to(media_dir).as_posix() not in keep:
+            path.unlink()
+    return True
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("server", help="GuestDesk base URL, e.g. https://desk.example.org")
+    ap.add_argument("slug", help="display slug, e.g. lobby-2")
+    ap.add_argument("--dest", type=Path, default=Path("/var/cache/guestdesk-display"))
+    ap.add_argument("--height", type=int, help="screen height in pixels (picks renditions)")
+    args = ap.parse_args(argv)
+    try:
+        changed = sync(args.server, args.slug, args.dest, args.height)
+    except (OSError, ValueError, tarfile.TarError) as exc:
+        print(f"sync failed, keeping previous bundle: {exc}", file=sys.stderr)
+        return 1
+    print("updated" if changed else "unchanged")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
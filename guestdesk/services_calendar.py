@@ -1,15 +1,20 @@
 """Expand recurring service definitions into concrete calendar events."""
 
 from __future__ import annotations
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 from zoneinfo import ZoneInfo
 from dateutil.rrule import rrulestr
 import json
+import re
+import threading
 from dateutil.parser import isoparse
 
+from flask import current_app
 from .models import ServiceSeries, ServiceOverride
-from sqlalchemy.orm import Session
+from . import revisions
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 
 def _parse_dates(lst):
@@ -31,9 +36,8 @@ def _parse_dates(lst):
     return out
 
 
-def expand_occurrences(series: ServiceSeries, start: datetime, end: datetime) -> List[Dict[str, Any]]:
-    """Expand a single series into FullCalendar-style dicts within ``[start, end)``."""
-    tzname = series.tz or "America/New_York"
+def series_labels(series: ServiceSeries) -> tuple[str, str, str | None]:
+    """Return the ``(title, location, category)`` shown for a series' instances."""
     svc = getattr(series, "service", None)
     svc_name = ""
     svc_location = ""
@@ -42,6 +46,15 @@ def expand_occurrences(series: ServiceSeries, start: datetime, end: datetime) ->
         svc_name = svc.name_en or svc.name or ""
         svc_location = svc.location_en or svc.location or ""
         svc_category = svc.category
+    title = (series.title or "").strip()
+    if not title or title.lower() == 'untitled service':
+        title = svc_name or title
+    return title, (series.location or svc_location or ""), (series.category or svc_category)
+
+
+def expand_occurrences(series: ServiceSeries, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """Expand a single series into FullCalendar-style dicts within ``[start, end)``."""
+    base_title, base_location, category = series_labels(series)
     # Treat inbound window as naive local for comparison
     win_start = start.replace(tzinfo=None)
     win_end = end.replace(tzinfo=None)
@@ -86,18 +99,15 @@ def expand_occurrences(series: ServiceSeries, start: datetime, end: datetime) ->
             continue
         s = ov.new_dtstart if (ov and ov.new_dtstart) else inst["start"]
         e = ov.new_dtend if (ov and ov.new_dtend) else inst["end"]
-        base_title = (series.title or "").strip()
-        if not base_title or base_title.lower() == 'untitled service':
-            base_title = svc_name or base_title
         title = ov.new_title if (ov and ov.new_title) else base_title
-        loc = ov.new_location if (ov and ov.new_location) else (series.location or svc_location or "")
+        loc = ov.new_location if (ov and ov.new_location) else base_location
         out.append({
             "series_id": series.id,
             "service_id": series.service_id,
             "instance_start": inst["start"].isoformat(),
             "title": title,
             "location": loc,
-            "category": series.category or svc_category,
+            "category": category,
             "start": s.isoformat(),
             "end": e.isoformat(),
             "allDay": bool(series.is_all_day),
@@ -164,3 +174,187 @@ def merged_occurrences(
     items = list(by_key.values())
     items.sort(key=lambda x: (x["start"], x.get("service_id") or 0))
     return items
+
+
+# ---- Cached occurrences ----
+
+def category_slug(name: str | None) -> str:
+    """URL-safe form of a category name (``ID/Docs`` -> ``id-docs``)."""
+    return re.sub(r'[^a-z0-9]+', '-', (name or '').lower()).strip('-')
+
+
+def _series_fingerprint(series: ServiceSeries) -> tuple:
+    """Everything that feeds into a series' expansion, including its overrides."""
+    svc = series.service
+    return (
+        series.title, series.location, series.category, series.tz,
+        series.dtstart, series.dtend, series.rrule, series.rdate, series.exdate,
+        bool(series.is_all_day), series.service_id,
+        (svc.name_en, svc.name, svc.location_en, svc.location, svc.category) if svc else None,
+        tuple(sorted(
+            (ov.id, ov.instance_start, ov.new_title, ov.new_location,
+             ov.new_dtstart, ov.new_dtend, bool(ov.cancelled))
+            for ov in (series.overrides or [])
+        )),
+    )
+
+
+class OccurrenceStore:
+    """Expanded occurrences per window, maintained series by series.
+
+    After a schedule change only the series whose fingerprint changed are
+    re-expanded; every other series reuses its previous expansion.
+    """
+
+    def __init__(self, max_windows: int = 8):
+        self.max_windows = max_windows
+        self._windows: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def window(self, session: Session, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        key = (start, end)
+        rows = (
+            session.query(ServiceSeries)
+            .options(joinedload(ServiceSeries.service), selectinload(ServiceSeries.overrides))
+            .filter(ServiceSeries.is_active == True)
+            .all()
+        )
+        with self._lock:
+            previous = self._windows.get(key, {})
+        fresh = {}
+        for series in rows:
+            fingerprint = _series_fingerprint(series)
+            hit = previous.get(series.id)
+            if hit and hit[0] == fingerprint:
+                fresh[series.id] = hit
+            else:
+                fresh[series.id] = (fingerprint, expand_occurrences(series, start, end))
+        with self._lock:
+            self._windows[key] = fresh
+            self._windows.move_to_end(key)
+            while len(self._windows) > self.max_windows:
+                self._windows.popitem(last=False)
+        # expand_occurrences already applied each series' overrides
+        items = [ev for _, events in fresh.values() for ev in events]
+        items.sort(key=lambda x: (x["start"], x.get("service_id") or 0))
+        return items
+
+
+def _occurrence_store() -> OccurrenceStore:
+    store = current_app.extensions.get('guestdesk.occurrences')
+    if store is None:
+        store = current_app.extensions.setdefault('guestdesk.occurrences', OccurrenceStore())
+    return store
+
+
+def cached_occurrences(
+    session: Session,
+    start: datetime,
+    end: datetime,
+    service_id: int | None = None,
+    category: str | None = None,
+) -> List[Dict[str, Any]]:
+    """Return merged occurrences from the per-process cache, optionally sliced.
+
+    The full window is rebuilt (incrementally) only when the schedule revision
+    changes; slicing by service or category slug is a filter over that list.
+    Returned dicts are shared with the cache and must not be mutated.
+    """
+    cache = revisions.app_cache('schedule.windows', revisions.SCHEDULE, maxsize=8)
+    events = cache.get(session, (start, end), lambda: _occurrence_store().window(session, start, end))
+    if service_id:
+        events = [ev for ev in events if ev.get("service_id") == service_id]
+    if category:
+        slug = category_slug(category)
+        events = [ev for ev in events if category_slug(ev.get("category")) == slug]
+    return events
+
+
+def series_ids_for_refs(session: Session, refs) -> set[int]:
+    """Resolve change-log refs (``series:12``, ``service:3``) to series ids."""
+    series_ids: set[int] = set()
+    service_ids: set[int] = set()
+    for ref in refs:
+        kind, _, raw = ref.partition(':')
+        if not raw.isdigit():
+            continue
+        if kind == 'series':
+            series_ids.add(int(raw))
+        elif kind == 'service':
+            service_ids.add(int(raw))
+    if service_ids:
+        rows = session.query(ServiceSeries.id).filter(ServiceSeries.service_id.in_(service_ids)).all()
+        series_ids.update(r[0] for r in rows)
+    return series_ids
+
+
+def compact_events(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Pack events as per-series labels plus short rows.
+
+    Each row is ``[series_id, start, end, instance_start, title, location,
+    override]`` where ``instance_start``, ``title`` and ``location`` are
+    ``None`` when they match ``start`` or the series labels.
+    """
+    series: Dict[str, Dict[str, Any]] = {}
+    for ev in events:
+        key = str(ev.get("series_id"))
+        if key not in series or (series[key]["_override"] and not ev.get("override")):
+            series[key] = {
+                "service_id": ev.get("service_id"),
+                "title": ev.get("title"),
+                "location": ev.get("location"),
+                "category": ev.get("category"),
+                "allDay": ev.get("allDay"),
+                "_override": bool(ev.get("override")),
+            }
+    rows = []
+    for ev in events:
+        base = series[str(ev.get("series_id"))]
+        rows.append([
+            ev.get("series_id"),
+            ev["start"],
+            ev["end"],
+            None if ev.get("instance_start") == ev["start"] else ev.get("instance_start"),
+            None if ev.get("title") == base["title"] else ev.get("title"),
+            None if ev.get("location") == base["location"] else ev.get("location"),
+            1 if ev.get("override") else 0,
+        ])
+    for labels in series.values():
+        labels.pop("_override")
+    return {"series": series, "rows": rows}
+
+
+def feed_payload(
+    session: Session,
+    start: datetime,
+    end: datetime,
+    since: int | None = None,
+    service_id: int | None = None,
+    category: str | None = None,
+    compact: bool = False,
+) -> Dict[str, Any]:
+    """Admin calendar payload, optionally limited to series changed after ``since``.
+
+    ``full`` is true when the client must replace everything it holds for the
+    range; otherwise it drops its events for ``series_ids`` and adds ``events``.
+    """
+    revision, _ = revisions.current(session, revisions.SCHEDULE)
+    changed = None
+    if since is not None:
+        refs = revisions.changes_since(session, revisions.SCHEDULE, since)
+        if refs is not None:
+            changed = series_ids_for_refs(session, refs)
+    if changed is not None and not changed:
+        events: List[Dict[str, Any]] = []
+    else:
+        events = cached_occurrences(session, start, end, service_id=service_id, category=category)
+        if changed is not None:
+            events = [ev for ev in events if ev.get("series_id") in changed]
+    payload: Dict[str, Any] = {"revision": revision, "full": changed is None}
+    if changed is not None:
+        payload["series_ids"] = sorted(changed)
+    if compact:
+        payload.update(compact_events(events))
+    else:
+        payload["events"] = events
+    return payload
@@ -0,0 +1,76 @@
+"""Runtime settings from the ``settings`` table, kept current on every worker.
+
+Rows are copied into ``app.config`` at start-up. Saving a ``Setting`` bumps
+the ``settings`` revision (see ``revisions``), and before each request a
+worker compares that revision, read with the request's shared revision
+snapshot, with the one it last loaded. Only when they differ does it re-read
+the table. An admin change therefore reaches every worker on its next
+request, without a restart and without a settings query per request.
+"""
+
+# GuestDesk
+# Copyright (c) 2025 Chris Tanton
+# SPDX-License-Identifier: LicenseRef-GDCL-1.1
+from __future__ import annotations
+
+import threading
+
+from . import revisions
+from .models import Setting
+
+# Stored as comma-separated text, exposed in app.config as lists
+LIST_KEYS = frozenset({
+    'GRIEVANCE_EMAIL_TO', 'GRIEVANCE_EMAIL_CC',
+    'MAINTENANCE_EMAIL_TO', 'SUGGESTION_EMAIL_TO', 'QUESTION_EMAIL_TO',
+})
+
+_EXT = 'guestdesk.settings'
+_MISSING = object()
+
+
+def config_value(key: str, raw: str | None):
+    """The ``app.config`` form of a stored setting."""
+    val = raw or ''
+    if key in LIST_KEYS:
+        return [x.strip() for x in val.split(',') if x.strip()]
+    return val
+
+
+def _state(app) -> dict:
+    state = app.extensions.get(_EXT)
+    if state is None:
+        state = app.extensions.setdefault(_EXT, {
+            'revision': None,
+            'defaults': {},  # config values the table has overridden, for rows later deleted
+            'lock': threading.Lock(),
+        })
+    return state
+
+
+def load(app, db) -> None:
+    """Copy every ``Setting`` row into ``app.config``."""
+    state = _state(app)
+    revision, _ = revisions.current(db, revisions.SETTINGS)
+    rows = {s.key: s.value for s in db.query(Setting).all()}
+    with state['lock']:
+        defaults = state['defaults']
+        for key in list(defaults):
+            if key not in rows:
+                default = defaults.pop(key)
+                if default is _MISSING:
+                    app.config.pop(key, None)
+                else:
+                    app.config[key] = default
+        for key, raw in rows.items():
+            defaults.setdefault(key, app.config.get(key, _MISSING))
+            app.config[key] = config_value(key, raw)
+        state['revision'] = revision
+
+
+def sync(app, db) -> bool:
+    """Reload settings if another worker changed them; returns True if it did."""
+    revision, _ = revisions.current(db, revisions.SETTINGS)
+    if revision == _state(app)['revision']:
+        return False
+    load(app, db)
+    return True
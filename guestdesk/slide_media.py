@@ -0,0 +1,174 @@
+"""Screen-sized renditions of display slide media.
+
+Uploads are kept as-is, and a background job writes recompressed copies
+next to them: WebP (or JPEG) images capped at each height in
+``RENDITION_HEIGHTS`` and a poster frame for MP4s. Displays are then served
+the smallest copy that still fills their screen. Pillow and ``ffmpeg`` are
+both optional; without them slides keep using the original file.
+"""
+
+# GuestDesk
+# Copyright (c) 2025 Chris Tanton
+# SPDX-License-Identifier: LicenseRef-GDCL-1.1
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+from flask import current_app, has_app_context
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = None  # type: ignore
+
+try:
+    from .task_queue import q
+except Exception:  # pragma: no cover
+    q = None  # type: ignore
+
+RENDITION_HEIGHTS = tuple(
+    sorted(int(h) for h in os.getenv("GUESTDESK_SLIDE_HEIGHTS", "720,1080").split(",") if h.strip())
+)
+RENDITION_DIR = "_renditions"
+IMAGE_QUALITY = 80
+
+
+def pick_height(requested: int | None) -> int | None:
+    """Smallest rendition height covering ``requested`` (``None`` = original)."""
+    if not requested:
+        return None
+    for height in RENDITION_HEIGHTS:
+        if height >= requested:
+            return height
+    return None
+
+
+def _webp_supported() -> bool:
+    try:
+        return bool(features.check("webp"))
+    except Exception:
+        return False
+
+
+def render_image(slides_dir: Path, filename: str) -> dict:
+    """Write resized copies of an image slide; returns ``{height: relative path}``."""
+    if Image is None:
+        return {}
+    src = slides_dir / filename
+    out_dir = slides_dir / RENDITION_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    use_webp = _webp_supported()
+    renditions: dict[str, str] = {}
+    with Image.open(src) as opened:
+        if getattr(opened, "is_animated", False):
+            return {}  # animated GIF/WebP: keep the original
+        im = ImageOps.exif_transpose(opened)
+        has_alpha = im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info)
+        im = im.convert("RGBA" if has_alpha and use_webp else "RGB")
+        written: dict[tuple[int, int], str] = {}
+        for height in RENDITION_HEIGHTS:
+            scale = min(1.0, height / float(im.height))
+            size = (max(1, round(im.width * scale)), max(1, round(im.height * scale)))
+            if size in written:
+                renditions[str(height)] = written[size]
+                continue
+            ext = "webp" if use_webp else "jpg"
+            name = f"{RENDITION_DIR}/{filename}.{height}.{ext}"
+            frame = im if size == im.size else im.resize(size, Image.LANCZOS)
+            if use_webp:
+                frame.save(slides_dir / name, "WEBP", quality=IMAGE_QUALITY, method=4)
+            else:
+                frame.save(slides_dir / name, "JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
+            written[size] = name
+            renditions[str(height)] = name
+    return renditions
+
+
+def render_poster(slides_dir: Path, filename: str) -> str | None:
+    """Grab a poster frame from a video slide with ffmpeg, when installed."""
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return None
+    out_dir = slides_dir / RENDITION_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    name = f"{RENDITION_DIR}/{filename}.poster.jpg"
+    height = RENDITION_HEIGHTS[-1] if RENDITION_HEIGHTS else 1080
+    subprocess.run(
+        [ffmpeg, "-y", "-loglevel", "error", "-ss", "1", "-i", str(slides_dir / filename),
+         "-frames:v", "1", "-vf", f"scale=-2:'min({height},ih)'", str(slides_dir / name)],
+        check=True, timeout=120,
+    )
+    return name
+
+
+def process_slide_media(filename: str) -> dict:
+    """Job body: build renditions for ``filename`` and record them on its slides."""
+    from . import display
+
+    slides_dir = display.SLIDES_DIR
+    ext = Path(filename).suffix.lower()
+    media: dict = {}
+    if ext in display.IMAGE_EXTENSIONS:
+        renditions = render_image(slides_dir, filename)
+        if renditions:
+            media["renditions"] = renditions
+    elif ext in display.VIDEO_EXTENSIONS:
+        poster = render_poster(slides_dir, filename)
+        if poster:
+            media["poster"] = poster
+    if not media:
+        return media
+    if has_app_context():
+        display.record_slide_media(current_app.dbs(), filename, media)
+    else:
+        db = _worker_session()
+        try:
+            display.record_slide_media(db, filename, media)
+        finally:
+            db.close()
+    return media
+
+
+_worker_sessions = None
+
+
+def _worker_session():
+    """Session on the app database for jobs running outside a Flask app (RQ)."""
+    global _worker_sessions
+    if _worker_sessions is None:
+        from sqlalchemy.orm import sessionmaker
+
+        from . import revisions
+        from .app import DATA_DIR
+        from .database import create_app_engine, database_url
+
+        engine = create_app_engine(database_url(DATA_DIR))
+        factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+        revisions.install(engine, factory)
+        _worker_sessions = factory
+    return _worker_sessions()
+
+
+def queue_slide_media(filename: str) -> None:
+    """Process an uploaded slide in the background, or inline if RQ is unavailable."""
+    from . import display
+
+    if Path(filename).suffix.lower() in display.VIDEO_EXTENSIONS:
+        if not shutil.which("ffmpeg"):
+            return
+    elif Image is None:
+        return
+    if q is not None:
+        try:
+            q.enqueue(process_slide_media, filename, job_timeout=300)
+            return
+        except Exception:
+            pass
+    try:
+        process_slide_media(filename)
+    except Exception:
+        if has_app_context():
+            current_app.logger.exception("Failed to build renditions for slide %s", filename)
@@ -1,11 +1,38 @@
-"""Redis Queue instance used by the mailer and other background jobs."""
+"""Redis Queue instance used by the mailer and other background jobs.
+
+``q`` is created on first use, on the shared pool from ``redis_pool``:
+importing this module does not import rq or redis or open a connection,
+which keeps app worker start-up fast. Callers still get an exception from
+``q.enqueue`` when Redis is unreachable or rq is not installed, and fall
+back to running the job inline.
+"""
 
 # GuestDesk
 # Copyright (c) 2025 Chris Tanton
 # SPDX-License-Identifier: LicenseRef-GDCL-1.1
-import os
-from redis import Redis
-from rq import Queue
+import threading
+
+from .redis_pool import get_redis
+
+
+class _LazyQueue:
+    """Stands in for the rq ``Queue``, building it on first attribute access."""
+
+    def __init__(self):
+        self._queue = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._queue is None:
+            with self._lock:
+                if self._queue is None:
+                    from rq import Queue
+
+                    self._queue = Queue(connection=get_redis())
+        return self._queue
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
 
-_redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-q = Queue(connection=Redis.from_url(_redis_url))
+q = _LazyQueue()
@@ -2,7 +2,7 @@ import io
 
 from werkzeug.security import generate_password_hash
 
-from guestdesk.models import Announcement, AnnouncementImage, User, UserPermission
+from guestdesk.models import Announcement, AnnouncementImage, Service, User, UserPermission
 
 
 def _make_app(monkeypatch, tmp_path):
@@ -83,6 +83,30 @@ def test_images_render_publicly_and_are_served(monkeypatch, tmp_path):
     assert guest.get("/announcements/image/9999").status_code == 404
 
 
+def test_reused_image_id_gets_a_new_url(monkeypatch, tmp_path):
+    app = _make_app(monkeypatch, tmp_path)
+    client = _login(app, _editor(app))
+    _post_announcement(client, [(io.BytesIO(b"old-flyer"), "flyer.png")])
+    with app.app_context():
+        db = app.dbs()
+        old = db.query(AnnouncementImage).one()
+        old_id, old_version = old.id, old.version
+        db.delete(db.get(Announcement, old.announcement_id))
+        db.commit()
+    _post_announcement(client, [(io.BytesIO(b"new-flyer"), "flyer.png")])
+    with app.app_context():
+        new = app.dbs().query(AnnouncementImage).one()
+        new_id, new_version = new.id, new.version
+
+    assert new_id == old_id and new_version != old_version
+    guest = app.test_client()
+    assert f"/announcements/image/{new_id}?v={new_version}" in guest.get("/announcements").get_data(as_text=True)
+    assert "max-age=86400" in guest.get(f"/announcements/image/{new_id}?v={new_version}").headers["Cache-Control"]
+    # a page cached with the old URL revalidates instead of reusing its copy
+    stale = guest.get(f"/announcements/image/{old_id}?v={old_version}")
+    assert stale.data == b"new-flyer" and "max-age=0" in stale.headers["Cache-Control"]
+
+
 def test_duplicate_filenames_stored_uniquely(monkeypatch, tmp_path):
     app = _make_app(monkeypatch, tmp_path)
     client = _login(app, _editor(app))
@@ -180,3 +204,105 @@ def test_delete_announcement_removes_images(monkeypatch, tmp_path):
     with app.app_context():
         assert app.dbs().query(AnnouncementImage).count() == 0
     assert not (tmp_path / "uploads" / "announcements" / str(ann_id)).exists()
+
+
+def test_home_page_cache_follows_edits(monkeypatch, tmp_path):
+    from guestdesk.home_data import home_context
+
+    app = _make_app(monkeypatch, tmp_path)
+    client = _login(app, _editor(app))
+    _post_announcement(client, [])
+    with app.app_context():
+        ann_id = app.dbs().query(Announcement).one().id
+
+    guest = app.test_client()
+    assert "Pool party" in guest.get("/").get_data(as_text=True)
+    client.post(f"/admin/announcements/{ann_id}/edit", data={
+        "title": "Pool closed", "body": "Sorry.", "starts_at": "2020-01-01T09:00",
+    }, content_type="multipart/form-data")
+    page = guest.get("/").get_data(as_text=True)
+    assert "Pool closed" in page and "Pool party" not in page
+
+    with app.test_request_context():
+        db = app.dbs()
+        assert home_context(db)["counts"]["Laundry"] == 0
+        db.add(Service(name="Laundry room", category="Laundry"))
+        db.commit()
+    with app.test_request_context():
+        assert home_context(app.dbs())["counts"]["Laundry"] == 1
+
+
+def test_announcement_feed_switches_at_scheduled_times(monkeypatch, tmp_path):
+    from datetime import datetime, timedelta
+
+    import guestdesk.announcement_feed as feed_module
+
+    app = _make_app(monkeypatch, tmp_path)
+    start = datetime(2030, 5, 1, 9, 0)
+    with app.app_context():
+        db = app.dbs()
+        db.add(Announcement(title="Now", body=".", starts_at=start - timedelta(days=1),
+                            ends_at=start + timedelta(hours=2)))
+        db.add(Announcement(title="Later", body=".", starts_at=start + timedelta(hours=1)))
+        db.add(Announcement(title="Over", body=".", starts_at=start - timedelta(days=3),
+                            ends_at=start - timedelta(days=2)))
+        db.commit()
+
+    clock = {"now": start}
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return clock["now"]
+
+    monkeypatch.setattr(feed_module, "datetime", FrozenDatetime)
+    builds = []
+    real_build = feed_module.build_feed
+    monkeypatch.setattr(feed_module, "build_feed", lambda db: builds.append(1) or real_build(db))
+
+    def titles():
+        with app.test_request_context():
+            return [a["title"] for a in feed_module.active_announcements(app.dbs())]
+
+    assert titles() == ["Now"]
+    clock["now"] = start + timedelta(minutes=59)
+    assert titles() == ["Now"]
+    assert len(builds) == 1  # served from memory until the next start
+    clock["now"] = start + timedelta(hours=1)
+    assert titles() == ["Later", "Now"]
+    clock["now"] = start + timedelta(hours=2, seconds=1)
+    assert titles() == ["Later"]
+    assert len(builds) == 3
+
+    page = app.test_client().get("/announcements").get_data(as_text=True)
+    assert "Later" in page and "Over" not in page
+
+
+def test_uploaded_images_get_width_renditions(monkeypatch, tmp_path):
+    import pytest
+
+    Image = pytest.importorskip("PIL.Image")
+    import guestdesk.announcement_media as media
+
+    monkeypatch.setattr(media, "q", None)
+    app = _make_app(monkeypatch, tmp_path)
+    client = _login(app, _editor(app))
+    buf = io.BytesIO()
+    Image.new("RGB", (2400, 1600), "teal").save(buf, "PNG")
+    buf.seek(0)
+    _post_announcement(client, [(buf, "flyer.png")])
+    with app.app_context():
+        img = app.dbs().query(AnnouncementImage).one()
+        image_id, version = img.id, img.version
+
+    guest = app.test_client()
+    page = guest.get("/announcements").get_data(as_text=True)
+    assert f"/announcements/image/{image_id}/w320?v={version} 320w" in page
+    small = guest.get(f"/announcements/image/{image_id}/w320?v={version}")
+    assert small.status_code == 200 and small.mimetype in ("image/webp", "image/jpeg")
+    assert "max-age=86400" in small.headers["Cache-Control"]
+    with Image.open(io.BytesIO(small.data)) as im:
+        assert im.size == (320, 213)
+    assert guest.get(f"/announcements/image/{image_id}/w999").status_code == 404
+    # the link target is still the untouched original
+    assert guest.get(f"/announcements/image/{image_id}").mimetype == "image/png"
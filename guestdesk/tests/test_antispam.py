@@ -0,0 +1,46 @@
+import pytest
+
+import guestdesk.antispam as antispam
+
+
+@pytest.fixture
+def local_store(monkeypatch):
+    """Run against the in-process store, as when Redis is down."""
+    monkeypatch.setattr(antispam, "_local", antispam._LocalStore())
+    monkeypatch.setattr(antispam, "_redis_down_until", float("inf"))
+    return antispam._local
+
+
+def test_token_is_claimed_once_then_reports_the_stored_submission(local_store):
+    assert antispam.reserve("tok") == (True, None)
+    assert antispam.reserve("tok") == (False, None)  # first request still storing
+    antispam.complete("tok", 42)
+    assert antispam.reserve("tok") == (False, 42)
+
+
+def test_released_token_can_be_claimed_again(local_store):
+    assert antispam.reserve("tok") == (True, None)
+    antispam.release("tok")
+    assert antispam.reserve("tok") == (True, None)
+
+
+def test_redis_failure_falls_back_and_skips_redis_until_retry(monkeypatch):
+    calls = []
+
+    class Down(Exception):
+        pass
+
+    def unreachable():
+        calls.append(1)
+        raise Down("connection refused")
+
+    monkeypatch.setattr(antispam, "_local", antispam._LocalStore())
+    monkeypatch.setattr(antispam, "_redis_down_until", 0.0)
+    monkeypatch.setattr(antispam, "RedisError", Down)
+    monkeypatch.setattr(antispam, "_redis", unreachable)
+
+    assert antispam.reserve("a") == (True, None)
+    assert antispam.reserve("a") == (False, None)
+    antispam.complete("a", 7)
+    assert antispam.reserve("a") == (False, 7)
+    assert len(calls) == 1  # breaker open after the first failure
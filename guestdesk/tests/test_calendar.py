@@ -0,0 +1,217 @@
+import gzip
+from datetime import datetime, timedelta
+
+from guestdesk.models import Service, ServiceOverride, ServiceSeries
+
+
+def _make_app(monkeypatch, tmp_path):
+    import guestdesk.app as app_module
+
+    monkeypatch.setattr(app_module, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(app_module, "queue_mail", lambda **kwargs: None)
+    app = app_module.create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app
+
+
+def _add_series(app, title="Showers", category="Showers", rrule="FREQ=DAILY"):
+    start = (datetime.utcnow() + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+    with app.app_context():
+        db = app.dbs()
+        svc = Service(name=title, name_en=title, category=category)
+        db.add(svc)
+        db.flush()
+        series = ServiceSeries(title=title, service_id=svc.id, category=category,
+                               dtstart=start, dtend=start + timedelta(hours=1), rrule=rrule)
+        db.add(series)
+        db.commit()
+        return svc.id, series.id
+
+
+def test_calendar_feed_revalidates_with_etag(monkeypatch, tmp_path):
+    app = _make_app(monkeypatch, tmp_path)
+    _add_series(app)
+    client = app.test_client()
+
+    first = client.get("/calendar.ics")
+    assert first.status_code == 200
+    assert b"BEGIN:VCALENDAR" in first.data
+    assert b"Showers" in first.data
+    etag = first.headers["ETag"]
+    assert first.headers["Last-Modified"]
+
+    again = client.get("/calendar.ics", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+
+    _add_series(app, title="Laundry", category="Laundry")
+    changed = client.get("/calendar.ics", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert b"Laundry" in changed.data
+
+
+def test_calendar_feed_gzip_variant(monkeypatch, tmp_path):
+    app = _make_app(monkeypatch, tmp_path)
+    _add_series(app)
+    client = app.test_client()
+
+    plain = client.get("/calendar.ics")
+    packed = client.get("/calendar.ics", headers={"Accept-Encoding": "gzip"})
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert packed.headers["ETag"] != plain.headers["ETag"]
+    assert gzip.decompress(packed.data) == plain.data
+    assert "Accept-Encoding" in packed.headers["Vary"]
+
+
+def test_service_and_category_feeds_are_sliced(monkeypatch, tmp_path):
+    app = _make_app(monkeypatch, tmp_path)
+    showers_id, _ = _add_series(app)
+    _add_series(app, title="ID Clinic", category="ID/Docs", rrule="FREQ=WEEKLY")
+    client = app.test_client()
+
+    svc = client.get(f"/calendar/{showers_id}.ics")
+    assert svc.status_code == 200
+    assert b"Showers" in svc.data
+    assert b"ID Clinic" not in svc.data
+
+    cat = client.get("/calendar/category/id-docs.ics")
+    assert cat.status_code == 200
+    assert b"ID Clinic" in cat.data
+    assert b"Showers" not in cat.data
+    assert cat.headers["ETag"] != svc.headers["ETag"]
+
+    assert client.get("/calendar/9999.ics").status_code == 404
+
+
+def test_occurrence_store_reexpands_only_changed_series(monkeypatch, tmp_path):
+    import guestdesk.services_calendar as sc
+
+    app = _make_app(monkeypatch, tmp_path)
+    _add_series(app)
+    _, laundry_series = _add_series(app, title="Laundry", category="Laundry")
+    calls = []
+    real = sc.expand_occurrences
+    monkeypatch.setattr(sc, "expand_occurrences", lambda s, a, b: calls.append(s.id) or real(s, a, b))
+
+    start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    end = start + timedelta(days=14)
+    with app.test_request_context():
+        db = app.dbs()
+        assert len(sc.cached_occurrences(db, start, end)) == 26
+        db.close()
+    assert len(calls) == 2
+
+    with app.app_context():
+        db = app.dbs()
+        db.get(ServiceSeries, laundry_series).title = "Laundry Day"
+        db.commit()
+
+    calls.clear()
+    with app.test_request_context():
+        db = app.dbs()
+        events = sc.cached_occurrences(db, start, end, category="laundry")
+        db.close()
+    assert calls == [laundry_series]
+    assert {ev["title"] for ev in events} == {"Laundry Day"}
+
+
+def test_ics_feeds_share_the_occurrence_cache(monkeypatch, tmp_path):
+    import guestdesk.services_calendar as sc
+
+    app = _make_app(monkeypatch, tmp_path)
+    # Several instances a day: written as expanded VEVENTs, not an RRULE
+    showers_id, _ = _add_series(app, rrule="FREQ=DAILY;BYHOUR=9,15")
+    _, laundry_series = _add_series(app, title="Laundry", category="Laundry", rrule="FREQ=DAILY;BYHOUR=9,15")
+    calls = []
+    real = sc.expand_occurrences
+    monkeypatch.setattr(sc, "expand_occurrences", lambda s, a, b: calls.append(s.id) or real(s, a, b))
+    client = app.test_client()
+
+    assert b"Laundry" in client.get("/calendar.ics").data
+    assert len(calls) == 2
+    assert b"Showers" in client.get(f"/calendar/{showers_id}.ics").data
+    assert len(calls) == 2
+
+    with app.app_context():
+        db = app.dbs()
+        db.get(ServiceSeries, laundry_series).title = "Laundry Day"
+        db.commit()
+
+    calls.clear()
+    assert b"Laundry Day" in client.get("/calendar/category/laundry.ics").data
+    assert calls == [laundry_series]
+
+
+def test_feed_keeps_rrule_and_writes_overrides_as_children(monkeypatch, tmp_path):
+    app = _make_app(monkeypatch, tmp_path)
+    _, series_id = _add_series(app)
+    with app.app_context():
+        db = app.dbs()
+        series = db.get(ServiceSeries, series_id)
+        db.add(ServiceOverride(series_id=series_id, instance_start=series.dtstart + timedelta(days=1),
+                               new_title="Showers, moved"))
+        db.add(ServiceOverride(series_id=series_id, instance_start=series.dtstart + timedelta(days=2),
+                               cancelled=True))
+        db.commit()
+    client = app.test_client()
+
+    text = client.get("/calendar.ics").data.decode()
+    assert text.count("BEGIN:VEVENT") == 2
+    assert "RRULE:FREQ=DAILY" in text
+    assert "DTSTART;TZID=America/New_York:" in text
+    assert "RECURRENCE-ID;TZID=America/New_York:" in text
+    assert "SUMMARY:Showers\\, moved" in text
+    assert "EXDATE;TZID=America/New_York:" in text
+    assert all(len(line.encode()) <= 75 for line in text.split("\r\n"))
+
+
+def test_long_horizon_is_streamed(monkeypatch, tmp_path):
+    app = _make_app(monkeypatch, tmp_path)
+    _add_series(app, title="Clinic", category="Medical", rrule="FREQ=DAILY;BYHOUR=9,14")
+    client = app.test_client()
+
+    resp = client.get("/calendar.ics?days=200")
+    assert resp.is_streamed
+    assert resp.data.decode().count("BEGIN:VEVENT") >= 390
+    packed = client.get("/calendar.ics?days=200", headers={"Accept-Encoding": "gzip"})
+    assert gzip.decompress(packed.data) == resp.data
+    assert client.get("/calendar.ics?days=200",
+                      headers={"If-None-Match": resp.headers["ETag"]}).status_code == 304
+
+
+def test_admin_feed_returns_only_changed_series_since_revision(monkeypatch, tmp_path):
+    app = _make_app(monkeypatch, tmp_path)
+    _, showers_series = _add_series(app)
+    _, laundry_series = _add_series(app, title="Laundry", category="Laundry")
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["is_admin"] = True
+    start = datetime.utcnow().date().isoformat()
+    end = (datetime.utcnow().date() + timedelta(days=7)).isoformat()
+    url = f"/admin/services/feed?start={start}&end={end}"
+
+    legacy = client.get(url).get_json()
+    assert isinstance(legacy, list) and len(legacy) == 12
+
+    full = client.get(url + "&since=-1&compact=1").get_json()
+    assert full["full"] is True
+    assert len(full["rows"]) == 12
+    assert full["series"][str(laundry_series)]["title"] == "Laundry"
+
+    unchanged = client.get(url + f"&since={full['revision']}").get_json()
+    assert unchanged == {"revision": full["revision"], "full": False, "series_ids": [], "events": []}
+
+    with app.app_context():
+        db = app.dbs()
+        db.get(ServiceSeries, laundry_series).location = "Back door"
+        db.commit()
+
+    delta = client.get(url + f"&since={full['revision']}").get_json()
+    assert delta["full"] is False
+    assert delta["series_ids"] == [laundry_series]
+    assert {ev["series_id"] for ev in delta["events"]} == {laundry_series}
+    assert all(ev["location"] == "Back door" for ev in delta["events"])
+
+    sliced = client.get(url + "&since=-1&category=showers").get_json()
+    assert {ev["series_id"] for ev in sliced["events"]} == {showers_series}
@@ -0,0 +1,118 @@
+def _make_app(monkeypatch, tmp_path):
+    import guestdesk.app as app_module
+    import guestdesk.display as display_module
+    import guestdesk.grievances as grievances_module
+
+    monkeypatch.setattr(app_module, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(grievances_module, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(display_module, "DATA_ROOT", tmp_path / "display")
+    monkeypatch.setattr(display_module, "DATA_PATH", tmp_path / "display" / "display_config.json")
+    monkeypatch.setattr(display_module, "SLIDES_DIR", tmp_path / "display" / "display_slides")
+    app = app_module.create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app
+
+
+def test_sqlite_engine_applies_connection_profile(monkeypatch, tmp_path):
+    from guestdesk.database import create_sqlite_engine, sqlite_report
+
+    report = sqlite_report(create_sqlite_engine(str(tmp_path / "a.db")))
+    assert report["journal_mode"] == "wal"
+    assert report["busy_timeout"] == "5000"
+    assert report["synchronous"] == "1"  # NORMAL
+    assert report["temp_store"] == "2"  # MEMORY
+
+    monkeypatch.setenv("GUESTDESK_SQLITE_BUSY_TIMEOUT", "250")
+    monkeypatch.setenv("GUESTDESK_SQLITE_JOURNAL_MODE", "")
+    report = sqlite_report(create_sqlite_engine(str(tmp_path / "b.db")))
+    assert report["busy_timeout"] == "250"
+    assert report["journal_mode"] == "delete"
+
+
+def test_reporting_session_is_read_only(monkeypatch, tmp_path):
+    import pytest
+    from sqlalchemy.exc import OperationalError
+
+    from guestdesk.models import Service
+
+    app = _make_app(monkeypatch, tmp_path)
+    with app.app_context():
+        db = app.dbs()
+        db.add(Service(name="Showers", category="Showers"))
+        db.commit()
+        ro = app.dbs_ro()
+        assert ro.get_bind() is not db.get_bind()
+        # writes made through the main engine are visible to reports
+        assert ro.query(Service).one().name == "Showers"
+        ro.add(Service(name="Laundry", category="Laundry"))
+        with pytest.raises(OperationalError):
+            ro.commit()
+        ro.rollback()
+
+
+def test_migrate_upgrades_unversioned_database_once(tmp_path):
+    from sqlalchemy import inspect
+    from sqlalchemy.orm import Session
+
+    from guestdesk.database import create_app_engine, database_url
+    from guestdesk.migrations import MIGRATIONS, SCHEMA_VERSION, current_version, migrate
+    from guestdesk.models import Service
+
+    engine = create_app_engine(database_url(str(tmp_path)))
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE services (id INTEGER PRIMARY KEY, name VARCHAR(120) NOT NULL,"
+            " category VARCHAR(64) NOT NULL, description TEXT, location VARCHAR(120),"
+            " contact VARCHAR(120), schedule_note VARCHAR(200), external_link VARCHAR(200))")
+        conn.exec_driver_sql("INSERT INTO services (name, category, location) VALUES ('Showers', 'Showers', 'Annex')")
+
+    assert current_version(engine) is None
+    assert migrate(engine) == [number for number, _, _ in MIGRATIONS]
+    assert current_version(engine) == SCHEMA_VERSION
+    assert migrate(engine) == []
+
+    columns = {c["name"] for c in inspect(engine).get_columns("services")}
+    assert {"availability", "is_offsite", "name_en", "schedule_note_es"} <= columns
+    with Session(engine) as db:
+        svc = db.query(Service).one()
+        assert svc.availability == "scheduled"
+        assert svc.is_offsite is False
+        assert (svc.name_en, svc.location_en) == ("Showers", "Annex")
+
+
+def test_new_database_is_stamped_without_running_steps(monkeypatch, tmp_path):
+    import guestdesk.migrations as migrations_module
+
+    from guestdesk.database import create_app_engine, database_url
+
+    ran = []
+    monkeypatch.setattr(migrations_module, "MIGRATIONS", tuple(
+        (n, d, lambda conn, n=n: ran.append(n)) for n, d, _ in migrations_module.MIGRATIONS))
+    engine = create_app_engine(database_url(str(tmp_path)))
+    assert migrations_module.migrate(engine) == []
+    assert ran == []
+    assert migrations_module.current_version(engine) == migrations_module.SCHEMA_VERSION
+
+
+def test_submission_hash_backfill(tmp_path):
+    from sqlalchemy import inspect
+
+    from guestdesk.database import create_app_engine, database_url
+    from guestdesk.migrations import _record, migrate
+    from guestdesk.models import Base, submission_content_hash
+
+    engine = create_app_engine(database_url(str(tmp_path)))
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_submissions_kind_hash_created")
+        conn.exec_driver_sql("ALTER TABLE submissions DROP COLUMN content_hash")
+        conn.exec_driver_sql(
+            "INSERT INTO submissions (kind, body, subject, created_at, status)"
+            " VALUES ('question', 'Where is  the laundry?', 'Laundry', '2025-01-01', 'new')")
+        _record(conn, 2)
+
+    assert migrate(engine) == [3]
+    with engine.connect() as conn:
+        stored = conn.exec_driver_sql("SELECT content_hash FROM submissions").scalar()
+    assert stored == submission_content_hash("question", "where is the laundry?", subject="laundry")
+    assert "ix_submissions_kind_hash_created" in {ix["name"] for ix in inspect(engine).get_indexes("submissions")}
@@ -0,0 +1,349 @@
+import json
+
+
+def _make_app(monkeypatch, tmp_path):
+    import guestdesk.app as app_module
+    import guestdesk.display as display_module
+    import guestdesk.grievances as grievances_module
+
+    monkeypatch.setattr(app_module, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(grievances_module, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(display_module, "DATA_ROOT", tmp_path / "display")
+    monkeypatch.setattr(display_module, "DATA_PATH", tmp_path / "display" / "display_config.json")
+    monkeypatch.setattr(display_module, "SLIDES_DIR", tmp_path / "display" / "display_slides")
+    monkeypatch.setattr(app_module, "queue_mail", lambda **kwargs: None)
+    monkeypatch.setattr(grievances_module, "queue_mail", lambda **kwargs: None)
+    app = app_module.create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app
+
+
+def _write_config(tmp_path, headline="Welcome"):
+    path = tmp_path / "display" / "display_config.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        "displays": {"lobby": {"name": "Lobby", "location": "", "active": True,
+                               "assigned_slideshow": "main"}},
+        "slideshows": {"main": {"name": "Main", "description": "", "fade_duration": 1.4, "slides": [
+            {"id": 1, "type": "text", "headline": headline, "duration": 10,
+             "active": True, "order": 1, "transition": "fade"},
+        ]}},
+    }))
+    return path
+
+
+def _set_headline(app, headline):
+    import guestdesk.display as display_module
+    from guestdesk.models import Slide
+
+    with app.app_context():
+        db = app.dbs()
+        db.query(Slide).one().headline = headline
+        display_module.commit(db)
+
+
+def test_json_config_imported_once_into_database(monkeypatch, tmp_path):
+    from guestdesk.models import Display, Setting, Slideshow
+
+    path = _write_config(tmp_path)
+    app = _make_app(monkeypatch, tmp_path)
+    with app.app_context():
+        db = app.dbs()
+        display = db.query(Display).filter_by(slug="lobby").one()
+        assert display.slideshow.slug == "main"
+        assert display.slideshow.slides[0].headline == "Welcome"
+        assert db.get(Setting, "display_config_imported").value == str(path)
+
+    # the file is kept as a backup but never re-imported
+    path.write_text(path.read_text().replace('"lobby"', '"hall"'))
+    app = _make_app(monkeypatch, tmp_path)
+    with app.app_context():
+        assert [d.slug for d in app.dbs().query(Display)] == ["lobby"]
+
+    # old zone-based files are converted on the way in
+    legacy = tmp_path / "legacy"
+    legacy.mkdir()
+    (legacy / "display").mkdir()
+    (legacy / "display" / "display_config.json").write_text(json.dumps({
+        "zones": [{"id": 1, "name": "Hall", "slug": "hall", "active": True}],
+        "slides": [{"id": 7, "zone_id": 1, "type": "image", "file": "a.png", "order": 2},
+                   {"id": 8, "zone_id": 1, "type": "text", "headline": "Hi", "order": 1}],
+    }))
+    app = _make_app(monkeypatch, legacy)
+    with app.app_context():
+        show = app.dbs().query(Slideshow).filter_by(slug="hall").one()
+        assert [(s.type, s.position) for s in show.slides] == [("text", 1), ("image", 2)]
+
+
+def test_snapshot_rebuilt_only_after_display_edits(monkeypatch, tmp_path):
+    import guestdesk.display as display_module
+
+    _write_config(tmp_path)
+    app = _make_app(monkeypatch, tmp_path)
+    client = app.test_client()
+    builds = []
+    real_build = display_module._build_snapshot
+    monkeypatch.setattr(display_module, "_build_snapshot", lambda db: builds.append(1) or real_build(db))
+
+    for _ in range(3):
+        resp = client.get("/api/display-slides/lobby")
+        assert resp.get_json()["slides"][0]["headline"] == "Welcome"
+    assert len(builds) == 1
+
+    _set_headline(app, "Lunch at noon")
+    assert client.get("/api/display-slides/lobby").get_json()["slides"][0]["headline"] == "Lunch at noon"
+    assert len(builds) == 2
+
+
+def test_admin_slide_edits_are_row_level(monkeypatch, tmp_path):
+    from guestdesk.models import Slide
+
+    _write_config(tmp_path)
+    app = _make_app(monkeypatch, tmp_path)
+    admin = app.test_client()
+    with admin.session_transaction() as s:
+        s["is_admin"] = True
+
+    admin.post("/admin/slideshows/main", data={"action": "add_text", "headline": "Second", "duration": "5"})
+    with app.app_context():
+        first, second = app.dbs().query(Slide).order_by(Slide.position).all()
+    admin.post("/admin/slideshows/main", data={"action": "move_slide", "slide_id": second.id, "direction": "up"})
+    admin.post("/admin/slideshows", data={"action": "duplicate_slideshow", "slug": "main"})
+
+    slides = app.test_client().get("/api/display-slides/lobby").get_json()["slides"]
+    assert [s["headline"] for s in slides] == ["Second", "Welcome"]
+    copy = app.test_client().get("/api/slideshow-slides/main-2").get_json()
+    assert copy["display"]["name"] == "Main (copy)"
+    assert [s["headline"] for s in copy["slides"]] == ["Second", "Welcome"]
+    assert admin.get("/admin/slideshows/main").status_code == 200
+    assert admin.get("/admin/displays").status_code == 200
+
+
+def test_long_poll_wakes_on_save(monkeypatch, tmp_path):
+    import threading
+
+    _write_config(tmp_path)
+    app = _make_app(monkeypatch, tmp_path)
+    client = app.test_client()
+    token = client.get("/api/display-slides/lobby").get_json()["token"]
+
+    # an out-of-date token is answered immediately with the new content
+    stale = client.get("/api/display-slides/lobby/wait?token=old").get_json()
+    assert stale["changed"] is True and stale["token"] == token
+
+    # nothing changed: the wait times out with the same token
+    assert client.get(f"/api/display-slides/lobby/wait?token={token}&timeout=1").get_json() == {
+        "changed": False, "token": token}
+
+    result = {}
+
+    def wait():
+        result["data"] = app.test_client().get(
+            f"/api/display-slides/lobby/wait?token={token}&timeout=10").get_json()
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    _set_headline(app, "Doors close at 9")
+    waiter.join(timeout=5)
+    assert not waiter.is_alive()
+    assert result["data"]["changed"] is True
+    assert result["data"]["slides"][0]["headline"] == "Doors close at 9"
+    assert result["data"]["token"] != token
+
+
+def test_slides_api_revalidates_with_etag(monkeypatch, tmp_path):
+    import guestdesk.display as display_module
+
+    _write_config(tmp_path)
+    app = _make_app(monkeypatch, tmp_path)
+    client = app.test_client()
+    builds = []
+    real_enrich = display_module._enrich_slides
+    monkeypatch.setattr(display_module, "_enrich_slides", lambda *a: builds.append(1) or real_enrich(*a))
+
+    first = client.get("/api/display-slides/lobby")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+    assert client.get("/api/display-slides/lobby").data == first.data
+    assert client.get("/api/display-slides/lobby", headers={"If-None-Match": etag}).status_code == 304
+    assert len(builds) == 1
+
+    preview = client.get("/api/slideshow-slides/main")
+    assert client.get("/api/slideshow-slides/main",
+                      headers={"If-None-Match": preview.headers["ETag"]}).status_code == 304
+
+    with app.app_context():
+        db = app.dbs()
+        display_module.slideshow_row(db, "main").fade_duration = 2.0
+        display_module.commit(db)
+    changed = client.get("/api/display-slides/lobby", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.get_json()["slideshow"]["fade_duration"] == 2.0
+    assert client.get("/api/display-slides/missing").status_code == 404
+
+
+def test_uploaded_image_gets_screen_sized_renditions(monkeypatch, tmp_path):
+    import io
+
+    import pytest
+
+    Image = pytest.importorskip("PIL.Image")
+    import guestdesk.slide_media as slide_media
+
+    monkeypatch.setattr(slide_media, "q", None)
+    _write_config(tmp_path)
+    app = _make_app(monkeypatch, tmp_path)
+    admin = app.test_client()
+    with admin.session_transaction() as s:
+        s["is_admin"] = True
+
+    buf = io.BytesIO()
+    Image.new("RGB", (3000, 2000), "navy").save(buf, "PNG")
+    buf.seek(0)
+    resp = admin.post("/admin/slideshows/main", data={
+        "action": "add_image", "duration": "8", "image_file": (buf, "poster.png"),
+    }, content_type="multipart/form-data")
+    assert resp.status_code == 302
+
+    slides_dir = tmp_path / "display" / "display_slides"
+    small = app.test_client().get("/api/display-slides/lobby?h=700").get_json()["slides"][-1]
+    assert small["file_url"].endswith(".720.webp") or small["file_url"].endswith(".720.jpg")
+    assert "renditions" not in small
+    with Image.open(slides_dir / small["file_url"].split("/display-media/", 1)[1]) as im:
+        assert im.size == (1080, 720)
+
+    full = app.test_client().get("/api/display-slides/lobby?h=2160").get_json()["slides"][-1]
+    assert full["file_url"].endswith(".png") and "_renditions" not in full["file_url"]
+
+
+def test_uploads_are_content_named_and_cached_immutably(monkeypatch, tmp_path):
+    import hashlib
+    import io
+
+    monkeypatch.setattr("guestdesk.display.queue_slide_media", lambda filename: None)
+    _write_config(tmp_path)
+    app = _make_app(monkeypatch, tmp_path)
+    admin = app.test_client()
+    with admin.session_transaction() as s:
+        s["is_admin"] = True
+
+    video = b"\x00\x00\x00\x18ftypmp42" + bytes(range(256)) * 8
+    for name in ("intro.mp4", "intro-copy.mp4"):
+        resp = admin.post("/admin/slideshows/main", data={
+            "action": "add_video", "duration": "8", "video_file": (io.BytesIO(video), name),
+        }, content_type="multipart/form-data")
+        assert resp.status_code == 302
+
+    expected = hashlib.sha256(video).hexdigest()[:20] + ".mp4"
+    slides_dir = tmp_path / "display" / "display_slides"
+    assert sorted(p.name for p in slides_dir.iterdir() if p.is_file()) == [expected]
+    slides = app.test_client().get("/api/slideshow-slides/main").get_json()["slides"]
+    assert [(s["file"], s["name"]) for s in slides[1:]] == [(expected, "intro.mp4"), (expected, "intro-copy.mp4")]
+
+    client = app.test_client()
+    resp = client.get(f"/display-media/{expected}")
+    assert resp.data == video
+    assert "immutable" in resp.headers["Cache-Control"]
+    partial = client.get(f"/display-media/{expected}", headers={"Range": "bytes=0-99"})
+    assert partial.status_code == 206
+    assert partial.data == video[:100]
+    assert partial.headers["Content-Range"] == f"bytes 0-99/{len(video)}"
+
+    # files uploaded before content naming keep working but revalidate
+    (slides_dir / "old-logo.mp4").write_bytes(video)
+    legacy = client.get("/display-media/old-logo.mp4")
+    assert legacy.status_code == 200 and "immutable" not in legacy.headers["Cache-Control"]
+
+
+def test_display_bundle_manifest_and_delta_tar(monkeypatch, tmp_path):
+    import io
+    import tarfile
+
+    monkeypatch.setattr("guestdesk.display.queue_slide_media", lambda filename: None)
+    _write_config(tmp_path)
+    app = _make_app(monkeypatch, tmp_path)
+    admin = app.test_client()
+    with admin.session_transaction() as s:
+        s["is_admin"] = True
+    for content, name in ((b"first-video", "a.mp4"), (b"second-video", "b.mp4")):
+        admin.post("/admin/slideshows/main", data={
+            "action": "add_video", "duration": "8", "video_file": (io.BytesIO(content), name),
+        }, content_type="multipart/form-data")
+
+    client = app.test_client()
+    resp = client.get("/api/display-bundle/lobby")
+    manifest = resp.get_json()
+    assert len(manifest["slides"]) == 3
+    assert sorted(f["size"] for f in manifest["files"]) == [len(b"first-video"), len(b"second-video")]
+    assert client.get("/api/display-bundle/lobby",
+                      headers={"If-None-Match": resp.headers["ETag"]}).status_code == 304
+
+    names = [f["name"] for f in manifest["files"]]
+    full = client.get("/api/display-bundle/lobby?format=tar")
+    with tarfile.open(fileobj=io.BytesIO(full.data)) as tar:
+        assert sorted(tar.getnames()) == sorted(["manifest.json"] + [f"media/{n}" for n in names])
+        assert tar.extractfile(f"media/{names[0]}").read() in (b"first-video", b"second-video")
+
+    delta = client.post("/api/display-bundle/lobby?format=tar", json={"have": [names[0]]})
+    with tarfile.open(fileobj=io.BytesIO(delta.data)) as tar:
+        assert tar.getnames() == ["manifest.json", f"media/{names[1]}"]
+    # older kiosks still send the list in the query string
+    legacy = client.get(f"/api/display-bundle/lobby?format=tar&have={names[0]}")
+    assert legacy.data == delta.data
+    assert client.get("/api/display-bundle/missing").status_code == 404
+
+
+def test_sync_script_writes_a_bundle_the_player_runs_from_disk(monkeypatch, tmp_path):
+    import importlib.util
+    import io
+    import urllib.error
+    from pathlib import Path
+
+    monkeypatch.setattr("guestdesk.display.queue_slide_media", lambda filename: None)
+    _write_config(tmp_path)
+    app = _make_app(monkeypatch, tmp_path)
+    admin = app.test_client()
+    with admin.session_transaction() as s:
+        s["is_admin"] = True
+
+    def add_video(content, name):
+        admin.post("/admin/slideshows/main", data={
+            "action": "add_video", "duration": "8", "video_file": (io.BytesIO(content), name),
+        }, content_type="multipart/form-data")
+
+    path = Path(__file__).resolve().parents[1] / "scripts" / "sync_display_bundle.py"
+    spec = importlib.util.spec_from_file_location("sync_display_bundle", path)
+    script = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(script)
+
+    client = app.test_client()
+    requests = []
+
+    def urlopen(req, timeout=None):
+        url = req.full_url.removeprefix("http://desk")
+        requests.append((req.get_method(), url, req.data))
+        resp = client.open(url, method=req.get_method(), data=req.data, headers=dict(req.header_items()))
+        if resp.status_code == 304:
+            raise urllib.error.HTTPError(req.full_url, 304, "Not Modified", resp.headers, None)
+        reply = io.BytesIO(resp.data)
+        reply.headers = resp.headers
+        return reply
+
+    monkeypatch.setattr(script.urllib.request, "urlopen", urlopen)
+    dest = tmp_path / "kiosk"
+    add_video(b"first-video", "a.mp4")
+    assert script.sync("http://desk", "lobby", dest) is True
+    assert "const OFFLINE = true" in (dest / "index.html").read_text()
+    bundle = json.loads((dest / "manifest.js").read_text().removeprefix("window.GUESTDESK_BUNDLE = ").rstrip(";\n"))
+    first = bundle["files"][0]["name"]
+    assert (dest / "media" / first).read_bytes() == b"first-video"
+    assert any(s.get("file_url", "").endswith(first) for s in bundle["slides"])
+
+    assert script.sync("http://desk", "lobby", dest) is False
+
+    add_video(b"second-video", "b.mp4")
+    requests.clear()
+    assert script.sync("http://desk", "lobby", dest) is True
+    method, url, body = next(r for r in requests if "format=tar" in r[1])
+    assert method == "POST" and "have" not in url and json.loads(body) == {"have": [first]}
+    assert sorted(p.read_bytes() for p in (dest / "media").iterdir()) == [b"first-video", b"second-video"]
@@ -0,0 +1,58 @@
+import pytest
+
+import guestdesk.redis_pool as redis_pool
+
+
+@pytest.fixture
+def fresh_pool(monkeypatch):
+    for name in ("REDIS_URL", "REDIS_SOCKET", "RATELIMIT_STORAGE_URI"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(redis_pool, "_pool", None)
+    monkeypatch.setattr(redis_pool, "_client", None)
+
+
+def test_unix_socket_overrides_host_but_keeps_db_and_password(monkeypatch, fresh_pool):
+    monkeypatch.setenv("REDIS_URL", "redis://:secret@cache:6379/3")
+    monkeypatch.setenv("REDIS_SOCKET", "/run/redis/redis.sock")
+    monkeypatch.setenv("REDIS_MAX_CONNECTIONS", "7")
+    kwargs = redis_pool.get_pool().connection_kwargs
+    assert (kwargs["path"], kwargs["db"], kwargs["password"]) == ("/run/redis/redis.sock", 3, "secret")
+    assert redis_pool.get_pool().max_connections == 7
+
+
+def test_idempotency_and_queue_share_one_pool(monkeypatch, fresh_pool):
+    import guestdesk.antispam as antispam
+    import guestdesk.task_queue as task_queue
+
+    monkeypatch.setattr(antispam, "_client", None)
+    monkeypatch.setattr(task_queue, "q", task_queue._LazyQueue())
+    pool = redis_pool.get_pool()
+    assert antispam._redis().connection_pool is pool
+    assert task_queue.q.connection.connection_pool is pool
+    stats = redis_pool.pool_stats()
+    assert stats["target"] == "localhost:6379/0"
+    assert stats["max_connections"] == 20
+
+
+def test_rate_limits_use_the_shared_pool_when_redis_is_configured(monkeypatch, fresh_pool):
+    assert redis_pool.limiter_config() == {"RATELIMIT_STORAGE_URI": "memory://"}
+    assert redis_pool._pool is None  # nothing configured, nothing connected
+
+    monkeypatch.setenv("RATELIMIT_STORAGE_URI", "memcached://cache:11211")
+    assert redis_pool.limiter_config() == {"RATELIMIT_STORAGE_URI": "memcached://cache:11211"}
+
+    monkeypatch.delenv("RATELIMIT_STORAGE_URI")
+    monkeypatch.setenv("REDIS_URL", "redis://cache:6379/1")
+    config = redis_pool.limiter_config()
+    assert config["RATELIMIT_STORAGE_URI"] == "redis://"
+    assert config["RATELIMIT_STORAGE_OPTIONS"]["connection_pool"] is redis_pool.get_pool()
+    assert config["RATELIMIT_IN_MEMORY_FALLBACK_ENABLED"] is True
+
+
+def test_worker_connects_where_the_app_enqueues_without_a_reply_timeout(monkeypatch, fresh_pool):
+    monkeypatch.setenv("REDIS_URL", "redis://cache:6379/2")
+    monkeypatch.setenv("REDIS_SOCKET", "/run/redis/redis.sock")
+    kwargs = redis_pool.worker_redis().connection_pool.connection_kwargs
+    assert (kwargs["path"], kwargs["db"]) == ("/run/redis/redis.sock", 2)
+    assert kwargs["socket_connect_timeout"] == 1.0
+    assert kwargs.get("socket_timeout") is None
@@ -82,3 +82,87 @@ def test_grievance_submitter_gets_case_confirmation(monkeypatch, tmp_path):
     assert "GRV-" in confirmation["subject"]
     assert "I want this grievance documented." in confirmation["body"]
     assert "Staff Name" in confirmation["body"]
+
+
+def test_settings_saved_by_one_worker_reach_the_others(monkeypatch, tmp_path):
+    from guestdesk.models import Setting
+
+    writer, _ = _make_test_app(monkeypatch, tmp_path)
+    reader, _ = _make_test_app(monkeypatch, tmp_path)
+    assert reader.config["MAINTENANCE_EMAIL_TO"] == ["maintenance@example.org"]
+
+    with writer.app_context():
+        db = writer.dbs()
+        db.add(Setting(key="MAINTENANCE_EMAIL_TO", value="ops@example.org, night@example.org"))
+        db.commit()
+
+    with reader.test_client() as client:
+        client.get("/_healthz")
+    assert reader.config["MAINTENANCE_EMAIL_TO"] == ["ops@example.org", "night@example.org"]
+
+    with writer.app_context():
+        db = writer.dbs()
+        db.delete(db.get(Setting, "MAINTENANCE_EMAIL_TO"))
+        db.commit()
+
+    with reader.test_client() as client:
+        client.get("/_healthz")
+    # the value the table had overridden comes back
+    assert reader.config["MAINTENANCE_EMAIL_TO"] == ["maintenance@example.org"]
+
+
+def test_repeated_maintenance_request_is_deduplicated_by_hash(monkeypatch, tmp_path):
+    from guestdesk.models import Submission, submission_content_hash
+
+    app, sent = _make_test_app(monkeypatch, tmp_path)
+    form = {
+        "subject": "Leaky sink",
+        "body": "Water is pooling under the sink.",
+        "category": "Plumbing",
+        "building": "A",
+        "location": "Room 101",
+    }
+    with app.test_client() as client:
+        assert client.post("/submit/maintenance", data=form).status_code == 200
+        retry = dict(form, body="  water is pooling   under the SINK. ")
+        assert client.post("/submit/maintenance", data=retry).status_code == 200
+
+    with app.app_context():
+        rows = app.dbs().query(Submission).all()
+    assert len(rows) == 1
+    fields = {k: v for k, v in form.items() if k != "body"}
+    assert rows[0].content_hash == submission_content_hash("maintenance", form["body"], **fields)
+
+
+def test_failed_commit_releases_the_idempotency_key(monkeypatch, tmp_path):
+    import pytest
+    from sqlalchemy import event
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import Session
+
+    import guestdesk.antispam as antispam
+    from guestdesk.models import Submission
+
+    monkeypatch.setattr(antispam, "_local", antispam._LocalStore())
+    monkeypatch.setattr(antispam, "_redis_down_until", float("inf"))
+    app, _ = _make_test_app(monkeypatch, tmp_path)
+    form = {"subject": "Leaky sink", "body": "Water is pooling under the sink.",
+            "building": "A", "location": "Room 101", "idempotency_key": "form-1"}
+
+    def locked(session):
+        if any(isinstance(obj, Submission) for obj in session.identity_map.values()):
+            raise OperationalError("COMMIT", {}, Exception("database is locked"))
+
+    event.listen(Session, "before_commit", locked)
+    try:
+        with app.test_client() as client, pytest.raises(OperationalError):
+            client.post("/submit/maintenance", data=form)
+    finally:
+        event.remove(Session, "before_commit", locked)
+
+    # the guest's retry is stored rather than reported as already received
+    with app.test_client() as client:
+        resp = client.post("/submit/maintenance", data=form)
+    assert b"already received" not in resp.data
+    with app.app_context():
+        assert app.dbs().query(Submission).count() == 1
@@ -0,0 +1,17 @@
+import importlib.util
+from pathlib import Path
+
+
+def _benchmark():
+    path = Path(__file__).resolve().parents[1] / "scripts" / "import_benchmark.py"
+    spec = importlib.util.spec_from_file_location("import_benchmark", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_worker_start_up_stays_within_import_budget():
+    bench = _benchmark()
+    rows = bench.measure()
+    assert bench.deferred_loaded(rows) == set()
+    assert bench.startup_import_ms(rows) <= bench.IMPORT_BUDGET_MS
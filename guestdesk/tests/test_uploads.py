@@ -0,0 +1,98 @@
+import hashlib
+import io
+from pathlib import Path
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import guestdesk.uploads as uploads
+from guestdesk.models import Submission
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+def _make_app(monkeypatch, tmp_path):
+    import guestdesk.app as app_module
+
+    sent = []
+    monkeypatch.setattr(app_module, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(app_module, "queue_mail", lambda **kwargs: sent.append(kwargs))
+    app = app_module.create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False,
+                      MAINTENANCE_EMAIL_TO=["maintenance@example.org"])
+    return app, sent
+
+
+def _maintenance_form(photo):
+    return {
+        "subject": "Broken window",
+        "body": "The latch on the window is broken.",
+        "building": "A",
+        "location": "Room 101",
+        "photo": photo,
+    }
+
+
+def test_save_upload_streams_in_chunks_and_leaves_no_temp_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK", 1024)
+    data = PNG + bytes(range(256)) * 40
+    reads = []
+
+    class Stream(io.BytesIO):
+        def read(self, size=-1):
+            reads.append(size)
+            return super().read(size)
+
+    dest = tmp_path / "nested" / "photo.png"
+    storage = FileStorage(stream=Stream(data), filename="photo.png")
+    assert uploads.check_upload(storage, ".png") == "image/png"
+    assert uploads.save_upload(storage, dest) == (len(data), hashlib.sha256(data).hexdigest())
+    assert dest.read_bytes() == data
+    assert list(dest.parent.iterdir()) == [dest]
+    assert -1 not in reads and max(reads) == 1024
+
+
+def test_check_upload_rejects_empty_and_mislabeled_files():
+    with pytest.raises(uploads.UploadError) as empty:
+        uploads.check_upload(FileStorage(stream=io.BytesIO(b""), filename="a.png"), ".png")
+    assert empty.value.reason == "empty"
+    with pytest.raises(uploads.UploadError) as wrong:
+        uploads.check_upload(FileStorage(stream=io.BytesIO(b"GIF89a..."), filename="a.png"), ".png")
+    assert wrong.value.reason == "type"
+    gif = FileStorage(stream=io.BytesIO(b"GIF89a..."), filename="a.png")
+    assert uploads.check_upload(gif, ".png", allowed={".png", ".gif"}) == "image/gif"
+
+
+def test_maintenance_photo_is_stored_and_mailed_by_path(monkeypatch, tmp_path):
+    app, sent = _make_app(monkeypatch, tmp_path)
+    with app.test_client() as client:
+        resp = client.post("/submit/maintenance", data=_maintenance_form((io.BytesIO(PNG), "window.png")),
+                           content_type="multipart/form-data")
+    assert resp.status_code == 200
+    with app.app_context():
+        sub = app.dbs().query(Submission).one()
+    stored = list((tmp_path / "uploads" / "maintenance" / str(sub.id)).iterdir())
+    assert len(stored) == 1 and stored[0].read_bytes() == PNG
+    photos = [a for m in sent for a in (m.get("attachments") or []) if a[1].endswith("window.png")]
+    assert photos and all(a[0] == "image/png" and isinstance(a[2], Path) for a in photos)
+
+
+def test_maintenance_photo_of_another_image_type_is_accepted(monkeypatch, tmp_path):
+    app, sent = _make_app(monkeypatch, tmp_path)
+    with app.test_client() as client:
+        resp = client.post("/submit/maintenance", data=_maintenance_form((io.BytesIO(PNG), "IMG_0042.jpg")),
+                           content_type="multipart/form-data")
+    assert resp.status_code == 200 and b"Please upload" not in resp.data
+    photos = [a for m in sent for a in (m.get("attachments") or []) if a[1].endswith("IMG_0042.jpg")]
+    assert photos and all(a[0] == "image/png" for a in photos)
+
+
+def test_maintenance_photo_with_wrong_content_is_rejected(monkeypatch, tmp_path):
+    app, _ = _make_app(monkeypatch, tmp_path)
+    with app.test_client() as client:
+        resp = client.post("/submit/maintenance", data=_maintenance_form((io.BytesIO(b"MZ\x90\x00"), "window.jpg")),
+                           content_type="multipart/form-data")
+    assert b"Please upload a JPG, PNG, or GIF image." in resp.data
+    with app.app_context():
+        assert app.dbs().query(Submission).count() == 0
+    assert not (tmp_path / "uploads" / "maintenance").exists()
@@ -0,0 +1,128 @@
+"""Streaming storage for uploaded files.
+
+Uploads are copied to their destination in ``UPLOAD_CHUNK`` pieces, hashed
+on the way, through a temp file in the destination directory that is renamed
+into place once complete. A worker therefore holds one chunk of an upload in
+memory, not the whole file, and a half-written file is never visible under
+its final name. The file type is checked from the first few bytes before
+anything is written; later stages (email attachments, case records) are
+handed the stored path rather than the contents.
+"""
+
+# GuestDesk
+# Copyright (c) 2025 Chris Tanton
+# SPDX-License-Identifier: LicenseRef-GDCL-1.1
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable
+
+UPLOAD_CHUNK = 1 << 16
+SNIFF_BYTES = 16
+
+# Leading bytes of each accepted format
+_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'%PDF', 'application/pdf'),
+)
+
+EXTENSION_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.pdf': 'application/pdf',
+}
+
+
+class UploadError(ValueError):
+    """An upload that cannot be stored; ``reason`` is ``'empty'`` or ``'type'``."""
+
+    def __init__(self, reason: str, message: str = ''):
+        super().__init__(message or reason)
+        self.reason = reason
+
+
+def sniff(head: bytes) -> str | None:
+    """The MIME type indicated by a file's first bytes, if it is one we accept."""
+    for signature, mimetype in _SIGNATURES:
+        if head.startswith(signature):
+            return mimetype
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def peek(file_storage, size: int = SNIFF_BYTES) -> bytes:
+    """Read the first *size* bytes of an upload and rewind it."""
+    stream = file_storage.stream
+    head = stream.read(size)
+    stream.seek(0)
+    return head
+
+
+def check_upload(file_storage, ext: str, allowed: Iterable[str] | None = None) -> str:
+    """Confirm the content matches extension *ext*; returns the MIME type.
+
+    With ``allowed`` (a set of extensions) content of any of those types is
+    accepted whatever *ext* says, e.g. a PNG a phone saved as ``.jpg``, and
+    the sniffed type is returned. Only the first bytes are read. Raises
+    ``UploadError('empty')`` for an empty file and ``UploadError('type')``
+    when the content is not an accepted type.
+    """
+    head = peek(file_storage)
+    if not head:
+        raise UploadError('empty')
+    found = sniff(head)
+    if allowed is not None:
+        if found is None or found not in {EXTENSION_TYPES.get(e) for e in allowed}:
+            raise UploadError('type')
+        return found
+    expected = EXTENSION_TYPES.get(ext)
+    if expected is None:
+        return file_storage.mimetype or 'application/octet-stream'
+    if found != expected:
+        raise UploadError('type')
+    return expected
+
+
+def spool(file_storage, directory: Path) -> tuple[str, int, str]:
+    """Stream an upload into a new temp file in *directory*.
+
+    Returns ``(temp path, size, sha256 hex digest)``; the caller renames or
+    removes the temp file. Nothing is left behind if the copy fails.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_name = tempfile.mkstemp(prefix='.upload.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: file_storage.stream.read(UPLOAD_CHUNK), b''):
+                digest.update(chunk)
+                size += len(chunk)
+                out.write(chunk)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+    return tmp_name, size, digest.hexdigest()
+
+
+def save_upload(file_storage, path: Path) -> tuple[int, str]:
+    """Stream an upload to *path*, creating its directory; returns ``(size, sha256)``."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_name, size, digest = spool(file_storage, path.parent)
+    try:
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    return size, digest